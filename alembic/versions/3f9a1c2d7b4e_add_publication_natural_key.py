@@ -0,0 +1,37 @@
+"""add natural key unique constraint to publications
+
+Revision ID: 3f9a1c2d7b4e
+Revises: ee60068f48c5
+Create Date: 2026-10-17 09:12:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b4e'
+down_revision = 'ee60068f48c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicatas já existentes (mantém a linha mais antiga) antes de criar a constraint
+    op.execute("""
+        DELETE FROM publications a
+        USING publications b
+        WHERE a.tribunal = b.tribunal
+          AND a.publication_date = b.publication_date
+          AND a.process_number = b.process_number
+          AND a.ctid > b.ctid
+    """)
+    op.create_unique_constraint(
+        'uq_pub_natural_key',
+        'publications',
+        ['tribunal', 'publication_date', 'process_number']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_pub_natural_key', 'publications', type_='unique')
@@ -0,0 +1,52 @@
+"""add monitor_backfills and monitor_backfill_partitions tables
+
+Revision ID: 4f8d2c6b1e37
+Revises: 9b3e5a1f7c24
+Create Date: 2026-10-17 16:32:09.144870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8d2c6b1e37'
+down_revision = '9b3e5a1f7c24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('monitor_backfills',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('monitor_id', sa.UUID(), nullable=False),
+    sa.Column('since', sa.Date(), nullable=False),
+    sa.Column('until', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_backfill_monitor', 'monitor_backfills', ['monitor_id'])
+    op.create_table('monitor_backfill_partitions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('backfill_id', sa.UUID(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('cursor_date', sa.Date(), nullable=True),
+    sa.Column('cursor_id', sa.UUID(), nullable=True),
+    sa.Column('scanned', sa.Integer(), nullable=False),
+    sa.Column('matches', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_backfill_partition_backfill', 'monitor_backfill_partitions', ['backfill_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_backfill_partition_backfill', table_name='monitor_backfill_partitions')
+    op.drop_table('monitor_backfill_partitions')
+    op.drop_index('idx_backfill_monitor', table_name='monitor_backfills')
+    op.drop_table('monitor_backfills')
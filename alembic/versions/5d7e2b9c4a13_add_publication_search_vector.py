@@ -0,0 +1,49 @@
+"""add full-text search vector (portuguese + unaccent) to publications
+
+Revision ID: 5d7e2b9c4a13
+Revises: 8c41e7a95d02
+Create Date: 2026-10-17 11:20:54.906311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e2b9c4a13'
+down_revision = '8c41e7a95d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese)")
+    op.execute("""
+        ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem
+    """)
+    # Coluna gerada: reescreve a tabela uma vez e depois é mantida pelo banco
+    op.add_column('publications', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('pt_unaccent'::regconfig, content)", persisted=True),
+        nullable=True
+    ))
+    # Índice GIN sem bloquear escritas durante a criação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pub_search_vector',
+            'publications',
+            ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_pub_search_vector', table_name='publications', postgresql_concurrently=True)
+    op.drop_column('publications', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent")
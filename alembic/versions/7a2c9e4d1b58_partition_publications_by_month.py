@@ -0,0 +1,115 @@
+"""partition publications by publication_date month
+
+Revision ID: 7a2c9e4d1b58
+Revises: 4f8d2c6b1e37
+Create Date: 2026-10-17 17:05:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.models.publication import CREATE_PARTITION_FUNCTION, DEFAULT_PARTITION, ENSURE_PARTITIONS_FUNCTION
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2c9e4d1b58'
+down_revision = '4f8d2c6b1e37'
+branch_labels = None
+depends_on = None
+
+# Colunas copiadas entre as tabelas (search_vector é gerada e é recalculada)
+COLUMNS = (
+    "id, tribunal, publication_date, process_number, content, parties, publication_type, "
+    "scraped_at, created_at, updated_at, source_url, parties_text"
+)
+
+# Partições criadas além do mês atual (depois, task maintain_publication_partitions)
+MONTHS_AHEAD = 3
+
+
+def create_indexes() -> None:
+    # Em tabela particionada não há CONCURRENTLY; a tabela ainda não está em uso
+    op.create_index('idx_pub_keyset', 'publications', ['tribunal', 'publication_date', 'created_at', 'id'])
+    op.create_index('idx_pub_process', 'publications', ['process_number'])
+    op.create_index('idx_pub_search_vector', 'publications', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'idx_pub_process_trgm',
+        'publications',
+        ['process_number'],
+        postgresql_using='gin',
+        postgresql_ops={'process_number': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_pub_parties_trgm',
+        'publications',
+        ['parties_text'],
+        postgresql_using='gin',
+        postgresql_ops={'parties_text': 'gin_trgm_ops'}
+    )
+
+
+def drop_indexes(table: str) -> None:
+    for index in ('idx_pub_keyset', 'idx_pub_process', 'idx_pub_search_vector',
+                  'idx_pub_process_trgm', 'idx_pub_parties_trgm'):
+        op.drop_index(index, table_name=table)
+
+
+def upgrade() -> None:
+    # Reescreve a tabela inteira: rodar com a ingestão parada. Índices e
+    # restrições são criados na tabela mãe e replicados em cada partição.
+    op.execute(CREATE_PARTITION_FUNCTION)
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+    
+    # Libera os nomes de índices e restrições (únicos no schema)
+    op.rename_table('publications', 'publications_unpartitioned')
+    drop_indexes('publications_unpartitioned')
+    op.execute("ALTER TABLE publications_unpartitioned RENAME CONSTRAINT publications_pkey TO publications_unpartitioned_pkey")
+    op.drop_constraint('uq_pub_natural_key', 'publications_unpartitioned', type_='unique')
+    
+    op.execute("""
+        CREATE TABLE publications (LIKE publications_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED)
+        PARTITION BY RANGE (publication_date)
+    """)
+    op.create_primary_key('publications_pkey', 'publications', ['id', 'publication_date'])
+    op.create_unique_constraint(
+        'uq_pub_natural_key', 'publications', ['tribunal', 'publication_date', 'process_number']
+    )
+    op.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF publications DEFAULT")
+    
+    # Um mês por partição do mais antigo publicado até MONTHS_AHEAD à frente
+    op.execute("""
+        SELECT create_publication_partition(month::date)
+        FROM generate_series(
+            (SELECT date_trunc('month', min(publication_date)) FROM publications_unpartitioned),
+            date_trunc('month', current_date),
+            interval '1 month'
+        ) AS month
+    """)
+    op.execute(f"SELECT ensure_publication_partitions({MONTHS_AHEAD})")
+    
+    op.execute(f"INSERT INTO publications ({COLUMNS}) SELECT {COLUMNS} FROM publications_unpartitioned")
+    create_indexes()
+    op.drop_table('publications_unpartitioned')
+    op.execute("ANALYZE publications")
+
+
+def downgrade() -> None:
+    op.rename_table('publications', 'publications_partitioned')
+    drop_indexes('publications_partitioned')
+    op.execute("ALTER TABLE publications_partitioned RENAME CONSTRAINT publications_pkey TO publications_partitioned_pkey")
+    op.drop_constraint('uq_pub_natural_key', 'publications_partitioned', type_='unique')
+    
+    op.execute("""
+        CREATE TABLE publications (LIKE publications_partitioned INCLUDING DEFAULTS INCLUDING GENERATED)
+    """)
+    op.create_primary_key('publications_pkey', 'publications', ['id'])
+    op.create_unique_constraint(
+        'uq_pub_natural_key', 'publications', ['tribunal', 'publication_date', 'process_number']
+    )
+    op.execute(f"INSERT INTO publications ({COLUMNS}) SELECT {COLUMNS} FROM publications_partitioned")
+    create_indexes()
+    
+    # As partições anexadas saem junto com a mãe; as desanexadas ficam como tabelas avulsas
+    op.drop_table('publications_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS ensure_publication_partitions(integer)")
+    op.execute("DROP FUNCTION IF EXISTS create_publication_partition(date)")
+    op.execute("ANALYZE publications")
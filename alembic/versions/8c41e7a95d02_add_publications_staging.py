@@ -0,0 +1,38 @@
+"""add unlogged publications_staging table for COPY ingest
+
+Revision ID: 8c41e7a95d02
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-17 10:03:11.274910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e7a95d02'
+down_revision = '3f9a1c2d7b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('publications_staging',
+    sa.Column('batch_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('tribunal', sa.String(length=10), nullable=False),
+    sa.Column('publication_date', sa.Date(), nullable=False),
+    sa.Column('process_number', sa.String(length=50), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('parties', sa.ARRAY(sa.String()), nullable=True),
+    sa.Column('publication_type', sa.String(length=50), nullable=True),
+    sa.Column('scraped_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('batch_id', 'id'),
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('publications_staging')
@@ -0,0 +1,36 @@
+"""add monitor_matches table
+
+Revision ID: 9b3e5a1f7c24
+Revises: e4b19d7a3f60
+Create Date: 2026-10-17 15:07:52.903117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e5a1f7c24'
+down_revision = 'e4b19d7a3f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('monitor_matches',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('monitor_id', sa.UUID(), nullable=False),
+    sa.Column('publication_id', sa.UUID(), nullable=False),
+    sa.Column('tribunal', sa.String(length=10), nullable=False),
+    sa.Column('publication_date', sa.Date(), nullable=False),
+    sa.Column('keywords', sa.ARRAY(sa.String()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('monitor_id', 'publication_id', name='uq_match_monitor_publication')
+    )
+    op.create_index('idx_match_monitor_created', 'monitor_matches', ['monitor_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_match_monitor_created', table_name='monitor_matches')
+    op.drop_table('monitor_matches')
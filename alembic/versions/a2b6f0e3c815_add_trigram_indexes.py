@@ -0,0 +1,56 @@
+"""add pg_trgm indexes on process_number and normalized parties_text
+
+Revision ID: a2b6f0e3c815
+Revises: 5d7e2b9c4a13
+Create Date: 2026-10-17 12:02:17.338642
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2b6f0e3c815'
+down_revision = '5d7e2b9c4a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('publications', sa.Column('parties_text', sa.Text(), nullable=True))
+    op.add_column('publications_staging', sa.Column('parties_text', sa.Text(), nullable=True))
+    # Mesmo formato de fold_text (minúsculas, sem acentos, espaços simples),
+    # partes separadas por " | "
+    op.execute("""
+        UPDATE publications
+        SET parties_text = regexp_replace(
+            lower(unaccent(array_to_string(parties, ' | '))), '[[:space:]]+', ' ', 'g'
+        )
+        WHERE parties IS NOT NULL AND cardinality(parties) > 0
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pub_process_trgm',
+            'publications',
+            ['process_number'],
+            postgresql_using='gin',
+            postgresql_ops={'process_number': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_pub_parties_trgm',
+            'publications',
+            ['parties_text'],
+            postgresql_using='gin',
+            postgresql_ops={'parties_text': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_pub_parties_trgm', table_name='publications', postgresql_concurrently=True)
+        op.drop_index('idx_pub_process_trgm', table_name='publications', postgresql_concurrently=True)
+    op.drop_column('publications_staging', 'parties_text')
+    op.drop_column('publications', 'parties_text')
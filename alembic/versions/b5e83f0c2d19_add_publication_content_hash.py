@@ -0,0 +1,98 @@
+"""add content_hash fingerprint with unique index to publications
+
+Revision ID: b5e83f0c2d19
+Revises: 7a2c9e4d1b58
+Create Date: 2026-10-17 18:12:47.226180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.text import content_fingerprint
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e83f0c2d19'
+down_revision = '7a2c9e4d1b58'
+branch_labels = None
+depends_on = None
+
+# Publicações por lote no cálculo das impressões existentes
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('publications', sa.Column('content_hash', sa.LargeBinary(length=16), nullable=True))
+    # Linhas de staging são de lotes interrompidos, que não voltam
+    op.execute("DELETE FROM publications_staging")
+    op.add_column('publications_staging', sa.Column('content_hash', sa.LargeBinary(length=16), nullable=False))
+    
+    # A impressão (blake2b de fold_text) é calculada em Python, igual à
+    # ingestão; percorre a tabela pela chave primária
+    conn = op.get_bind()
+    select_batch = sa.text("""
+        SELECT id, publication_date, process_number, content
+        FROM publications
+        WHERE (id, publication_date) > (:id, :publication_date)
+        ORDER BY id, publication_date
+        LIMIT :limit
+    """)
+    update_hash = sa.text("""
+        UPDATE publications SET content_hash = :content_hash
+        WHERE id = :id AND publication_date = :publication_date
+    """)
+    position = {"id": "00000000-0000-0000-0000-000000000000", "publication_date": "0001-01-01"}
+    while True:
+        rows = conn.execute(select_batch, {**position, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        conn.execute(update_hash, [
+            {
+                "id": row.id,
+                "publication_date": row.publication_date,
+                "content_hash": content_fingerprint(row.content, row.process_number),
+            }
+            for row in rows
+        ])
+        position = {"id": rows[-1].id, "publication_date": rows[-1].publication_date}
+    
+    # Duplicatas já gravadas (sobretudo sem process_number, que a chave
+    # natural nunca pegou): fica a mais antiga; casamentos e rollup acompanham
+    op.execute("""
+        CREATE TEMP TABLE duplicate_publications AS
+        SELECT id, tribunal, publication_date
+        FROM (
+            SELECT id, tribunal, publication_date, row_number() OVER (
+                PARTITION BY tribunal, publication_date, content_hash ORDER BY created_at, id
+            ) AS position
+            FROM publications
+        ) ranked
+        WHERE position > 1
+    """)
+    op.execute("DELETE FROM monitor_matches WHERE publication_id IN (SELECT id FROM duplicate_publications)")
+    op.execute("DELETE FROM publications WHERE id IN (SELECT id FROM duplicate_publications)")
+    op.execute("""
+        DELETE FROM tribunal_daily_stats stats
+        USING (SELECT DISTINCT tribunal, publication_date FROM duplicate_publications) affected
+        WHERE stats.tribunal = affected.tribunal AND stats.publication_date = affected.publication_date
+    """)
+    op.execute("""
+        INSERT INTO tribunal_daily_stats (publication_date, tribunal, total, last_scraped_at, updated_at)
+        SELECT publication_date, tribunal, count(*), max(scraped_at), now() AT TIME ZONE 'utc'
+        FROM publications
+        WHERE (tribunal, publication_date) IN (SELECT tribunal, publication_date FROM duplicate_publications)
+        GROUP BY publication_date, tribunal
+    """)
+    op.execute("DROP TABLE duplicate_publications")
+    
+    op.alter_column('publications', 'content_hash', nullable=False)
+    # Em tabela particionada a restrição precisa da chave de partição:
+    # duplicata é a mesma impressão no mesmo tribunal e dia
+    op.create_unique_constraint(
+        'uq_pub_content_hash', 'publications', ['tribunal', 'publication_date', 'content_hash']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_pub_content_hash', 'publications', type_='unique')
+    op.drop_column('publications_staging', 'content_hash')
+    op.drop_column('publications', 'content_hash')
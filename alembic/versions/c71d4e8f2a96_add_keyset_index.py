@@ -0,0 +1,40 @@
+"""replace idx_pub_tribunal_date with keyset pagination index
+
+Revision ID: c71d4e8f2a96
+Revises: a2b6f0e3c815
+Create Date: 2026-10-17 12:48:05.611930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71d4e8f2a96'
+down_revision = 'a2b6f0e3c815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (tribunal, publication_date) é prefixo do novo índice: o antigo só
+    # custaria escrita
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pub_keyset',
+            'publications',
+            ['tribunal', 'publication_date', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_pub_tribunal_date', table_name='publications', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pub_tribunal_date',
+            'publications',
+            ['tribunal', 'publication_date'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_pub_keyset', table_name='publications', postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""replace idx_match_monitor_created with (monitor_id, created_at, id) keyset index
+
+Revision ID: d3a7c5e1f902
+Revises: b5e83f0c2d19
+Create Date: 2026-10-17 21:04:18.503217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7c5e1f902'
+down_revision = 'b5e83f0c2d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A listagem de casamentos pagina por (created_at, id); o índice
+    # antigo é prefixo do novo
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_match_monitor_keyset',
+            'monitor_matches',
+            ['monitor_id', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_match_monitor_created', table_name='monitor_matches', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_match_monitor_created',
+            'monitor_matches',
+            ['monitor_id', 'created_at'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_match_monitor_keyset', table_name='monitor_matches', postgresql_concurrently=True)
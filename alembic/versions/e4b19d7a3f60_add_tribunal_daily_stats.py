@@ -0,0 +1,38 @@
+"""add tribunal_daily_stats rollup table
+
+Revision ID: e4b19d7a3f60
+Revises: c71d4e8f2a96
+Create Date: 2026-10-17 14:21:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b19d7a3f60'
+down_revision = 'c71d4e8f2a96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('tribunal_daily_stats',
+    sa.Column('publication_date', sa.Date(), nullable=False),
+    sa.Column('tribunal', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('last_scraped_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('publication_date', 'tribunal')
+    )
+    # Carga inicial a partir do histórico
+    op.execute("""
+        INSERT INTO tribunal_daily_stats (publication_date, tribunal, total, last_scraped_at, updated_at)
+        SELECT publication_date, tribunal, count(*), max(scraped_at), now() AT TIME ZONE 'utc'
+        FROM publications
+        GROUP BY publication_date, tribunal
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('tribunal_daily_stats')
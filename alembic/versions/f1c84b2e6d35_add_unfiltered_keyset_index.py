@@ -0,0 +1,27 @@
+"""add (publication_date, created_at, id) index for the unfiltered cursor walk
+
+Revision ID: f1c84b2e6d35
+Revises: d3a7c5e1f902
+Create Date: 2026-10-17 21:31:40.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c84b2e6d35'
+down_revision = 'd3a7c5e1f902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # idx_pub_keyset começa por tribunal e não serve a listagem por cursor
+    # sem filtro. CONCURRENTLY não vale para tabela particionada: o índice
+    # é criado em cada partição sob o lock comum de CREATE INDEX
+    op.create_index('idx_pub_date_keyset', 'publications', ['publication_date', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_pub_date_keyset', table_name='publications')
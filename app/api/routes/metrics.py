@@ -2,27 +2,40 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from datetime import date, timedelta
+from app.api.dependencies import get_cache_service
 from app.database import get_db
-from app.models.publication import Publication
+from app.models.publication import TribunalDailyStats
+from app.services.cache_service import CacheService, date_tag, tribunal_tag
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 @router.get("/tribunals")
 async def get_tribunal_metrics(
     days: int = 30,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Obtém métricas por tribunal nos últimos N dias"""
     
     since_date = date.today() - timedelta(days=days)
     
+    return await cache.get_or_set(
+        cache.query_key("metrics:tribunals", {"days": days, "since": since_date}),
+        lambda: _tribunal_metrics(db, days, since_date),
+        tags=[tribunal_tag(None)]
+    )
+
+async def _tribunal_metrics(db: AsyncSession, days: int, since_date: date) -> dict:
+    """Consulta das métricas por tribunal (rollup diário: uma linha por tribunal e dia)"""
+    
     query = select(
-        Publication.tribunal,
-        func.count(Publication.id).label('total'),
-        func.count(func.distinct(Publication.publication_date)).label('days_active')
+        TribunalDailyStats.tribunal,
+        func.sum(TribunalDailyStats.total).label('total'),
+        func.count().label('days_active')
     ).where(
-        Publication.publication_date >= since_date
-    ).group_by(Publication.tribunal)
+        TribunalDailyStats.publication_date >= since_date,
+        TribunalDailyStats.total > 0
+    ).group_by(TribunalDailyStats.tribunal)
     
     result = await db.execute(query)
     metrics = result.all()
@@ -41,17 +54,31 @@ async def get_tribunal_metrics(
     }
 
 @router.get("/scraping-status")
-async def get_scraping_status(db: AsyncSession = Depends(get_db)):
+async def get_scraping_status(
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
+):
     """Status dos scrapers (última execução)"""
     
+    today = date.today()
+    return await cache.get_or_set(
+        cache.query_key("metrics:scraping-status", {"date": today}),
+        lambda: _scraping_status(db, today),
+        tags=[date_tag(today)]
+    )
+
+async def _scraping_status(db: AsyncSession, today: date) -> dict:
+    """Consulta do status dos scrapers na data"""
+    
     # Última publicação por tribunal
     query = select(
-        Publication.tribunal,
-        func.max(Publication.scraped_at).label('last_scrape'),
-        func.count(Publication.id).label('total_today')
+        TribunalDailyStats.tribunal,
+        TribunalDailyStats.last_scraped_at.label('last_scrape'),
+        TribunalDailyStats.total.label('total_today')
     ).where(
-        Publication.publication_date == date.today()
-    ).group_by(Publication.tribunal)
+        TribunalDailyStats.publication_date == today,
+        TribunalDailyStats.total > 0
+    )
     
     result = await db.execute(query)
     status = result.all()
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
 from typing import List
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import date, datetime
+import logging
+from app.api.dependencies import get_cache_service
 from app.database import get_db
-from app.models.publication import Monitor
-from pydantic import BaseModel
+from app.config import get_settings
+from app.models.publication import Monitor, MonitorBackfill, MonitorBackfillPartition, MonitorMatch
+from app.services.backfill_service import BackfillService
+from app.services.cache_service import CacheService
+from app.services.monitor_index import publish_monitor_change
+from app.services.publication_service import (
+    MATCH_KEYSET_ORDER, decode_match_cursor, encode_match_cursor, match_keyset_after
+)
+from app.workers.celery_app import celery_app
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/monitors", tags=["monitoring"])
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
 
 # Schemas
 class MonitorCreate(BaseModel):
@@ -16,6 +29,7 @@ class MonitorCreate(BaseModel):
     keywords: List[str]
     tribunals: List[str] | None = None
     active: bool = True
+    backfill_months: int = Field(0, ge=0, le=settings.MONITOR_BACKFILL_MAX_MONTHS)
 
 class MonitorResponse(BaseModel):
     id: UUID
@@ -33,10 +47,85 @@ class MonitorUpdate(BaseModel):
     tribunals: List[str] | None = None
     active: bool | None = None
 
+class MonitorMatchResponse(BaseModel):
+    publication_id: UUID
+    tribunal: str
+    publication_date: date
+    keywords: List[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class MonitorMatchPage(BaseModel):
+    items: List[MonitorMatchResponse]
+    next_cursor: str | None  # posição depois do último item (repetir com ele traz só novidades)
+    has_more: bool
+
+class BackfillResponse(BaseModel):
+    id: UUID
+    monitor_id: UUID
+    since: date
+    until: date
+    status: str
+    partitions_total: int
+    partitions_done: int
+    partitions_failed: int
+    scanned: int
+    matches: int
+    throughput: float  # publicações verificadas por segundo
+    started_at: datetime | None
+    finished_at: datetime | None
+    created_at: datetime
+
+def _backfill_response(progress) -> BackfillResponse:
+    backfill = progress.backfill
+    return BackfillResponse(
+        id=backfill.id,
+        monitor_id=backfill.monitor_id,
+        since=backfill.since,
+        until=backfill.until,
+        status=progress.status,
+        partitions_total=progress.partitions_total,
+        partitions_done=progress.partitions_done,
+        partitions_failed=progress.partitions_failed,
+        scanned=progress.scanned,
+        matches=progress.matches,
+        throughput=progress.throughput,
+        started_at=progress.started_at,
+        finished_at=progress.finished_at,
+        created_at=backfill.created_at
+    )
+
+def _enqueue_backfill(backfill_id: UUID):
+    """Agenda as fatias do backfill; se o broker falhar, o backfill fica pendente e pode ser retomado"""
+    try:
+        celery_app.send_task("backfill_monitor", args=[str(backfill_id)])
+    except Exception as e:
+        logger.error(f"Erro ao agendar backfill {backfill_id}: {e}")
+
+async def _publish_change(cache: CacheService, monitor: Monitor, removed: bool = False):
+    """
+    Propaga a alteração ao índice versionado dos workers (após o commit)
+    
+    Uma falha aqui não desfaz a alteração: é registrada no log (ERROR) e
+    os workers só a recebem na próxima rebuild_monitor_index, agendada
+    no beat a cada MONITOR_INDEX_REBUILD_EVERY segundos.
+    """
+    try:
+        await cache.connect()
+        if removed or not monitor.active:
+            await publish_monitor_change(cache.redis, monitor.id)
+        else:
+            await publish_monitor_change(cache.redis, monitor.id, monitor.keywords, monitor.tribunals)
+    except Exception as e:
+        logger.error(f"Erro ao publicar alteração do monitoramento {monitor.id}: {e}")
+
 @router.post("/", response_model=MonitorResponse, status_code=201)
 async def create_monitor(
     monitor: MonitorCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Cria novo monitoramento"""
     
@@ -52,6 +141,11 @@ async def create_monitor(
     db.add(db_monitor)
     await db.commit()
     await db.refresh(db_monitor)
+    await _publish_change(cache, db_monitor)
+    
+    if monitor.backfill_months:
+        backfill = await BackfillService(db).create(db_monitor, monitor.backfill_months)
+        _enqueue_backfill(backfill.id)
     
     return MonitorResponse.model_validate(db_monitor)
 
@@ -88,7 +182,8 @@ async def get_monitor(
 async def update_monitor(
     monitor_id: UUID,
     updates: MonitorUpdate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Atualiza um monitoramento"""
     
@@ -109,13 +204,119 @@ async def update_monitor(
     
     await db.commit()
     await db.refresh(monitor)
+    await _publish_change(cache, monitor)
     
     return MonitorResponse.model_validate(monitor)
 
+@router.get("/{monitor_id}/matches", response_model=MonitorMatchPage)
+async def list_monitor_matches(
+    monitor_id: UUID,
+    cursor: str | None = Query(
+        None,
+        description="next_cursor da resposta anterior (vazio = desde o primeiro casamento)"
+    ),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Publicações que casaram com o monitoramento, mais antigas primeiro
+    
+    Os casamentos são gravados na ingestão e nos backfills. Paginação por
+    keyset em (created_at, id): siga next_cursor enquanto has_more; na
+    última página ele continua apontando para depois do último item, e
+    repetir a consulta com ele traz só os casamentos novos, sem perder
+    os que dividem o mesmo created_at (um bloco de ingestão inteiro).
+    """
+    
+    query = select(MonitorMatch).where(MonitorMatch.monitor_id == monitor_id)
+    if cursor:
+        try:
+            query = query.where(match_keyset_after(decode_match_cursor(cursor)))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Cursor inválido",
+                    "message": str(e),
+                    "tip": "Use o next_cursor de uma resposta anterior, ou omita cursor para começar do início"
+                }
+            )
+    
+    # Um item a mais indica se há próxima página
+    result = await db.execute(query.order_by(*MATCH_KEYSET_ORDER).limit(limit + 1))
+    matches = result.scalars().all()
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    
+    return MonitorMatchPage(
+        items=[MonitorMatchResponse.model_validate(m) for m in matches],
+        next_cursor=encode_match_cursor(matches[-1]) if matches else cursor or None,
+        has_more=has_more
+    )
+
+@router.post("/{monitor_id}/backfills", response_model=BackfillResponse, status_code=202)
+async def create_backfill(
+    monitor_id: UUID,
+    months: int = Query(..., ge=1, le=settings.MONITOR_BACKFILL_MAX_MONTHS),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Busca retroativa: procura o monitoramento nas publicações dos últimos months meses
+    
+    Roda em segundo plano, com uma task por mês; os casamentos aparecem
+    em /matches conforme são encontrados.
+    """
+    
+    monitor = await db.get(Monitor, monitor_id)
+    if not monitor:
+        raise HTTPException(status_code=404, detail="Monitor não encontrado")
+    
+    service = BackfillService(db)
+    backfill = await service.create(monitor, months)
+    _enqueue_backfill(backfill.id)
+    
+    return _backfill_response(await service.progress(backfill.id))
+
+@router.get("/{monitor_id}/backfills/{backfill_id}", response_model=BackfillResponse)
+async def get_backfill(
+    monitor_id: UUID,
+    backfill_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Andamento e vazão (publicações por segundo) de uma busca retroativa"""
+    
+    progress = await BackfillService(db).progress(backfill_id)
+    if progress is None or progress.backfill.monitor_id != monitor_id:
+        raise HTTPException(status_code=404, detail="Backfill não encontrado")
+    
+    return _backfill_response(progress)
+
+@router.post("/{monitor_id}/backfills/{backfill_id}/resume", response_model=BackfillResponse, status_code=202)
+async def resume_backfill(
+    monitor_id: UUID,
+    backfill_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reagenda as fatias pendentes, com falha ou paradas, que seguem do
+    último checkpoint; fatias ainda em execução não são reagendadas
+    """
+    
+    service = BackfillService(db)
+    progress = await service.progress(backfill_id)
+    if progress is None or progress.backfill.monitor_id != monitor_id:
+        raise HTTPException(status_code=404, detail="Backfill não encontrado")
+    
+    if await service.pending_partitions(backfill_id):
+        _enqueue_backfill(backfill_id)
+    
+    return _backfill_response(progress)
+
 @router.delete("/{monitor_id}", status_code=204)
 async def delete_monitor(
     monitor_id: UUID,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Remove um monitoramento"""
     
@@ -126,7 +327,12 @@ async def delete_monitor(
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor não encontrado")
     
+    await db.execute(delete(MonitorMatch).where(MonitorMatch.monitor_id == monitor_id))
+    backfills = select(MonitorBackfill.id).where(MonitorBackfill.monitor_id == monitor_id)
+    await db.execute(delete(MonitorBackfillPartition).where(MonitorBackfillPartition.backfill_id.in_(backfills)))
+    await db.execute(delete(MonitorBackfill).where(MonitorBackfill.monitor_id == monitor_id))
     await db.delete(monitor)
     await db.commit()
+    await _publish_change(cache, monitor, removed=True)
     
     return None
\ No newline at end of file
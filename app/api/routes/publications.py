@@ -1,15 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
-from typing import List
+from typing import List, Literal
 import logging
+from app.api.dependencies import get_cache_service
+from app.config import get_settings
 from app.database import get_db
+from app.services.cache_service import CacheService, tribunal_tag
 from app.schemas.publication import PublicationResponse
-from app.models.publication import Publication
+from app.models.publication import Publication, TribunalDailyStats
+from app.services.publication_service import (
+    KEYSET_ORDER, PublicationService, decode_cursor, encode_cursor, keyset_after
+)
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 router = APIRouter(prefix="/publications", tags=["publications"])
 
 
@@ -20,6 +29,21 @@ async def list_publications(
         description="Código do tribunal (ex: TJSP, TJRJ)",
         example="TJSP"
     ),
+    q: str | None = Query(
+        None,
+        description="Busca textual no conteúdo (aceita \"frase exata\", OR e -termo)",
+        example="tutela de urgência"
+    ),
+    process_number: str | None = Query(
+        None,
+        description="Número CNJ completo ou trecho dele",
+        example="1234567-12.2024.8.26.0100"
+    ),
+    party: str | None = Query(
+        None,
+        description="Nome (ou trecho) de uma das partes, sem distinção de acentos",
+        example="Banco Itau"
+    ),
     page: int = Query(
         1, 
         ge=1, 
@@ -31,40 +55,139 @@ async def list_publications(
         le=100, 
         description="Itens por página"
     ),
-    db: AsyncSession = Depends(get_db)
+    cursor: str | None = Query(
+        None,
+        description="Paginação por cursor: vazio na primeira página, depois o next_cursor da resposta anterior"
+    ),
+    count: Literal["exact", "estimated", "cached"] | None = Query(
+        None,
+        description="Como calcular o total: exact, estimated ou cached (padrão: COUNT_STRATEGY)"
+    ),
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """
     Lista publicações com filtros e paginação
     
     - **tribunal**: Filtrar por código do tribunal (TJSP, TJRJ, etc.)
+    - **q**: Busca textual no conteúdo, sem acentos e por radical; com ela os
+      resultados vêm ordenados por relevância
+    - **process_number**: Número CNJ completo (busca exata) ou trecho
+    - **party**: Nome ou trecho do nome de uma parte
     - **page**: Número da página (começa em 1)
     - **page_size**: Quantidade de itens por página (máximo 100)
+    - **cursor**: Ativa a paginação por cursor (keyset), de custo constante
+      em qualquer profundidade; `?cursor=` inicia e cada resposta traz o
+      next_cursor da seguinte. Nesse modo não há total nem ordenação por
+      relevância, e page é ignorado
+    - **count**: Estratégia do total: exact (COUNT, o padrão), estimated (estatísticas
+      do planejador) ou cached (COUNT em cache até a próxima ingestão)
     
     Retorna:
     - **items**: Lista de publicações
-    - **total**: Total de registros encontrados
-    - **page**: Página atual
+    - **total**: Total de registros encontrados (só no modo page)
+    - **total_strategy**: Estratégia efetivamente usada no total (só no modo page)
+    - **page**: Página atual (só no modo page)
     - **page_size**: Itens por página
-    - **pages**: Total de páginas
+    - **pages**: Total de páginas (só no modo page)
+    - **next_cursor**: Cursor da próxima página (null na última)
+    
+    As respostas ficam em cache (chave pelos parâmetros normalizados) até
+    CACHE_TTL ou até uma ingestão nova do tribunal consultado.
     """
     
+    # Normalizar tribunal para uppercase se fornecido; filtros vazios = ausentes
+    if tribunal:
+        tribunal = tribunal.upper().strip()
+    q, process_number, party = (
+        value.strip() or None if value else None for value in (q, process_number, party)
+    )
+    
+    params = {
+        "tribunal": tribunal, "q": q, "process_number": process_number, "party": party,
+        "page": page, "page_size": page_size, "cursor": cursor, "count": count,
+    }
+    return await cache.get_or_set(
+        cache.query_key("publications:list", params),
+        lambda: _list_publications(db, cache, **params),
+        tags=[tribunal_tag(tribunal)]
+    )
+
+
+async def _list_publications(
+    db: AsyncSession,
+    cache: CacheService,
+    tribunal: str | None,
+    q: str | None,
+    process_number: str | None,
+    party: str | None,
+    page: int,
+    page_size: int,
+    cursor: str | None,
+    count: str | None
+) -> dict:
+    """Consulta da listagem de publicações (resposta já serializável para o cache)"""
+    
     try:
         query = select(Publication)
         conditions = []
         
-        # Normalizar tribunal para uppercase se fornecido
         if tribunal:
-            tribunal = tribunal.upper().strip()
             conditions.append(Publication.tribunal == tribunal)
             logger.info(f"Filtrando por tribunal: {tribunal}")
         
+        # Busca textual pelo índice GIN de search_vector
+        rank = None
+        if q and q.strip():
+            condition, rank = PublicationService.fulltext_search(q.strip())
+            conditions.append(condition)
+        
+        if process_number and process_number.strip():
+            conditions.append(PublicationService.process_number_filter(process_number))
+        
+        if party and party.strip():
+            conditions.append(PublicationService.party_filter(party))
+        
+        # Modo cursor: WHERE (publication_date, created_at, id) < posição,
+        # servido por idx_pub_keyset (com tribunal) ou idx_pub_date_keyset, sem OFFSET nem COUNT
+        if cursor is not None:
+            if cursor:
+                try:
+                    conditions.append(keyset_after(decode_cursor(cursor)))
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "error": "Cursor inválido",
+                            "message": str(e),
+                            "tip": "Use o next_cursor de uma resposta anterior, ou cursor vazio para a primeira página"
+                        }
+                    )
+            if conditions:
+                query = query.where(and_(*conditions))
+            
+            # Um item a mais indica se há próxima página
+            result = await db.execute(query.order_by(*KEYSET_ORDER).limit(page_size + 1))
+            publications = result.scalars().all()
+            has_more = len(publications) > page_size
+            publications = publications[:page_size]
+            
+            return jsonable_encoder({
+                "items": [PublicationResponse.model_validate(pub) for pub in publications],
+                "page_size": page_size,
+                "next_cursor": encode_cursor(publications[-1]) if has_more else None
+            })
+        
         # Aplicar condições
         if conditions:
             query = query.where(and_(*conditions))
         
-        # Contar total de registros
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await db.scalar(count_query) or 0
+        # Contar total de registros pela estratégia escolhida
+        signature = {"tribunal": tribunal, "q": q, "process_number": process_number, "party": party}
+        total_count = await PublicationService(db, cache).count_publications(
+            query, count or settings.COUNT_STRATEGY, signature, tribunal
+        )
+        total = total_count.value
         
         # Se não houver registros, retornar resposta vazia
         if total == 0:
@@ -72,14 +195,19 @@ async def list_publications(
             return {
                 "items": [],
                 "total": 0,
+                "total_strategy": total_count.strategy,
                 "page": page,
                 "page_size": page_size,
                 "pages": 0,
+                "next_cursor": None,
                 "message": f"Nenhuma publicação encontrada" + (f" para o tribunal {tribunal}" if tribunal else "")
             }
         
         # Aplicar ordenação e paginação
-        query = query.order_by(Publication.publication_date.desc(), Publication.created_at.desc())
+        if rank is not None:
+            query = query.order_by(rank.desc(), *KEYSET_ORDER)
+        else:
+            query = query.order_by(*KEYSET_ORDER)
         query = query.offset((page - 1) * page_size).limit(page_size)
         
         # Executar query
@@ -89,16 +217,25 @@ async def list_publications(
         # Calcular total de páginas
         total_pages = (total + page_size - 1) // page_size
         
+        # Permite seguir por cursor a partir desta página (só na ordem por data)
+        next_cursor = None
+        if publications and page < total_pages and rank is None:
+            next_cursor = encode_cursor(publications[-1])
+        
         logger.info(f"Retornando {len(publications)} publicações de {total} totais")
         
-        return {
+        return jsonable_encoder({
             "items": [PublicationResponse.model_validate(pub) for pub in publications],
             "total": total,
+            "total_strategy": total_count.strategy,
             "page": page,
             "page_size": page_size,
-            "pages": total_pages
-        }
+            "pages": total_pages,
+            "next_cursor": next_cursor
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar publicações: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -168,7 +305,10 @@ async def get_publication(
 
 
 @router.get("/tribunals/list", response_model=dict)
-async def list_tribunals(db: AsyncSession = Depends(get_db)):
+async def list_tribunals(
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
+):
     """
     Lista todos os tribunais disponíveis no sistema
     
@@ -176,8 +316,14 @@ async def list_tribunals(db: AsyncSession = Depends(get_db)):
     - **tribunals**: Lista de códigos de tribunais
     - **count**: Quantidade de tribunais únicos
     """
-    try:
-        query = select(Publication.tribunal, func.count(Publication.id).label('total')).group_by(Publication.tribunal)
+    async def load() -> dict:
+        # Rollup diário: uma linha por tribunal e dia, em vez de varrer publications
+        total = func.sum(TribunalDailyStats.total)
+        query = (
+            select(TribunalDailyStats.tribunal, total.label('total'))
+            .group_by(TribunalDailyStats.tribunal)
+            .having(total > 0)
+        )
         result = await db.execute(query)
         tribunals = result.all()
         
@@ -191,6 +337,13 @@ async def list_tribunals(db: AsyncSession = Depends(get_db)):
             ],
             "count": len(tribunals)
         }
+    
+    try:
+        return await cache.get_or_set(
+            cache.query_key("publications:tribunals", {}),
+            load,
+            tags=[tribunal_tag(None)]
+        )
         
     except Exception as e:
         logger.error(f"Erro ao listar tribunais: {str(e)}", exc_info=True)
@@ -15,9 +15,58 @@ class Settings(BaseSettings):
     # Scraping
     SCRAPER_CONCURRENCY: int = 5
     SCRAPER_TIMEOUT: int = 30
+    SCRAPER_HTTP2: bool = True  # usado quando o pacote h2 está instalado
+    SCRAPER_PARSE_WORKERS: int | None = None  # processos de parsing (None = nº de CPUs, 0 = no event loop; threads no prefork do Celery)
+    SCRAPER_PAGE_STATE_TTL: int = 7 * 24 * 3600  # validadores/checksums das páginas de cada diário (segundos)
+    
+    # Limite de taxa por host de tribunal (AIMD) e circuit breaker
+    SCRAPER_THROTTLE: str = "redis"  # redis (compartilhado entre workers), local (por processo) ou off
+    SCRAPER_RATE_LIMIT: float = 5.0  # taxa inicial (requisições/s)
+    SCRAPER_RATE_MIN: float = 0.2
+    SCRAPER_RATE_MAX: float = 20.0
+    SCRAPER_RATE_INCREASE: float = 0.5  # aumento aditivo por resposta rápida (requisições/s)
+    SCRAPER_RATE_DECREASE: float = 0.5  # fator multiplicativo em 429, 5xx ou lentidão
+    SCRAPER_LATENCY_TARGET: float = 2.0  # segundos; acima disso a resposta conta como sobrecarga
+    SCRAPER_RETRY_AFTER_MAX: float = 300.0  # teto do Retry-After respeitado (segundos)
+    SCRAPER_BREAKER_FAILURES: int = 5  # falhas seguidas que abrem o circuito
+    SCRAPER_BREAKER_COOLDOWN: float = 60.0  # segundos com o circuito aberto antes da sonda
+    SCRAPER_INDEX_RETRIES: int = 3  # novas tentativas da task quando a página inicial do diário falha
+    SCRAPER_INDEX_RETRY_DELAY: int = 10 * 60  # segundos entre essas tentativas
+    
+    # Ingestão
+    INGEST_CHUNK_SIZE: int = 5000  # publicações gravadas por vez durante o scraping
+    COPY_INGEST_THRESHOLD: int = 5000  # lotes a partir deste tamanho usam COPY + staging
     
     # Cache
     CACHE_TTL: int = 300  # 5 minutes
+    LOCAL_CACHE_SIZE: int = 10000  # entradas da camada em memória de cada processo (0 = desligada)
+    LOCAL_CACHE_TTL: float = 30  # teto de permanência na camada local (invalidada também via pub/sub)
+    CACHE_EARLY_REFRESH_BETA: float = 1.0  # agressividade da renovação antecipada (0 = desligada)
+    CACHE_LOCK_TIMEOUT_MS: int = 5000  # espera máxima por um recálculo feito por outro processo
+    CACHE_CODEC: str = "msgpack"  # msgpack, orjson ou json (sem o pacote instalado, cai para json)
+    CACHE_COMPRESS_THRESHOLD: int = 1024  # valores serializados a partir deste tamanho (bytes) vão com zstd
+    CACHE_COMPRESS_LEVEL: int = 3
+    CACHE_DELETE_BATCH: int = 500  # chaves por UNLINK (e COUNT do SCAN) na invalidação por padrão
+    
+    # Monitoramentos
+    MONITOR_SNAPSHOT_EVERY: int = 500  # versões do índice entre snapshots serializados no Redis
+    MONITOR_INDEX_REBUILD_EVERY: int = 60 * 60  # segundos entre remontagens agendadas do índice a partir do banco
+    MONITOR_BACKFILL_BATCH: int = 1000  # publicações por lote (e checkpoint) na busca retroativa
+    MONITOR_BACKFILL_MAX_MONTHS: int = 24
+    MONITOR_BACKFILL_STALE_AFTER: int = 15 * 60  # segundos sem checkpoint para uma fatia em execução ser dada como parada
+    
+    # Partições mensais de publications
+    PUBLICATION_PARTITIONS_AHEAD: int = 3  # meses futuros com partição já criada
+    PUBLICATION_DETACH_LOCK_TIMEOUT: float = 5.0  # espera máxima (s) pelo lock de publications ao desanexar um mês
+    
+    # Deduplicação por impressão do conteúdo
+    DEDUP_FILTER_DAYS: int = 64  # filtros de Bloom (tribunal, dia) mantidos por processo do worker
+    DEDUP_FILTER_ERROR_RATE: float = 0.001
+    
+    # Total das listagens
+    COUNT_STRATEGY: str = "exact"  # padrão quando o pedido não escolhe (exact, estimated ou cached)
+    COUNT_EXACT_THRESHOLD: int = 1000  # estimativas abaixo disso são refeitas com COUNT(*)
+    COUNT_CACHE_TTL: int = 600  # totais em cache (invalidados também a cada ingestão)
     
     class Config:
         env_file = ".env"
@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.api.routes import publications
+from app.api.routes import metrics, monitoring, publications
 
 settings = get_settings()
 
@@ -23,6 +23,8 @@ app.add_middleware(
 
 # Routes
 app.include_router(publications.router, prefix=settings.API_V1_PREFIX)
+app.include_router(metrics.router, prefix=settings.API_V1_PREFIX)
+app.include_router(monitoring.router, prefix=settings.API_V1_PREFIX)
 
 @app.get("/")
 async def root():
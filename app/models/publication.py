@@ -1,16 +1,33 @@
-from sqlalchemy import String, Text, Date, ARRAY, Index
+from sqlalchemy import String, Text, Date, Integer, LargeBinary, ARRAY, Index, UniqueConstraint, Computed, DDL, event
 from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import date, datetime
 import uuid
 from app.database import Base
+from app.utils.text import content_fingerprint
+
+# Configuração de busca textual: portuguese com unaccent antes do stemmer
+# (criada pela migração 5d7e2b9c4a13 e pelo evento before_create abaixo)
+SEARCH_CONFIG = "pt_unaccent"
+
+# Separador das partes em parties_text (evita casar trechos de duas partes)
+PARTIES_SEPARATOR = " | "
+
+# Partição que recebe publicações de meses ainda sem partição própria
+# (create_publication_partition as move dela ao criar o mês)
+DEFAULT_PARTITION = "publications_default"
+
+def _default_content_hash(parameters: dict) -> bytes:
+    """content_hash de inserções que não o informam (ORM, seed); a ingestão em lote já calcula"""
+    return content_fingerprint(parameters["content"], parameters.get("process_number"))
 
 class Publication(Base):
     __tablename__ = "publications"
     
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tribunal: Mapped[str] = mapped_column(String(10), nullable=False)
-    publication_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Na chave primária da tabela por ser a chave de partição; para o ORM a identidade segue sendo só id
+    publication_date: Mapped[date] = mapped_column(Date, primary_key=True)
     process_number: Mapped[str | None] = mapped_column(String(50), nullable=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     parties: Mapped[list[str] | None] = mapped_column(ARRAY(String), nullable=True)
@@ -19,13 +36,180 @@ class Publication(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
     source_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # Mantida pelo banco a partir de content; deferred para não trafegar nas listagens
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, content)", persisted=True),
+        deferred=True
+    )
+    # Partes normalizadas (fold_text, separadas por PARTIES_SEPARATOR) para busca por trigramas
+    parties_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # content_fingerprint(content, process_number): deduplica também publicações sem process_number
+    content_hash: Mapped[bytes] = mapped_column(
+        LargeBinary(16),
+        nullable=False,
+        default=lambda context: _default_content_hash(context.get_current_parameters()),
+        deferred=True
+    )
     
     __table_args__ = (
-        Index('idx_pub_tribunal_date', 'tribunal', 'publication_date'),
+        # Cobre filtro por tribunal/data e a ordem da listagem por cursor (KEYSET_ORDER)
+        Index('idx_pub_keyset', 'tribunal', 'publication_date', 'created_at', 'id'),
+        # Mesma ordem sem filtro de tribunal (sincronização de toda a base)
+        Index('idx_pub_date_keyset', 'publication_date', 'created_at', 'id'),
         Index('idx_pub_process', 'process_number'),
+        Index('idx_pub_search_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'idx_pub_process_trgm', 'process_number',
+            postgresql_using='gin', postgresql_ops={'process_number': 'gin_trgm_ops'}
+        ),
+        Index(
+            'idx_pub_parties_trgm', 'parties_text',
+            postgresql_using='gin', postgresql_ops={'parties_text': 'gin_trgm_ops'}
+        ),
+        UniqueConstraint('tribunal', 'publication_date', 'process_number', name='uq_pub_natural_key'),
+        UniqueConstraint('tribunal', 'publication_date', 'content_hash', name='uq_pub_content_hash'),
+        # Uma partição por mês de publication_date (ver create_publication_partition)
+        {'postgresql_partition_by': 'RANGE (publication_date)'},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Bancos criados via metadata.create_all (testes) precisam das extensões e
+# da configuração de busca antes da tabela (um comando por DDL: o asyncpg
+# prepara cada um)
+for statement in (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+):
+    event.listen(Publication.__table__, "before_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+# Criação das partições mensais (também usadas pela migração 7a2c9e4d1b58).
+# Linhas do mês que caíram na partição padrão são movidas para a nova
+# partição; as colunas geradas (search_vector) são recalculadas.
+CREATE_PARTITION_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION create_publication_partition(target_month date) RETURNS text AS $$
+DECLARE
+    start_date date := date_trunc('month', target_month)::date;
+    end_date date := (date_trunc('month', target_month) + interval '1 month')::date;
+    partition_name text := 'publications_' || to_char(start_date, 'YYYY_MM');
+    column_list text;
+    moved boolean := false;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+    
+    IF to_regclass('{DEFAULT_PARTITION}') IS NOT NULL THEN
+        EXECUTE format(
+            'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE publication_date >= %L AND publication_date < %L)',
+            start_date, end_date
+        ) INTO moved;
+    END IF;
+    
+    IF moved THEN
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO column_list
+        FROM pg_attribute
+        WHERE attrelid = 'publications'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+        
+        EXECUTE format(
+            'CREATE TEMP TABLE publications_moved ON COMMIT DROP AS '
+            'SELECT %s FROM {DEFAULT_PARTITION} WHERE publication_date >= %L AND publication_date < %L',
+            column_list, start_date, end_date
+        );
+        EXECUTE format(
+            'DELETE FROM {DEFAULT_PARTITION} WHERE publication_date >= %L AND publication_date < %L',
+            start_date, end_date
+        );
+    END IF;
+    
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF publications FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+    
+    IF moved THEN
+        EXECUTE format('INSERT INTO publications (%s) SELECT %s FROM publications_moved', column_list, column_list);
+        DROP TABLE publications_moved;
+    END IF;
+    RETURN partition_name;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Garante as partições do mês atual e dos months_ahead seguintes
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_publication_partitions(months_ahead integer) RETURNS SETOF text AS $$
+    SELECT create_publication_partition((date_trunc('month', current_date) + make_interval(months => m))::date)
+    FROM generate_series(0, months_ahead) AS m
+$$ LANGUAGE sql
+"""
+
+for statement in (CREATE_PARTITION_FUNCTION, ENSURE_PARTITIONS_FUNCTION):
+    # DDL formata o texto com %: os do format() do plpgsql vão escapados
+    event.listen(
+        Publication.__table__, "before_create", DDL(statement.replace("%", "%%")).execute_if(dialect="postgresql")
+    )
+event.listen(
+    Publication.__table__,
+    "after_create",
+    DDL(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF publications DEFAULT").execute_if(dialect="postgresql")
+)
+
+
+class PublicationStaging(Base):
+    """Tabela UNLOGGED de staging para ingestão via COPY (ver PublicationService.copy_create)"""
+    __tablename__ = "publications_staging"
+    
+    batch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    tribunal: Mapped[str] = mapped_column(String(10), nullable=False)
+    publication_date: Mapped[date] = mapped_column(Date, nullable=False)
+    process_number: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    parties: Mapped[list[str] | None] = mapped_column(ARRAY(String), nullable=True)
+    publication_type: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    parties_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[bytes] = mapped_column(LargeBinary(16), nullable=False)
+    scraped_at: Mapped[datetime] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(nullable=False)
+    
+    __table_args__ = (
+        {'prefixes': ['UNLOGGED']},
     )
 
 
+class TribunalDailyStats(Base):
+    """
+    Totais de publicações por (data, tribunal), mantidos pela ingestão
+    
+    Atualizada na mesma transação que grava as publicações (ver
+    StatsService.record) e reconstruível a partir de publications
+    (StatsService.rebuild). As métricas leem daqui, com custo proporcional
+    ao período pedido e não ao tamanho de publications.
+    """
+    __tablename__ = "tribunal_daily_stats"
+    
+    publication_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    tribunal: Mapped[str] = mapped_column(String(10), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_scraped_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Monitor(Base):
     __tablename__ = "monitors"
     
@@ -36,3 +220,65 @@ class Monitor(Base):
     active: Mapped[bool] = mapped_column(default=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     source_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
+
+class MonitorMatch(Base):
+    """Publicação que casou com um monitoramento na ingestão (ver MonitorMatcher)"""
+    __tablename__ = "monitor_matches"
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    monitor_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    publication_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    tribunal: Mapped[str] = mapped_column(String(10), nullable=False)
+    publication_date: Mapped[date] = mapped_column(Date, nullable=False)
+    keywords: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Listagem dos casamentos de um monitoramento por keyset (created_at, id)
+        Index('idx_match_monitor_keyset', 'monitor_id', 'created_at', 'id'),
+        UniqueConstraint('monitor_id', 'publication_id', name='uq_match_monitor_publication'),
+    )
+
+
+class MonitorBackfill(Base):
+    """Busca retroativa de um monitoramento em publicações já gravadas (ver BackfillService)"""
+    __tablename__ = "monitor_backfills"
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    monitor_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    since: Mapped[date] = mapped_column(Date, nullable=False)
+    until: Mapped[date] = mapped_column(Date, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_backfill_monitor', 'monitor_id'),
+    )
+
+
+class MonitorBackfillPartition(Base):
+    """
+    Fatia de datas [start_date, end_date) de um backfill, processada por uma task
+    
+    (cursor_date, cursor_id) é o checkpoint: a última publicação já
+    verificada, na ordem (publication_date, id).
+    """
+    __tablename__ = "monitor_backfill_partitions"
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    backfill_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    cursor_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    cursor_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    scanned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    matches: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_backfill_partition_backfill', 'backfill_id'),
+    )
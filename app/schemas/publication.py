@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import date, datetime
+from typing import Literal
 from uuid import UUID
 
 class PublicationBase(BaseModel):
@@ -25,6 +26,12 @@ class PublicationFilter(BaseModel):
     date_from: date | None = None
     date_to: date | None = None
     process_number: str | None = None
+    party: str | None = None
     search_query: str | None = None
+    # fulltext: websearch_to_tsquery sobre search_vector, ordenado por relevância;
+    # contains: substring literal em content (sem índice)
+    search_mode: Literal["fulltext", "contains"] = "fulltext"
+    # Estratégia do total (None = COUNT_STRATEGY das configurações)
+    count_strategy: Literal["exact", "estimated", "cached"] | None = None
     page: int = Field(1, ge=1)
     page_size: int = Field(50, ge=1, le=100)
@@ -1,37 +1,222 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List
 import asyncio
+import time
 import httpx
 from datetime import date
+from urllib.parse import urlsplit
+from redis import asyncio as aioredis
+from app.config import get_settings
 from app.schemas.publication import PublicationCreate
+from app.scrapers.engine import PageResult, ScrapingEngine
+from app.scrapers.page_state import FetchedPage, PageState, PageStateStore, body_checksum
+from app.scrapers.throttle import RedisThrottle, Throttle, parse_retry_after
+
+settings = get_settings()
+
+# HTTP/2 depende do pacote opcional h2 (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+@dataclass
+class ParsedPage:
+    """Publicações de uma página do diário e links para outras páginas/cadernos"""
+    publications: List[PublicationCreate] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
 
 class BaseScraper(ABC):
-    """Classe base abstrata para scrapers de tribunais"""
+    """
+    Classe base abstrata para scrapers de tribunais
+    
+    Cada scraper mantém um único httpx.AsyncClient de longa duração, com
+    pool de conexões keep-alive limitado a SCRAPER_CONCURRENCY, e passa
+    cada requisição pelo limitador do host (ver app.scrapers.throttle).
+    Use como context manager para garantir o fechamento do cliente:
+    
+        async with TJSPScraper() as scraper:
+            publications = await scraper.scrape_date(target_date)
+    """
     
     def __init__(self, tribunal_code: str):
         self.tribunal_code = tribunal_code
-        self.timeout = httpx.Timeout(30.0)
-        self.limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+        self.timeout = httpx.Timeout(float(settings.SCRAPER_TIMEOUT))
+        self.limits = httpx.Limits(
+            max_keepalive_connections=settings.SCRAPER_CONCURRENCY,
+            max_connections=settings.SCRAPER_CONCURRENCY
+        )
+        self._client: httpx.AsyncClient | None = None
+        # Limitadores por host; podem ser definidos de fora (ex.: testes)
+        self.throttles: dict[str, Throttle] = {}
+        self._redis = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado, criado sob demanda"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=HTTP2_AVAILABLE and settings.SCRAPER_HTTP2,
+                follow_redirects=True
+            )
+        return self._client
+    
+    def throttle(self, url: str) -> Throttle | None:
+        """Limitador do host de url, conforme SCRAPER_THROTTLE (None = desligado)"""
+        host = urlsplit(url).netloc
+        throttle = self.throttles.get(host)
+        if throttle is not None or settings.SCRAPER_THROTTLE == "off":
+            return throttle
         
+        if settings.SCRAPER_THROTTLE == "redis":
+            if self._redis is None:
+                self._redis = aioredis.from_url(settings.REDIS_URL)
+            throttle = RedisThrottle(host, self._redis)
+        else:
+            throttle = Throttle(host)
+        self.throttles[host] = throttle
+        return throttle
+    
+    async def aclose(self):
+        """Fecha o cliente HTTP e suas conexões"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+    
+    def __getstate__(self):
+        # Os clientes HTTP e Redis não são serializáveis; o scraper vai para
+        # os processos de parsing (ver app.scrapers.engine) sem eles
+        state = self.__dict__.copy()
+        state['_client'] = None
+        state['_redis'] = None
+        state['throttles'] = {}
+        return state
+    
+    async def __aenter__(self):
+        self.client
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
     async def fetch_page(self, url: str, retry: int = 3) -> str:
-        """Busca página com retry automático"""
-        async with httpx.AsyncClient(timeout=self.timeout, limits=self.limits) as client:
-            for attempt in range(retry):
-                try:
-                    response = await client.get(url)
+        """Busca página com retry automático, reutilizando conexões do pool"""
+        response = await self._get(url, retry=retry)
+        return response.text
+    
+    async def fetch_conditional(self, url: str, previous: PageState | None = None, retry: int = 3) -> FetchedPage:
+        """
+        GET condicional: com os validadores de previous, o servidor pode
+        responder 304 sem corpo
+        """
+        headers = {}
+        if previous is not None and previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous is not None and previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+        
+        # 304 só é resposta válida quando há validadores na requisição
+        accept_statuses = (304,) if headers else ()
+        response = await self._get(url, headers=headers, retry=retry, accept_statuses=accept_statuses)
+        if response.status_code == 304:
+            return FetchedPage(304, None, response.headers.get("ETag"), response.headers.get("Last-Modified"), None)
+        return FetchedPage(
+            status_code=response.status_code,
+            text=response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            checksum=body_checksum(response.content)
+        )
+    
+    async def _get(
+        self,
+        url: str,
+        headers: dict | None = None,
+        retry: int = 3,
+        accept_statuses: tuple[int, ...] = ()
+    ) -> httpx.Response:
+        """
+        GET com retry, no ritmo do limitador do host
+        
+        Cada tentativa espera a vez no token bucket do host e informa
+        latência, status e Retry-After, o que ajusta a taxa de todos os
+        workers. 429, 5xx e falhas de transporte são repetidos; os demais
+        4xx falham na hora, e CircuitOpenError interrompe sem nova tentativa.
+        Status em accept_statuses (ex.: 304 de um GET condicional) são
+        devolvidos como sucesso, sem raise_for_status.
+        """
+        throttle = self.throttle(url)
+        for attempt in range(retry):
+            last_attempt = attempt == retry - 1
+            if throttle is not None:
+                await throttle.acquire()
+            started = time.monotonic()
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.TransportError:
+                if throttle is not None:
+                    await throttle.record(None, time.monotonic() - started)
+                if last_attempt:
+                    raise
+            else:
+                if throttle is not None:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    await throttle.record(response.status_code, time.monotonic() - started, retry_after)
+                if response.status_code in accept_statuses:
+                    return response
+                if last_attempt or (response.status_code != 429 and response.status_code < 500):
                     response.raise_for_status()
-                    return response.text
-                except httpx.HTTPError as e:
-                    if attempt == retry - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                    return response
+            if throttle is None:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+    
+    async def iter_date(
+        self,
+        target_date: date,
+        state: PageStateStore | None = None,
+        failed: List[PageResult] | None = None
+    ) -> AsyncIterator[PublicationCreate]:
+        """
+        Gera as publicações de uma data à medida que cada página é parseada
+        
+        As páginas seguintes continuam sendo baixadas enquanto o consumidor
+        processa as já entregues, sem montar a lista completa em memória.
+        Com state, páginas sem alteração desde a última execução são
+        puladas (ver PageStateStore). As páginas que falham são
+        acrescentadas a failed; se a inicial falha, levanta IndexPageError.
+        """
+        async for page in ScrapingEngine(self, state=state).iter_pages(target_date):
+            if page.error is not None and failed is not None:
+                failed.append(page)
+            for publication in page.publications:
+                yield publication
     
-    @abstractmethod
     async def scrape_date(self, target_date: date) -> List[PublicationCreate]:
-        """Método abstrato para scraping de uma data específica"""
+        """Scrape de todas as páginas do diário de uma data, em paralelo"""
+        try:
+            return [publication async for publication in self.iter_date(target_date)]
+        except Exception as e:
+            print(f"Erro ao fazer scraping {self.tribunal_code} {target_date}: {e}")
+            return []
+    
+    @abstractmethod
+    def build_url(self, target_date: date) -> str:
+        """Método abstrato que monta a URL inicial do diário de uma data"""
+        pass
+    
+    @abstractmethod
+    def parse_page(self, html: str, target_date: date, page_url: str) -> ParsedPage:
+        """Método abstrato para parsing de uma página do diário"""
         pass
     
     @abstractmethod
     def parse_publication(self, raw_data: dict) -> PublicationCreate:
         """Método abstrato para parsing de publicação"""
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,218 @@
+"""Motor de scraping concorrente para diários paginados"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING, AsyncIterator, List
+from app.config import get_settings
+from app.schemas.publication import PublicationCreate
+
+if TYPE_CHECKING:
+    from app.scrapers.base import BaseScraper, ParsedPage
+    from app.scrapers.page_state import PageStateStore
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Semáforos por tribunal, um conjunto por event loop (cada task do Celery
+# roda num asyncio.run próprio e primitivas asyncio não atravessam loops)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def tribunal_semaphore(tribunal_code: str) -> asyncio.Semaphore:
+    """Semáforo compartilhado que limita fetches simultâneos por tribunal"""
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if tribunal_code not in per_loop:
+        per_loop[tribunal_code] = asyncio.Semaphore(settings.SCRAPER_CONCURRENCY)
+    return per_loop[tribunal_code]
+
+
+# Pool de processos de parsing, compartilhado por todo o processo
+_parse_executor: Executor | None = None
+_parse_executor_disabled = False
+
+
+def get_parse_executor() -> Executor | None:
+    """
+    Pool de processos para parsing (lxml + regex) fora do event loop
+    
+    Dimensionado por SCRAPER_PARSE_WORKERS (None = nº de CPUs). Retorna
+    None quando o parsing deve rodar no próprio loop: SCRAPER_PARSE_WORKERS
+    igual a 0 ou pool indisponível neste processo.
+    
+    Processos daemon não podem criar filhos, e é assim que o pool prefork
+    padrão do Celery roda as tasks: nesse caso o parsing vai para um pool
+    de threads (sem serializar o scraper a cada página), que ainda tira o
+    parsing do event loop mas divide o GIL. Para o pool de processos, rode
+    o worker com --pool solo (ou threads).
+    """
+    global _parse_executor
+    if _parse_executor_disabled:
+        return None
+    if _parse_executor is None:
+        workers = settings.SCRAPER_PARSE_WORKERS
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 0:
+            return None
+        if multiprocessing.current_process().daemon:
+            logger.warning(
+                "Processo daemon (pool prefork do Celery?) não pode criar o pool de parsing; "
+                "parseando em threads. Use o worker com --pool solo para parsing em processos"
+            )
+            _parse_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+        else:
+            _parse_executor = ProcessPoolExecutor(max_workers=workers)
+    return _parse_executor
+
+
+def _disable_parse_executor(error: BaseException):
+    """Desliga o pool após uma falha e volta ao parsing no event loop"""
+    global _parse_executor, _parse_executor_disabled
+    logger.warning(f"Pool de parsing indisponível, parseando no event loop: {error!r}")
+    _parse_executor_disabled = True
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+def shutdown_parse_executor():
+    """Encerra o pool de parsing (chamado no shutdown do worker)"""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown()
+        _parse_executor = None
+
+
+def _parse_in_worker(scraper: "BaseScraper", html: str, target_date: date, page_url: str) -> "ParsedPage":
+    """Executado no processo de parsing"""
+    return scraper.parse_page(html, target_date, page_url)
+
+
+_DEFAULT_EXECUTOR = object()
+
+
+class IndexPageError(RuntimeError):
+    """A página inicial do diário falhou: nenhuma outra página do dia é conhecida"""
+
+
+@dataclass
+class PageResult:
+    """Resultado do scraping de uma página do diário"""
+    url: str
+    publications: List[PublicationCreate] = field(default_factory=list)
+    error: Exception | None = None
+    unchanged: bool = False  # igual à última execução: nem parseada nem ingerida
+
+
+class ScrapingEngine:
+    """
+    Percorre todas as páginas de um diário com fan-out limitado
+    
+    Começa pela URL do dia (scraper.build_url) e segue os links de
+    cadernos/páginas devolvidos por scraper.parse_page. Até
+    SCRAPER_CONCURRENCY páginas são baixadas ao mesmo tempo por tribunal,
+    e os resultados são entregues à medida que cada página termina.
+    
+    O parsing roda no pool de processos (get_parse_executor), liberando o
+    loop para continuar baixando; executor=None força parsing no loop.
+    
+    Com state, as páginas são pedidas com GET condicional e as que não
+    mudaram desde a última execução seguem pelos links guardados, sem
+    parsing nem publicações (ver PageStateStore).
+    
+    Uma página que falha vira um PageResult com error, e as demais
+    seguem; se a que falha é a inicial, iter_pages levanta IndexPageError.
+    """
+    
+    def __init__(
+        self,
+        scraper: "BaseScraper",
+        concurrency: int | None = None,
+        executor: Executor | None = _DEFAULT_EXECUTOR,
+        state: "PageStateStore | None" = None
+    ):
+        self.scraper = scraper
+        self.concurrency = concurrency or settings.SCRAPER_CONCURRENCY
+        self._executor = executor
+        self.state = state
+    
+    async def iter_pages(self, target_date: date) -> AsyncIterator[PageResult]:
+        """Gera um PageResult por página, na ordem em que terminam (IndexPageError se a inicial falha)"""
+        start_url = self.scraper.build_url(target_date)
+        seen = {start_url}
+        pending: asyncio.Queue[str] = asyncio.Queue()
+        # Fila limitada: se o consumidor atrasa, os workers param de baixar
+        results: asyncio.Queue[PageResult | None] = asyncio.Queue(maxsize=self.concurrency)
+        outstanding = 1
+        pending.put_nowait(start_url)
+        
+        async def worker():
+            nonlocal outstanding
+            while True:
+                url = await pending.get()
+                result, links = await self._scrape_page(url, target_date)
+                for link in links:
+                    if link not in seen:
+                        seen.add(link)
+                        outstanding += 1
+                        pending.put_nowait(link)
+                await results.put(result)
+                outstanding -= 1
+                if outstanding == 0:
+                    await results.put(None)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            while (result := await results.get()) is not None:
+                if result.error is not None and result.url == start_url:
+                    raise IndexPageError(
+                        f"Falha na página inicial do diário {start_url}: {result.error!r}"
+                    ) from result.error
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _scrape_page(self, url: str, target_date: date) -> tuple[PageResult, List[str]]:
+        """Baixa e parseia uma página; falhas ficam registradas no PageResult"""
+        try:
+            if self.state is None:
+                async with tribunal_semaphore(self.scraper.tribunal_code):
+                    html = await self.scraper.fetch_page(url)
+                parsed = await self._parse(html, target_date, url)
+            else:
+                async with tribunal_semaphore(self.scraper.tribunal_code):
+                    fetched = await self.scraper.fetch_conditional(url, self.state.get(url))
+                if self.state.is_unchanged(url, fetched):
+                    return PageResult(url=url, unchanged=True), self.state.get(url).links
+                parsed = await self._parse(fetched.text, target_date, url)
+                self.state.update(url, fetched, parsed.links)
+        except Exception as e:
+            logger.warning(f"Falha ao processar página {url} ({self.scraper.tribunal_code}): {e}")
+            return PageResult(url=url, error=e), []
+        
+        return PageResult(url=url, publications=parsed.publications), parsed.links
+    
+    async def _parse(self, html: str, target_date: date, url: str) -> "ParsedPage":
+        """Parseia no pool de processos, ou no loop se não houver pool"""
+        executor = get_parse_executor() if self._executor is _DEFAULT_EXECUTOR else self._executor
+        if executor is None:
+            return self.scraper.parse_page(html, target_date, url)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, _parse_in_worker, self.scraper, html, target_date, url)
+        except (AssertionError, OSError, BrokenExecutor) as e:
+            # Ex.: processos daemon (prefork do Celery) não podem criar filhos
+            if self._executor is not _DEFAULT_EXECUTOR:
+                raise
+            _disable_parse_executor(e)
+            return self.scraper.parse_page(html, target_date, url)
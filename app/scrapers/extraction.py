@@ -0,0 +1,144 @@
+"""Extração de números CNJ, partes e tipo de publicação numa única passada"""
+import re
+from dataclasses import dataclass, field
+
+# Máximo de partes guardadas por publicação
+MAX_PARTIES = 10
+
+CNJ_REGEX = r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'
+
+# Rótulos de papel aceitos (Capitalizados ou em caixa alta) -> tipo de participante
+_ROLES = {
+    'autor': 'party',
+    'autora': 'party',
+    'réu': 'party',
+    'ré': 'party',
+    'requerente': 'party',
+    'requerido': 'party',
+    'requerida': 'party',
+    'advogado': 'lawyer',
+    'advogada': 'lawyer',
+}
+
+# Palavras de tipo (minúsculas, com e sem acento) -> tipo de publicação
+_TYPE_HINTS = {
+    **dict.fromkeys(['decisão', 'decisões', 'decisao', 'decisoes'], 'DECISAO'),
+    **dict.fromkeys(['sentença', 'sentenças', 'sentenca', 'sentencas'], 'DECISAO'),
+    **dict.fromkeys(['despacho', 'despachos'], 'DESPACHO'),
+    **dict.fromkeys(['edital', 'editais'], 'EDITAL'),
+    **dict.fromkeys(['intimação', 'intimações', 'intimacao', 'intimacoes'], 'INTIMACAO'),
+}
+
+# Restante de cada rótulo/palavra, após a primeira letra (conferida por lookbehind)
+_ROLE = (
+    r"(?<=R)(?:equerente|EQUERENTE|equerid[oa]|EQUERID[OA]|éu|ÉU|é(?=[ \t]*:)|É(?=[ \t]*:))"
+    r"|(?<=A)(?:utora?|UTORA?|dvogad[oa]|DVOGAD[OA])"
+)
+_HINT = (
+    r"(?<=D)(?:ecis|ECIS|espacho|ESPACHO)|(?<=S)(?:enten|ENTEN)"
+    r"|(?<=E)(?:dita|DITA)|(?<=I)(?:ntima|NTIMA)"
+)
+
+# Nome: palavras iniciadas em maiúscula (ou conectivos da/de/do/dos/das/e)
+# na mesma linha, parando em "(", " - " ou em palavra minúscula
+_NAME_WORD = r"[A-ZÀ-Ý][\wÀ-ÿ.'&/-]*"
+_NAME = rf"{_NAME_WORD}(?:[ \t]+(?:{_NAME_WORD}|(?:d[aeo]s?|e)\b))*"
+
+# Uma única regex com uma alternativa por tipo de informação, cada uma com
+# um grupo nomeado externo para despacho via lastgroup. A primeira letra de
+# todas as alternativas é fatorada numa classe inicial: assim o re usa o
+# prefiltro de caractere em C e só entra no matcher nas posições que podem
+# iniciar algum match. O (?<!\w.) exige início de palavra/número.
+EXTRACTION_PATTERN = re.compile(
+    r"[0-9OARDSEI](?<!\w.)(?:"
+    r"(?<=[0-9])(?P<cnj>\d{6}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4})"
+    r"|(?<=O)(?P<oab>AB[ \t]*[/:-]?[ \t]*(?P<oab_uf>[A-Z]{2})[ \t]*[/:-]?[ \t]*(?P<oab_number>\d[\d.]*\d|\d))"
+    rf"|(?P<party>(?P<role>{_ROLE})\b[ \t]*:?[ \t]*(?P<name>{_NAME}))"
+    rf"|(?P<hint>(?:{_HINT})[^\W\d_]*)"
+    r")"
+)
+
+_NAME_TRAILING = re.compile(r"(?:[ \t]+(?:d[aeo]s?|e))+$")
+_CONNECTORS = (' da', ' de', ' do', ' das', ' des', ' dos', ' e')
+
+
+@dataclass(slots=True)
+class Extraction:
+    """Informações estruturadas extraídas do texto de uma publicação"""
+    process_numbers: list[str] = field(default_factory=list)
+    valid_process_numbers: list[str] = field(default_factory=list)
+    parties: list[str] = field(default_factory=list)
+    lawyers: list[str] = field(default_factory=list)
+    oab_numbers: list[str] = field(default_factory=list)
+    publication_type: str | None = None
+    
+    @property
+    def process_number(self) -> str | None:
+        """Número principal: o primeiro com dígito verificador válido, ou o primeiro encontrado"""
+        if self.valid_process_numbers:
+            return self.valid_process_numbers[0]
+        return self.process_numbers[0] if self.process_numbers else None
+
+
+def is_valid_cnj(number: str) -> bool:
+    """
+    Valida o dígito verificador de um número CNJ (NNNNNNN-DD.AAAA.J.TR.OOOO)
+    
+    Pela Resolução CNJ 65/2008, NNNNNNN AAAA J TR OOOO DD lidos como um
+    inteiro devem deixar resto 1 na divisão por 97.
+    """
+    digits = number.replace('-', '').replace('.', '')
+    if len(digits) != 20 or not digits.isdigit():
+        return False
+    return int(digits[:7] + digits[9:] + digits[7:9]) % 97 == 1
+
+
+def extract(text: str) -> Extraction:
+    """Extrai números CNJ, partes, advogados/OAB e tipo com uma passada sobre o texto"""
+    result = Extraction()
+    seen_parties = set()
+    seen_lawyers = set()
+    
+    for match in EXTRACTION_PATTERN.finditer(text):
+        kind = match.lastgroup
+        
+        if kind == 'cnj':
+            # O grupo não inclui o primeiro dígito, consumido pela classe inicial
+            number = match.group(0)
+            if number not in result.process_numbers:
+                result.process_numbers.append(number)
+                if is_valid_cnj(number):
+                    result.valid_process_numbers.append(number)
+        
+        elif kind == 'party':
+            name = match.group('name')
+            if name.endswith(_CONNECTORS):
+                name = _NAME_TRAILING.sub('', name)
+            role = match.group(0)[0] + match.group('role')
+            if _ROLES[role.lower()] == 'lawyer':
+                if name not in seen_lawyers:
+                    seen_lawyers.add(name)
+                    result.lawyers.append(name)
+            elif name not in seen_parties and len(result.parties) < MAX_PARTIES:
+                seen_parties.add(name)
+                result.parties.append(name)
+        
+        elif kind == 'oab':
+            oab = f"{match.group('oab_uf')} {match.group('oab_number').replace('.', '')}"
+            if oab not in result.oab_numbers:
+                result.oab_numbers.append(oab)
+        
+        elif kind == 'hint' and result.publication_type is None:
+            result.publication_type = _TYPE_HINTS.get(match.group(0).lower())
+    
+    return result
+
+
+def classify_type(text: str) -> str | None:
+    """Tipo de publicação pela primeira palavra-chave do texto (ex.: título de seção)"""
+    for match in EXTRACTION_PATTERN.finditer(text):
+        if match.lastgroup == 'hint':
+            hint = _TYPE_HINTS.get(match.group(0).lower())
+            if hint:
+                return hint
+    return None
@@ -0,0 +1,123 @@
+"""Validadores HTTP e checksums das páginas já processadas de um diário"""
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from typing import List
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Hash do Redis por tribunal e data: campo = URL da página, valor = PageState em JSON
+PAGE_STATE_KEY = "scraper:pages:{tribunal}:{date}"
+
+
+def body_checksum(body: bytes) -> str:
+    """Checksum do corpo da resposta (blake2b de 16 bytes, em hex)"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+@dataclass
+class PageState:
+    """O que se sabe de uma página já parseada e ingerida"""
+    etag: str | None
+    last_modified: str | None
+    checksum: str
+    links: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FetchedPage:
+    """Resposta de um GET condicional (text é None em 304)"""
+    status_code: int
+    text: str | None
+    etag: str | None
+    last_modified: str | None
+    checksum: str | None
+    
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+class PageStateStore:
+    """
+    Estado das páginas de um diário (tribunal, data) entre execuções
+    
+    O motor de scraping manda If-None-Match/If-Modified-Since com os
+    validadores guardados; página com 304, ou com o mesmo checksum de
+    corpo quando o servidor não suporta requisições condicionais, não é
+    parseada nem ingerida, e a travessia segue pelos links guardados.
+    As atualizações ficam pendentes até save, que deve ser chamado só
+    depois da ingestão: se a execução cai no meio, a próxima baixa tudo de
+    novo (a deduplicação absorve o que já tinha entrado).
+    """
+    
+    def __init__(self, tribunal: str, target_date: date, pages: dict[str, PageState] | None = None):
+        self.tribunal = tribunal
+        self.target_date = target_date
+        self._pages = pages or {}
+        self._updated: dict[str, PageState] = {}
+        self.changed = 0
+        self.unchanged = 0
+    
+    @property
+    def key(self) -> str:
+        return PAGE_STATE_KEY.format(tribunal=self.tribunal, date=self.target_date.isoformat())
+    
+    @classmethod
+    async def load(cls, redis, tribunal: str, target_date: date) -> "PageStateStore":
+        """Estado gravado por execuções anteriores (vazio se não houver ou o Redis falhar)"""
+        store = cls(tribunal, target_date)
+        try:
+            raw = await redis.hgetall(store.key)
+        except Exception as e:
+            logger.warning(f"Erro ao carregar estado das páginas {store.key}: {e}")
+            return store
+        for url, value in raw.items():
+            url = url.decode() if isinstance(url, bytes) else url
+            store._pages[url] = PageState(**json.loads(value))
+        return store
+    
+    def get(self, url: str) -> PageState | None:
+        return self._updated.get(url) or self._pages.get(url)
+    
+    def is_unchanged(self, url: str, fetched: FetchedPage) -> bool:
+        """
+        Página igual à da última execução; renova os validadores guardados
+        (304 pode vir sem ETag, e um checksum igual pode trazer um novo)
+        """
+        previous = self.get(url)
+        if previous is None or not (fetched.not_modified or fetched.checksum == previous.checksum):
+            return False
+        self._updated[url] = PageState(
+            etag=fetched.etag or previous.etag,
+            last_modified=fetched.last_modified or previous.last_modified,
+            checksum=previous.checksum,
+            links=previous.links
+        )
+        self.unchanged += 1
+        return True
+    
+    def update(self, url: str, fetched: FetchedPage, links: List[str]) -> None:
+        """Registra uma página baixada e parseada"""
+        self._updated[url] = PageState(fetched.etag, fetched.last_modified, fetched.checksum, links)
+        self.changed += 1
+    
+    async def save(self, redis) -> None:
+        """Grava as páginas processadas nesta execução, com SCRAPER_PAGE_STATE_TTL"""
+        if not self._updated:
+            return
+        mapping = {url: json.dumps(asdict(state)) for url, state in self._updated.items()}
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self.key, mapping=mapping)
+                pipe.expire(self.key, settings.SCRAPER_PAGE_STATE_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao gravar estado das páginas {self.key}: {e}")
+            return
+        self._pages.update(self._updated)
+        self._updated.clear()
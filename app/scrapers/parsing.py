@@ -0,0 +1,72 @@
+"""Parsing de HTML dos diários com lxml em streaming"""
+from io import BytesIO
+from typing import Iterator, Mapping
+from lxml import etree
+
+
+def has_class(element: etree._Element, class_name: str) -> bool:
+    """Verifica se o elemento possui a classe CSS informada"""
+    return class_name in (element.get('class') or '').split()
+
+
+def element_text(element: etree._Element) -> tuple[str, str]:
+    """
+    Extrai o texto de um elemento numa única passada
+    
+    Retorna (texto bruto, texto compacto): o bruto preserva quebras de
+    linha para as regex de extração; o compacto equivale ao
+    get_text(strip=True) do BeautifulSoup e vai para Publication.content.
+    """
+    parts = list(element.itertext())
+    return ''.join(parts), ''.join(part.strip() for part in parts)
+
+
+def iter_matches(
+    html: str,
+    selectors: Mapping[str, tuple[str, str]]
+) -> Iterator[tuple[str, etree._Element]]:
+    """
+    Percorre o HTML com iterparse e gera (nome, elemento) para cada
+    elemento que casa com algum seletor (tag, classe) de selectors
+    
+    Os elementos são entregues completos, ao fechar a tag. Todo elemento
+    fechado fora de um elemento de interesse ainda aberto é limpo, e os
+    irmãos anteriores removidos do pai, de modo que só as subárvores de
+    interesse ficam em memória, e não a árvore do diário inteiro. Cada
+    elemento deve ser processado antes de avançar o iterador.
+    """
+    if not html or not html.strip():
+        return
+    
+    by_tag: dict[str, list[tuple[str, str]]] = {}
+    for name, (tag, class_name) in selectors.items():
+        by_tag.setdefault(tag, []).append((name, class_name))
+    
+    def match(element: etree._Element) -> str | None:
+        for name, class_name in by_tag.get(element.tag, ()):
+            if has_class(element, class_name):
+                return name
+        return None
+    
+    events = etree.iterparse(
+        BytesIO(html.encode('utf-8')),
+        events=('start', 'end'),
+        html=True,
+        encoding='utf-8'
+    )
+    # Elementos de interesse abertos: o conteúdo deles ainda vai ser entregue
+    open_matches = 0
+    for event, element in events:
+        name = match(element)
+        if event == 'start':
+            open_matches += name is not None
+            continue
+        
+        if name is not None:
+            open_matches -= 1
+            yield name, element
+        
+        if not open_matches:
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
@@ -0,0 +1,93 @@
+"""Registro dos scrapers por código de tribunal, importados sob demanda"""
+import importlib
+import importlib.util
+import logging
+import pkgutil
+from importlib.metadata import entry_points
+from typing import Callable, Dict, List, Type
+from app.scrapers.base import BaseScraper
+
+logger = logging.getLogger(__name__)
+
+# Um módulo por tribunal, com o nome do código em minúsculas (tjsp.py = TJSP)
+TRIBUNALS_PACKAGE = "app.scrapers.tribunals"
+
+# Scrapers de pacotes instalados à parte: nome = código, valor = "modulo:Classe"
+ENTRY_POINT_GROUP = "judicial_monitor.scrapers"
+
+_scrapers: Dict[str, Type[BaseScraper]] = {}
+
+
+class UnknownTribunalError(LookupError):
+    """Nenhum scraper registrado para o código de tribunal"""
+
+
+def register(code: str) -> Callable[[Type[BaseScraper]], Type[BaseScraper]]:
+    """
+    Decorator que registra um BaseScraper para um código de tribunal:
+    
+        @register("TJMG")
+        class TJMGScraper(BaseScraper):
+            ...
+    """
+    code = code.upper()
+    
+    def decorator(cls: Type[BaseScraper]) -> Type[BaseScraper]:
+        if not issubclass(cls, BaseScraper):
+            raise TypeError(f"{cls.__name__} não é um BaseScraper")
+        registered = _scrapers.get(code)
+        if registered is not None and registered.__qualname__ != cls.__qualname__:
+            raise ValueError(f"Tribunal {code} já registrado para {registered.__name__}")
+        _scrapers[code] = cls
+        return cls
+    
+    return decorator
+
+
+def available_tribunals() -> List[str]:
+    """
+    Códigos com scraper, sem importar os módulos dos tribunais: os de
+    app.scrapers.tribunals e os declarados por entry points
+    """
+    package = importlib.import_module(TRIBUNALS_PACKAGE)
+    codes = {
+        module.name.upper()
+        for module in pkgutil.iter_modules(package.__path__)
+        if not module.name.startswith("_")
+    }
+    codes.update(entry_point.name.upper() for entry_point in entry_points(group=ENTRY_POINT_GROUP))
+    codes.update(_scrapers)
+    return sorted(codes)
+
+
+def get_scraper_class(code: str) -> Type[BaseScraper]:
+    """Classe do scraper de um tribunal, importando o módulo dele no primeiro uso"""
+    code = code.upper()
+    if code not in _scrapers:
+        _load(code)
+    try:
+        return _scrapers[code]
+    except KeyError:
+        raise UnknownTribunalError(f"Tribunal {code} não suportado") from None
+
+
+def create_scraper(code: str) -> BaseScraper:
+    """Nova instância do scraper de um tribunal"""
+    return get_scraper_class(code)()
+
+
+def _load(code: str) -> None:
+    # Entry points têm precedência: um pacote externo pode substituir o
+    # scraper embutido de um tribunal
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name.upper() == code:
+            _scrapers[code] = entry_point.load()
+            return
+    
+    module = f"{TRIBUNALS_PACKAGE}.{code.lower()}"
+    if not code.isalnum() or importlib.util.find_spec(module) is None:
+        return
+    # O módulo registra a classe com @register ao ser importado
+    importlib.import_module(module)
+    if code not in _scrapers:
+        logger.warning(f"{module} não registrou um scraper para {code}")
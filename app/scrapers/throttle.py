@@ -0,0 +1,298 @@
+"""Limitador de taxa adaptativo (AIMD) e circuit breaker por host de tribunal"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Literal
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Hash do Redis com o estado compartilhado de um host
+THROTTLE_KEY = "scraper:throttle:{host}"
+
+# Classificação de uma resposta para o limitador:
+# ok = rápida; slow = acima de SCRAPER_LATENCY_TARGET; throttled = 429;
+# error = 5xx ou falha de transporte (conta para o circuit breaker)
+Outcome = Literal["ok", "slow", "throttled", "error"]
+
+# Reserva um token (o saldo pode ficar negativo: quem chega depois espera
+# mais) ou informa a espera por Retry-After / circuito aberto. Com o
+# circuito aberto vencido (meio-aberto) libera uma única sonda por vez.
+_ACQUIRE_LUA = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'rate', 'tokens', 'updated', 'blocked_until', 'open_until', 'probe_until')
+local rate = tonumber(state[1]) or tonumber(ARGV[1])
+local tokens = tonumber(state[2])
+local updated = tonumber(state[3]) or now
+local blocked_until = tonumber(state[4]) or 0
+local open_until = tonumber(state[5]) or 0
+local probe_until = tonumber(state[6]) or 0
+
+if open_until > 0 then
+    if now < open_until then
+        return {'open', tostring(open_until - now)}
+    end
+    if now < probe_until then
+        return {'open', tostring(probe_until - now)}
+    end
+    redis.call('HSET', KEYS[1], 'probe_until', tostring(now + tonumber(ARGV[2])))
+end
+if now < blocked_until then
+    return {'wait', tostring(blocked_until - now)}
+end
+
+local burst = math.max(1, rate)
+if tokens == nil then
+    tokens = burst
+end
+tokens = math.min(burst, tokens + (now - updated) * rate) - 1
+redis.call('HSET', KEYS[1], 'rate', tostring(rate), 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if tokens >= 0 then
+    return {'go', '0'}
+end
+return {'go', tostring(-tokens / rate)}
+"""
+
+# AIMD sobre a taxa compartilhada (uma redução por janela, para que uma
+# rajada de erros simultâneos não derrube a taxa várias vezes; a redução
+# também zera a rajada acumulada no bucket), contagem
+# de falhas do circuit breaker e bloqueio por Retry-After
+_FEEDBACK_LUA = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'rate', 'failures', 'decreased_at', 'open_until', 'blocked_until', 'tokens')
+local rate = tonumber(state[1]) or tonumber(ARGV[3])
+local failures = tonumber(state[2]) or 0
+local decreased_at = tonumber(state[3]) or 0
+local open_until = tonumber(state[4]) or 0
+local blocked_until = tonumber(state[5]) or 0
+local outcome = ARGV[1]
+
+if outcome == 'ok' then
+    rate = math.min(tonumber(ARGV[5]), rate + tonumber(ARGV[6]))
+elseif now - decreased_at >= tonumber(ARGV[8]) then
+    rate = math.max(tonumber(ARGV[4]), rate * tonumber(ARGV[7]))
+    decreased_at = now
+    local tokens = math.min(tonumber(state[6]) or 0, 0)
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+end
+
+if outcome == 'error' then
+    failures = failures + 1
+    if open_until > 0 or failures >= tonumber(ARGV[9]) then
+        open_until = now + tonumber(ARGV[10])
+    end
+else
+    failures = 0
+    open_until = 0
+end
+
+local retry_after = tonumber(ARGV[2])
+if retry_after > 0 then
+    blocked_until = math.max(blocked_until, now + retry_after)
+end
+
+redis.call('HSET', KEYS[1],
+    'rate', tostring(rate), 'failures', failures, 'decreased_at', tostring(decreased_at),
+    'open_until', tostring(open_until), 'blocked_until', tostring(blocked_until), 'probe_until', '0')
+redis.call('EXPIRE', KEYS[1], ARGV[11])
+return tostring(rate)
+"""
+
+
+class CircuitOpenError(Exception):
+    """Host em pane: requisições falham na hora até o fim do resfriamento"""
+    
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuito aberto para {host} (nova tentativa em {retry_in:.1f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def classify(status_code: int | None, latency: float, latency_target: float | None = None) -> Outcome:
+    """Classifica uma resposta (status None = falha de transporte/timeout)"""
+    target = settings.SCRAPER_LATENCY_TARGET if latency_target is None else latency_target
+    if status_code is None or status_code >= 500:
+        return "error"
+    if status_code == 429:
+        return "throttled"
+    return "slow" if latency > target else "ok"
+
+
+def parse_retry_after(value: str | None) -> float:
+    """Segundos de um cabeçalho Retry-After (número ou data HTTP), limitados a SCRAPER_RETRY_AFTER_MAX"""
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(max(seconds, 0.0), settings.SCRAPER_RETRY_AFTER_MAX)
+
+
+class Throttle:
+    """
+    Token bucket por host com taxa adaptativa (AIMD) e circuit breaker
+    
+    acquire espera a vez da próxima requisição; record informa o
+    resultado. A taxa sobe SCRAPER_RATE_INCREASE req/s a cada resposta
+    rápida e é multiplicada por SCRAPER_RATE_DECREASE em 429, 5xx, falhas
+    de transporte ou latência acima de SCRAPER_LATENCY_TARGET, entre
+    SCRAPER_RATE_MIN e SCRAPER_RATE_MAX. Retry-After bloqueia o host pelo
+    tempo pedido. SCRAPER_BREAKER_FAILURES falhas seguidas abrem o
+    circuito por SCRAPER_BREAKER_COOLDOWN segundos, com CircuitOpenError
+    imediato; depois, uma sonda decide se fecha ou reabre.
+    
+    Esta implementação guarda o estado no processo; RedisThrottle divide o
+    mesmo estado entre todos os workers.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        rate: float | None = None,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        increase: float | None = None,
+        decrease: float | None = None,
+        latency_target: float | None = None,
+        failures: int | None = None,
+        cooldown: float | None = None
+    ):
+        self.host = host
+        self.initial_rate = settings.SCRAPER_RATE_LIMIT if rate is None else rate
+        self.min_rate = settings.SCRAPER_RATE_MIN if min_rate is None else min_rate
+        self.max_rate = settings.SCRAPER_RATE_MAX if max_rate is None else max_rate
+        self.increase = settings.SCRAPER_RATE_INCREASE if increase is None else increase
+        self.decrease = settings.SCRAPER_RATE_DECREASE if decrease is None else decrease
+        self.latency_target = settings.SCRAPER_LATENCY_TARGET if latency_target is None else latency_target
+        self.max_failures = settings.SCRAPER_BREAKER_FAILURES if failures is None else failures
+        self.cooldown = settings.SCRAPER_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self._state: dict[str, float] = {}
+    
+    @property
+    def rate(self) -> float:
+        """Taxa atual (req/s) vista por este processo"""
+        return self._state.get("rate", self.initial_rate)
+    
+    @property
+    def decrease_window(self) -> float:
+        """Intervalo mínimo entre duas reduções de taxa"""
+        return max(self.latency_target, 1 / self.rate)
+    
+    async def acquire(self) -> None:
+        """Espera a vez da próxima requisição ao host; CircuitOpenError se o circuito está aberto"""
+        while True:
+            status, wait = await self._reserve()
+            if status == "open":
+                raise CircuitOpenError(self.host, wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if status == "go":
+                return
+    
+    async def record(self, status_code: int | None, latency: float, retry_after: float = 0.0) -> Outcome:
+        """Informa o resultado de uma requisição (status None = falha de transporte)"""
+        outcome = classify(status_code, latency, self.latency_target)
+        await self._feedback(outcome, retry_after)
+        return outcome
+    
+    async def _reserve(self) -> tuple[str, float]:
+        state = self._state
+        now = time.time()
+        rate = state.get("rate", self.initial_rate)
+        
+        open_until = state.get("open_until", 0.0)
+        if open_until > 0:
+            if now < open_until:
+                return "open", open_until - now
+            if now < state.get("probe_until", 0.0):
+                return "open", state["probe_until"] - now
+            state["probe_until"] = now + self.cooldown
+        blocked_until = state.get("blocked_until", 0.0)
+        if now < blocked_until:
+            return "wait", blocked_until - now
+        
+        burst = max(1.0, rate)
+        tokens = state.get("tokens", burst)
+        tokens = min(burst, tokens + (now - state.get("updated", now)) * rate) - 1
+        state.update(rate=rate, tokens=tokens, updated=now)
+        return "go", 0.0 if tokens >= 0 else -tokens / rate
+    
+    async def _feedback(self, outcome: Outcome, retry_after: float) -> None:
+        state = self._state
+        now = time.time()
+        rate = state.get("rate", self.initial_rate)
+        
+        if outcome == "ok":
+            rate = min(self.max_rate, rate + self.increase)
+        elif now - state.get("decreased_at", 0.0) >= self.decrease_window:
+            rate = max(self.min_rate, rate * self.decrease)
+            state.update(decreased_at=now, tokens=min(state.get("tokens", 0.0), 0.0), updated=now)
+        
+        if outcome == "error":
+            state["failures"] = state.get("failures", 0) + 1
+            if state.get("open_until", 0.0) > 0 or state["failures"] >= self.max_failures:
+                state["open_until"] = now + self.cooldown
+        else:
+            state["failures"] = 0
+            state["open_until"] = 0.0
+        
+        if retry_after > 0:
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), now + retry_after)
+        state.update(rate=rate, probe_until=0.0)
+
+
+class RedisThrottle(Throttle):
+    """
+    Throttle com o estado no Redis (hash scraper:throttle:<host>),
+    atualizado por scripts Lua atômicos: todos os workers do Celery
+    dividem a mesma taxa, o mesmo bloqueio por Retry-After e o mesmo
+    circuito. Se o Redis falha, segue com o estado local do processo.
+    """
+    
+    def __init__(self, host: str, redis, **kwargs):
+        super().__init__(host, **kwargs)
+        self.redis = redis
+        self.key = THROTTLE_KEY.format(host=host)
+        self._acquire_script = redis.register_script(_ACQUIRE_LUA)
+        self._feedback_script = redis.register_script(_FEEDBACK_LUA)
+        self._ttl = int(max(3600, 10 * self.cooldown))
+    
+    async def _reserve(self) -> tuple[str, float]:
+        try:
+            status, wait = await self._acquire_script(
+                keys=[self.key],
+                args=[self.initial_rate, self.cooldown, self._ttl]
+            )
+        except Exception as e:
+            logger.warning(f"Limitador de {self.host} sem Redis, usando estado local: {e}")
+            return await super()._reserve()
+        return _text(status), float(wait)
+    
+    async def _feedback(self, outcome: Outcome, retry_after: float) -> None:
+        try:
+            rate = await self._feedback_script(
+                keys=[self.key],
+                args=[
+                    outcome, retry_after, self.initial_rate, self.min_rate, self.max_rate,
+                    self.increase, self.decrease, self.decrease_window, self.max_failures,
+                    self.cooldown, self._ttl,
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"Limitador de {self.host} sem Redis, usando estado local: {e}")
+            return await super()._feedback(outcome, retry_after)
+        self._state["rate"] = float(rate)
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
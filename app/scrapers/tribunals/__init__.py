@@ -0,0 +1 @@
+"""Scrapers dos tribunais: um módulo por código (ver app.scrapers.registry)"""
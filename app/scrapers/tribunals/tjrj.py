@@ -0,0 +1,86 @@
+from datetime import date
+from urllib.parse import urljoin
+from app.scrapers.base import BaseScraper, ParsedPage
+from app.scrapers.extraction import classify_type, extract
+from app.scrapers.parsing import element_text, has_class, iter_matches
+from app.scrapers.registry import register
+from app.schemas.publication import PublicationCreate
+
+@register("TJRJ")
+class TJRJScraper(BaseScraper):
+    """Scraper para Tribunal de Justiça do Rio de Janeiro"""
+    
+    BASE_URL = "http://www.tjrj.jus.br/web/guest/institucional/dir-gerais/dgcon/diario-oficial"
+    
+    SELECTORS = {
+        'section': ('div', 'diario-section'),
+        'paginacao': ('ul', 'paginacao'),
+        'caderno': ('a', 'caderno-link'),
+    }
+    
+    def __init__(self):
+        super().__init__("TJRJ")
+    
+    def build_url(self, target_date: date) -> str:
+        """URL do índice do diário de uma data (cadernos e páginas são descobertos a partir dela)"""
+        # URL fictícia para exemplo
+        return f"{self.BASE_URL}?data={target_date.strftime('%Y-%m-%d')}"
+    
+    def parse_page(self, html: str, target_date: date, page_url: str) -> ParsedPage:
+        """Parse de uma página do diário do TJ-RJ"""
+        publications = []
+        links = []
+        
+        # Parsing específico do TJ-RJ (estrutura diferente do TJ-SP)
+        for name, element in iter_matches(html, self.SELECTORS):
+            if name == 'section':
+                title = element.find('.//h3')
+                publication_type = self._classify_type(element_text(title)[0] if title is not None else '')
+                
+                for item in element.iter('p'):
+                    if not has_class(item, 'publicacao'):
+                        continue
+                    text, content = element_text(item)
+                    info = extract(text)
+                    pub_data = {
+                        'content': content,
+                        'process_number': info.process_number,
+                        'parties': info.parties,
+                        # Título da seção prevalece; sem ele, vale a pista do próprio texto
+                        'publication_type': (
+                            publication_type if publication_type != 'OUTROS' else info.publication_type or 'OUTROS'
+                        ),
+                        'publication_date': target_date,
+                    }
+                    publications.append(self.parse_publication(pub_data))
+            elif name == 'paginacao':
+                # Links de paginação do dia
+                links.extend(urljoin(page_url, a.get('href')) for a in element.iter('a') if a.get('href'))
+            elif element.get('href'):
+                # Links para os demais cadernos
+                links.append(urljoin(page_url, element.get('href')))
+        
+        return ParsedPage(publications=publications, links=links)
+    
+    def parse_publication(self, raw_data: dict) -> PublicationCreate:
+        """Parse dados brutos em PublicationCreate"""
+        return PublicationCreate(
+            tribunal=self.tribunal_code,
+            publication_date=raw_data.get('publication_date', date.today()),
+            process_number=raw_data.get('process_number'),
+            content=raw_data['content'],
+            parties=raw_data.get('parties'),
+            publication_type=raw_data.get('publication_type', 'OUTROS')
+        )
+    
+    def _extract_process_number(self, text: str) -> str | None:
+        """Extrai número do processo (padrão CNJ)"""
+        return extract(text).process_number
+    
+    def _extract_parties(self, text: str) -> list[str]:
+        """Extrai partes envolvidas"""
+        return extract(text).parties
+    
+    def _classify_type(self, section_title: str) -> str:
+        """Classifica tipo de publicação baseado na seção"""
+        return classify_type(section_title) or 'OUTROS'
\ No newline at end of file
@@ -0,0 +1,70 @@
+from datetime import date
+from urllib.parse import urljoin
+from app.scrapers.base import BaseScraper, ParsedPage
+from app.scrapers.extraction import extract
+from app.scrapers.parsing import element_text, iter_matches
+from app.scrapers.registry import register
+from app.schemas.publication import PublicationCreate
+
+@register("TJSP")
+class TJSPScraper(BaseScraper):
+    """Scraper para Tribunal de Justiça de São Paulo"""
+    
+    BASE_URL = "https://www.tjsp.jus.br/DiarioJusticaEletronico"
+    
+    SELECTORS = {
+        'item': ('div', 'publicacao-item'),
+        'caderno': ('a', 'caderno-link'),
+        'pagina': ('a', 'pagina-link'),
+    }
+    
+    def __init__(self):
+        super().__init__("TJSP")
+    
+    def build_url(self, target_date: date) -> str:
+        """URL do índice do diário de uma data (cadernos e páginas são descobertos a partir dela)"""
+        # URL fictícia para exemplo (em produção seria a URL real)
+        return f"{self.BASE_URL}?data={target_date.strftime('%d/%m/%Y')}"
+    
+    def parse_page(self, html: str, target_date: date, page_url: str) -> ParsedPage:
+        """Parse de uma página do diário do TJ-SP"""
+        publications = []
+        links = []
+        
+        # Parsing específico do TJ-SP: só as subárvores de interesse
+        for name, element in iter_matches(html, self.SELECTORS):
+            if name == 'item':
+                text, content = element_text(element)
+                info = extract(text)
+                pub_data = {
+                    'content': content,
+                    'process_number': info.process_number,
+                    'parties': info.parties,
+                    'publication_type': info.publication_type,
+                    'publication_date': target_date,
+                }
+                publications.append(self.parse_publication(pub_data))
+            elif element.get('href'):
+                # Links para os demais cadernos e páginas do dia
+                links.append(urljoin(page_url, element.get('href')))
+        
+        return ParsedPage(publications=publications, links=links)
+    
+    def parse_publication(self, raw_data: dict) -> PublicationCreate:
+        """Parse dados brutos em PublicationCreate"""
+        return PublicationCreate(
+            tribunal=self.tribunal_code,
+            publication_date=raw_data.get('publication_date', date.today()),
+            process_number=raw_data.get('process_number'),
+            content=raw_data['content'],
+            parties=raw_data.get('parties'),
+            publication_type=raw_data.get('publication_type') or 'OUTROS'
+        )
+    
+    def _extract_process_number(self, text: str) -> str | None:
+        """Extrai número do processo (padrão CNJ)"""
+        return extract(text).process_number
+    
+    def _extract_parties(self, text: str) -> list[str]:
+        """Extrai partes do processo"""
+        return extract(text).parties
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""Busca retroativa (backfill) de monitoramentos em publicações já gravadas"""
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List
+from sqlalchemy import and_, func, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.publication import (
+    Monitor, MonitorBackfill, MonitorBackfillPartition, MonitorMatch, Publication, SEARCH_CONFIG,
+)
+from app.services.monitor_matcher import MonitorMatcher
+
+settings = get_settings()
+
+
+def shift_months(day: date, months: int) -> date:
+    """Mesma data months meses depois (ou antes), limitada ao último dia do mês"""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    first = date(year, month + 1, 1)
+    last = (date(year + (month + 1) // 12, (month + 1) % 12 + 1, 1) - timedelta(days=1)).day
+    return first.replace(day=min(day.day, last))
+
+
+def month_slices(since: date, until: date) -> List[tuple[date, date]]:
+    """Intervalos [início, fim) de since a until (inclusive), quebrados na virada de cada mês"""
+    slices = []
+    start = since
+    while start <= until:
+        next_month = shift_months(start.replace(day=1), 1)
+        end = min(next_month, until + timedelta(days=1))
+        slices.append((start, end))
+        start = end
+    return slices
+
+
+@dataclass
+class BackfillProgress:
+    """Andamento agregado de um backfill a partir das suas fatias"""
+    backfill: MonitorBackfill
+    status: str  # pending, running, stalled, done ou failed
+    partitions_total: int
+    partitions_done: int
+    partitions_failed: int
+    scanned: int
+    matches: int
+    started_at: datetime | None
+    finished_at: datetime | None
+    
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+    
+    @property
+    def throughput(self) -> float:
+        """Publicações verificadas por segundo"""
+        elapsed = self.elapsed_seconds
+        return round(self.scanned / elapsed, 1) if elapsed > 0 else 0.0
+
+
+class BackfillService:
+    """
+    Backfill de um monitoramento sobre o histórico de publicações
+    
+    O período é quebrado em fatias mensais (MonitorBackfillPartition),
+    processadas em paralelo por tasks do Celery. Cada fatia percorre, em
+    ordem (publication_date, id), só as publicações candidatas pelo índice
+    GIN de busca textual (phraseto_tsquery de cada palavra-chave) e
+    confirma cada uma com o MonitorMatcher, com a mesma regra da ingestão.
+    A cada MONITOR_BACKFILL_BATCH publicações os casamentos e o checkpoint
+    são gravados numa transação: uma fatia interrompida recomeça depois
+    da última publicação verificada. Uma fatia "running" sem checkpoint há
+    MONITOR_BACKFILL_STALE_AFTER segundos é dada como parada (worker que
+    caiu sem redelivery) e o backfill aparece como "stalled", para ser
+    retomado. Cada task reivindica a fatia com um UPDATE condicional antes
+    de começar: uma fatia em execução com checkpoint recente não é
+    percorrida por dois workers ao mesmo tempo (retomada, redelivery).
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, monitor: Monitor, months: int, until: date | None = None) -> MonitorBackfill:
+        """Registra o backfill dos últimos months meses, com uma fatia por mês"""
+        until = until or date.today()
+        backfill = MonitorBackfill(monitor_id=monitor.id, since=shift_months(until, -months), until=until)
+        self.db.add(backfill)
+        await self.db.flush()
+        
+        self.db.add_all(
+            MonitorBackfillPartition(backfill_id=backfill.id, start_date=start, end_date=end)
+            for start, end in month_slices(backfill.since, backfill.until)
+        )
+        await self.db.commit()
+        return backfill
+    
+    async def pending_partitions(self, backfill_id: uuid.UUID) -> List[uuid.UUID]:
+        """Fatias pendentes, com falha ou paradas, para distribuir ou retomar (não as em execução)"""
+        result = await self.db.execute(
+            select(MonitorBackfillPartition.id)
+            .where(MonitorBackfillPartition.backfill_id == backfill_id, self._claimable())
+            .order_by(MonitorBackfillPartition.start_date.desc())
+        )
+        return list(result.scalars().all())
+    
+    async def run_partition(self, partition_id: uuid.UUID, reader: AsyncSession) -> MonitorBackfillPartition | None:
+        """
+        Processa uma fatia a partir do seu checkpoint
+        
+        reader é uma sessão separada, só de leitura: as publicações vêm
+        por um cursor no servidor que continua aberto enquanto esta sessão
+        grava e faz commit de cada lote.
+        """
+        # Reivindicação atômica: só uma task por vez percorre a fatia
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(MonitorBackfillPartition)
+            .where(MonitorBackfillPartition.id == partition_id, self._claimable())
+            .values(
+                status="running",
+                started_at=func.coalesce(MonitorBackfillPartition.started_at, now),
+                error=None,
+                updated_at=now
+            )
+            .returning(MonitorBackfillPartition.id)
+        )
+        claimed = result.scalar_one_or_none() is not None
+        await self.db.commit()
+        
+        partition = await self.db.get(MonitorBackfillPartition, partition_id, populate_existing=True)
+        if not claimed:
+            # Concluída, removida ou em execução em outro worker
+            return partition
+        
+        backfill = await self.db.get(MonitorBackfill, partition.backfill_id)
+        monitor = await self.db.get(Monitor, backfill.monitor_id)
+        if monitor is None:
+            await self._fail(partition_id, "Monitoramento removido")
+            return partition
+        
+        try:
+            matcher = MonitorMatcher([(monitor.id, monitor.keywords, monitor.tribunals)])
+            query = select(
+                Publication.id, Publication.tribunal, Publication.publication_date, Publication.content
+            ).where(
+                Publication.publication_date >= partition.start_date,
+                Publication.publication_date < partition.end_date
+            )
+            if monitor.tribunals:
+                query = query.where(Publication.tribunal.in_(monitor.tribunals))
+            candidates = await self.candidate_filter(monitor.keywords)
+            if candidates is not None:
+                query = query.where(candidates)
+            if partition.cursor_date is not None:
+                query = query.where(
+                    tuple_(Publication.publication_date, Publication.id)
+                    > tuple_(partition.cursor_date, partition.cursor_id)
+                )
+            query = query.order_by(Publication.publication_date, Publication.id)
+            
+            result = await reader.stream(query.execution_options(yield_per=settings.MONITOR_BACKFILL_BATCH))
+            async for batch in result.partitions():
+                partition.matches += await self._save_matches(monitor.id, matcher, batch)
+                partition.scanned += len(batch)
+                partition.cursor_date, partition.cursor_id = batch[-1].publication_date, batch[-1].id
+                await self.db.commit()
+            
+            partition.status = "done"
+            partition.finished_at = datetime.utcnow()
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            await self._fail(partition_id, repr(e))
+            raise
+        
+        return partition
+    
+    async def candidate_filter(self, keywords: List[str]):
+        """
+        Condição que pré-seleciona pelo índice GIN as publicações que podem
+        conter alguma palavra-chave (a confirmação fica com o matcher), ou
+        None se alguma palavra não gera consulta (ex.: só stopwords) e a
+        fatia precisa ser percorrida inteira
+        """
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        queries = [func.phraseto_tsquery(config, keyword) for keyword in keywords]
+        if not queries:
+            return None
+        
+        sizes = (await self.db.execute(select(*(func.numnode(query) for query in queries)))).one()
+        if not all(sizes):
+            return None
+        return or_(*(Publication.search_vector.op('@@')(query) for query in queries))
+    
+    async def progress(self, backfill_id: uuid.UUID) -> BackfillProgress | None:
+        """Andamento do backfill (status, fatias, publicações verificadas e casamentos)"""
+        backfill = await self.db.get(MonitorBackfill, backfill_id)
+        if backfill is None:
+            return None
+        
+        result = await self.db.execute(
+            select(MonitorBackfillPartition).where(MonitorBackfillPartition.backfill_id == backfill_id)
+        )
+        partitions = result.scalars().all()
+        statuses = [partition.status for partition in partitions]
+        started = [partition.started_at for partition in partitions if partition.started_at]
+        stale_before = self._stale_before()
+        running = [partition for partition in partitions if partition.status == "running"]
+        
+        if statuses and all(status == "done" for status in statuses):
+            status = "done"
+        elif any(partition.updated_at >= stale_before for partition in running):
+            status = "running"
+        elif running:
+            status = "stalled"
+        elif "failed" in statuses:
+            status = "failed"
+        else:
+            status = "running" if started else "pending"
+        
+        return BackfillProgress(
+            backfill=backfill,
+            status=status,
+            partitions_total=len(partitions),
+            partitions_done=statuses.count("done"),
+            partitions_failed=statuses.count("failed"),
+            scanned=sum(partition.scanned for partition in partitions),
+            matches=sum(partition.matches for partition in partitions),
+            started_at=min(started) if started else None,
+            finished_at=max(partition.finished_at for partition in partitions) if status == "done" else None
+        )
+    
+    def _stale_before(self) -> datetime:
+        """Checkpoints anteriores a este instante são de fatias paradas"""
+        return datetime.utcnow() - timedelta(seconds=settings.MONITOR_BACKFILL_STALE_AFTER)
+    
+    def _claimable(self):
+        """Condição das fatias que uma task pode reivindicar: pendentes, com falha ou paradas"""
+        return or_(
+            MonitorBackfillPartition.status.in_(("pending", "failed")),
+            and_(
+                MonitorBackfillPartition.status == "running",
+                MonitorBackfillPartition.updated_at < self._stale_before()
+            )
+        )
+    
+    async def _save_matches(self, monitor_id: uuid.UUID, matcher: MonitorMatcher, batch) -> int:
+        """Grava os casamentos do lote (os já existentes são ignorados); retorna quantos entraram"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "monitor_id": monitor_id,
+                "publication_id": row.id,
+                "tribunal": row.tribunal,
+                "publication_date": row.publication_date,
+                "keywords": keywords,
+                "created_at": now,
+            }
+            for row in batch
+            for keywords in matcher.match(row.tribunal, row.content).values()
+        ]
+        if not rows:
+            return 0
+        
+        result = await self.db.execute(
+            pg_insert(MonitorMatch).values(rows).on_conflict_do_nothing().returning(MonitorMatch.id)
+        )
+        return len(result.scalars().all())
+    
+    async def _fail(self, partition_id: uuid.UUID, error: str) -> None:
+        await self.db.execute(
+            update(MonitorBackfillPartition)
+            .where(MonitorBackfillPartition.id == partition_id)
+            .values(status="failed", error=error, updated_at=datetime.utcnow())
+        )
+        await self.db.commit()
@@ -0,0 +1,128 @@
+"""Codecs de serialização dos valores do cache (JSON, orjson ou msgpack, com zstd opcional)"""
+import json
+from datetime import date, datetime
+from typing import Any
+from app.config import get_settings
+
+settings = get_settings()
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    ZSTD_AVAILABLE = False
+
+# Cabeçalho de 2 bytes: formato (j/o/m) + compressão (z = zstd, - = nenhuma).
+# A leitura se guia pelo cabeçalho, então trocar CACHE_CODEC não invalida
+# o que já está gravado.
+_UNCOMPRESSED = b"-"
+_ZSTD = b"z"
+
+
+def _to_builtin(value: Any) -> str:
+    """Fallback para tipos sem representação nativa (datas em ISO, o resto como str)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class CacheCodec:
+    """Serializa valores do cache em bytes, comprimindo com zstd a partir de compress_threshold"""
+    name = "json"
+    tag = b"j"
+    
+    def __init__(self, compress_threshold: int | None = None, compress_level: int | None = None):
+        self.compress_threshold = (
+            settings.CACHE_COMPRESS_THRESHOLD if compress_threshold is None else compress_threshold
+        )
+        level = settings.CACHE_COMPRESS_LEVEL if compress_level is None else compress_level
+        self._compressor = zstandard.ZstdCompressor(level=level) if ZSTD_AVAILABLE else None
+    
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_to_builtin, separators=(",", ":")).encode()
+    
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return json.loads(data)
+    
+    def encode(self, value: Any) -> bytes:
+        """Valor -> bytes com cabeçalho"""
+        payload = self.dumps(value)
+        if self._compressor is not None and 0 <= self.compress_threshold <= len(payload):
+            return self.tag + _ZSTD + self._compressor.compress(payload)
+        return self.tag + _UNCOMPRESSED + payload
+    
+    def decode(self, data: bytes) -> Any:
+        """Bytes com cabeçalho (de qualquer codec registrado) -> valor"""
+        codec = _DECODERS.get(data[:1])
+        if codec is None:
+            raise ValueError(f"Formato de cache desconhecido: {data[:2]!r}")
+        
+        payload = data[2:]
+        if data[1:2] == _ZSTD:
+            payload = _decompress(payload)
+        return codec(payload)
+
+
+class OrjsonCodec(CacheCodec):
+    """JSON via orjson (datas e UUIDs nativos)"""
+    name = "orjson"
+    tag = b"o"
+    
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_to_builtin, option=orjson.OPT_NON_STR_KEYS)
+    
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(CacheCodec):
+    """MessagePack binário"""
+    name = "msgpack"
+    tag = b"m"
+    
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_to_builtin, use_bin_type=True, datetime=False)
+    
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _decompress(payload: bytes) -> bytes:
+    if not ZSTD_AVAILABLE:
+        raise ValueError("Valor em cache comprimido com zstd, mas o pacote zstandard não está instalado")
+    return _decompressor.decompress(payload)
+
+
+# Frames de ZstdCompressor.compress trazem o tamanho original
+_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+CODECS = {
+    CacheCodec.name: (CacheCodec, True),
+    OrjsonCodec.name: (OrjsonCodec, ORJSON_AVAILABLE),
+    MsgpackCodec.name: (MsgpackCodec, MSGPACK_AVAILABLE),
+}
+
+_DECODERS = {codec.tag: codec.loads for codec, available in CODECS.values() if available}
+
+
+def get_codec(name: str | None = None, **kwargs) -> CacheCodec:
+    """Codec pelo nome (padrão: CACHE_CODEC); sem o pacote instalado, cai para JSON"""
+    codec_class, available = CODECS.get(name or settings.CACHE_CODEC, (CacheCodec, True))
+    if not available:
+        codec_class = CacheCodec
+    return codec_class(**kwargs)
@@ -1,85 +1,573 @@
+import asyncio
+import hashlib
 import json
-from typing import Any, Optional
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable, Iterable, Optional
 from redis import asyncio as aioredis
+from redis.exceptions import WatchError
 from app.config import get_settings
+from app.services.cache_codec import CacheCodec, get_codec
+from app.services.local_cache import LocalCache
 
 settings = get_settings()
 
+# Prefixo dos conjuntos de tag (tag:{<nome>} -> chaves que dependem dela) e
+# das versões das tags (tag:{<nome>}:v, incrementada a cada invalidação).
+# O hash tag {<nome>} põe conjunto e versão no mesmo slot do Redis Cluster
+TAG_PREFIX = "tag"
+
+# Validade das versões das tags: basta cobrir os cálculos em andamento
+TAG_VERSION_TTL = 24 * 60 * 60
+
+# Prefixo das travas de recálculo entre processos (lock:<chave>)
+LOCK_PREFIX = "lock"
+
+# Canal pub/sub com as chaves invalidadas (lista JSON), para a camada local
+# de todos os processos
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+def tribunal_tag(tribunal: str | None) -> str:
+    """Tag de dados de um tribunal; None = consulta sobre todos os tribunais"""
+    return f"tribunal:{tribunal or '*'}"
+
+
+def date_tag(publication_date: date) -> str:
+    """Tag de dados de uma data de publicação"""
+    return f"date:{publication_date.isoformat()}"
+
+
+def ingest_tags(tribunal: str, publication_date: date) -> list[str]:
+    """Tags invalidadas quando publicações novas de (tribunal, data) são gravadas"""
+    return [tribunal_tag(tribunal), tribunal_tag(None), date_tag(publication_date)]
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """Valor em cache com o custo do cálculo (delta, em segundos) e a expiração (epoch)"""
+    value: Any
+    delta: float
+    expires_at: float
+    
+    def should_refresh(self, beta: float) -> bool:
+        """
+        Recomputação antecipada probabilística (XFetch)
+        
+        Cada leitura decide recalcular com probabilidade crescente à medida
+        que a expiração se aproxima, proporcional ao custo do cálculo; assim
+        um único leitor costuma renovar a chave antes de ela expirar para
+        todos ao mesmo tempo.
+        """
+        if self.delta <= 0 or beta <= 0:
+            return False
+        return time.time() - self.delta * beta * math.log(1.0 - random.random()) >= self.expires_at
+
+
+@dataclass(slots=True)
+class WarmStats:
+    """Resultado de CacheService.warm"""
+    requested: int
+    cached: int
+    loaded: int
+    failed: list[str]
+    elapsed: float
+    load_time: float
+
+
 class CacheService:
-    """Service para gerenciamento de cache com Redis"""
+    """
+    Service para gerenciamento de cache com Redis
+    
+    Duas camadas: uma LRU em memória do processo (LOCAL_CACHE_SIZE
+    entradas por até LOCAL_CACHE_TTL segundos) na frente do Redis. Acertos
+    na camada local não saem do processo; invalidações são propagadas às
+    camadas locais dos demais processos pelo canal INVALIDATION_CHANNEL.
+    local_size=0 desliga a camada local (ex.: workers do Celery, que só
+    invalidam).
+    
+    No Redis os valores vão como bytes do codec (CACHE_CODEC, ver
+    app/services/cache_codec.py), comprimidos com zstd quando grandes.
+    Operações com várias chaves (get_many, set_many, delete_many, warm)
+    fazem uma única ida ao Redis.
+    """
     
-    def __init__(self):
+    def __init__(self, local_size: int | None = None, codec: CacheCodec | None = None):
         self.redis = None
         self.default_ttl = settings.CACHE_TTL
+        self.codec = codec or get_codec()
+        self.local = LocalCache(
+            settings.LOCAL_CACHE_SIZE if local_size is None else local_size,
+            settings.LOCAL_CACHE_TTL
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._listener: asyncio.Task | None = None
     
     async def connect(self):
-        """Conecta ao Redis"""
+        """Conecta ao Redis (e passa a ouvir invalidações, se há camada local)"""
         if not self.redis:
-            self.redis = await aioredis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            # Sem decode_responses: valores são bytes do codec; chaves
+            # lidas do Redis (tags, SCAN) são decodificadas onde usadas
+            self.redis = await aioredis.from_url(settings.REDIS_URL)
+        if self.local.max_size > 0 and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
     
     async def disconnect(self):
         """Desconecta do Redis"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
         if self.redis:
             await self.redis.close()
     
     async def get(self, key: str) -> Optional[Any]:
         """Busca valor no cache"""
-        await self.connect()
-        
-        try:
-            value = await self.redis.get(key)
-            if value:
-                return json.loads(value)
-            return None
-        except Exception as e:
-            print(f"Erro ao buscar cache: {e}")
-            return None
+        entry = await self._get_entry(key)
+        return entry.value if entry is not None else None
     
-    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """Define valor no cache"""
-        await self.connect()
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int = None,
+        tags: Iterable[str] = (),
+        delta: float = 0.0
+    ) -> bool:
+        """
+        Define valor no cache
         
-        try:
-            ttl = ttl or self.default_ttl
-            serialized = json.dumps(value, default=str)
-            await self.redis.setex(key, ttl, serialized)
-            return True
-        except Exception as e:
-            print(f"Erro ao definir cache: {e}")
-            return False
+        Com tags, a chave também entra no conjunto de cada tag, para ser
+        removida por invalidate_tags. Os conjuntos expiram junto com a
+        chave mais longa registrada neles. delta é o custo do cálculo do
+        valor, usado na recomputação antecipada de get_or_set.
+        """
+        return await self._store({key: (value, delta)}, ttl, tags)
+    
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Valores das chaves em cache (ausentes ficam de fora), com um único MGET"""
+        entries = await self._get_entries(keys)
+        return {key: entry.value for key, entry in entries.items()}
+    
+    async def set_many(
+        self,
+        values: dict[str, Any],
+        ttl: int = None,
+        tags: Iterable[str] = ()
+    ) -> bool:
+        """Define vários valores (mesmo TTL e tags) num único pipeline"""
+        return await self._store({key: (value, 0.0) for key, value in values.items()}, ttl, tags)
     
     async def delete(self, key: str) -> bool:
         """Remove valor do cache"""
+        return await self.delete_many(key) >= 0
+    
+    async def delete_many(self, *keys: str) -> int:
+        """Remove as chaves com um único UNLINK (liberação da memória fora da thread do Redis)"""
         await self.connect()
+        self.local.delete(*keys)
+        if not keys:
+            return 0
         
         try:
-            await self.redis.delete(key)
-            return True
+            removed = await self.redis.unlink(*keys)
+            await self._publish_invalidation(list(keys))
+            return removed
         except Exception as e:
             print(f"Erro ao deletar cache: {e}")
-            return False
+            return -1
     
-    async def delete_pattern(self, pattern: str) -> int:
-        """Remove múltiplas chaves por padrão"""
+    async def warm(
+        self,
+        loaders: dict[str, Callable[[], Awaitable[Any]]],
+        ttl: int = None,
+        tags: Iterable[str] = (),
+        force: bool = False
+    ) -> WarmStats:
+        """
+        Pré-aquece as chaves de loaders: um MGET descobre as que faltam,
+        os loaders delas rodam em paralelo e tudo é gravado num único
+        pipeline. force=True recalcula mesmo as que já estão em cache.
+        Loaders que falham não interrompem os demais (ficam em failed).
+        """
+        start = time.perf_counter()
+        tags = tuple(tags)
+        cached = {} if force else await self._get_entries(loaders)
+        missing = [key for key in loaders if key not in cached]
+        versions = await self._tag_versions(tags)
+        
+        async def timed(loader):
+            load_start = time.perf_counter()
+            value = await loader()
+            return value, time.perf_counter() - load_start
+        
+        load_start = time.perf_counter()
+        results = await asyncio.gather(*(timed(loaders[key]) for key in missing), return_exceptions=True)
+        load_time = time.perf_counter() - load_start
+        
+        loaded, failed = {}, []
+        for key, result in zip(missing, results):
+            if isinstance(result, BaseException):
+                print(f"Erro ao pré-aquecer cache {key}: {result!r}")
+                failed.append(key)
+            else:
+                loaded[key] = result
+        
+        if loaded:
+            await self._store(loaded, ttl, tags, versions)
+        
+        return WarmStats(
+            requested=len(loaders),
+            cached=len(cached),
+            loaded=len(loaded),
+            failed=failed,
+            elapsed=time.perf_counter() - start,
+            load_time=load_time
+        )
+    
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = None,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """
+        Read-through: devolve o valor em cache ou o calcula com loader e guarda
+        
+        Chamadas concorrentes para a mesma chave no processo compartilham um
+        único cálculo (single-flight); se quem calcula é cancelado, as que
+        aguardavam refazem a busca em vez de falhar. Entre processos, uma
+        trava no Redis faz os demais aguardarem o valor em vez de
+        recalcular. Perto da expiração, um leitor sorteado renova o valor
+        antecipadamente (CacheEntry.should_refresh) enquanto os outros
+        seguem com o atual.
+        """
+        beta = settings.CACHE_EARLY_REFRESH_BETA
+        entry = self.local.get(key)
+        if entry is not None and not entry.should_refresh(beta):
+            return entry.value
+        
+        flight = self._inflight.get(key)
+        if flight is not None:
+            # Renovação antecipada em curso: o valor atual ainda vale
+            if entry is not None:
+                return entry.value
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # Só o cálculo foi cancelado (ex.: o cliente de quem o
+                # iniciou desconectou): esta chamada segue por conta própria
+                if not flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get_or_set(key, loader, ttl, tags)
+        
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        try:
+            if entry is None:
+                entry = await self._get_remote_entry(key)
+            if entry is not None and not entry.should_refresh(beta):
+                value = entry.value
+            else:
+                value = await self._load(key, loader, ttl, tags, cold=entry is None)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # quem não aguardava não gera aviso de exceção não lida
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+    
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Remove todas as chaves registradas nas tags (sem SCAN)
+        
+        Para cada tag, uma transação incrementa a versão, lê os membros e
+        remove o conjunto (chaves do mesmo slot): nenhuma chave registrada
+        durante a invalidação escapa dela, e cálculos iniciados antes dela
+        não gravam o resultado (ver _store). Os membros são removidos em
+        seguida, com UNLINKs de uma chave em pipelines de até
+        CACHE_DELETE_BATCH.
+        """
         await self.connect()
+        batch_size = settings.CACHE_DELETE_BATCH
+        removed: dict[str, None] = {}
         
         try:
-            keys = []
-            async for key in self.redis.scan_iter(match=pattern):
-                keys.append(key)
+            for tag in tags:
+                tag_key, version_key = self.tag_key(tag), self.tag_version_key(tag)
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.incr(version_key)
+                    pipe.expire(version_key, TAG_VERSION_TTL)
+                    pipe.smembers(tag_key)
+                    pipe.unlink(tag_key)
+                    _, _, members, _ = await pipe.execute()
+                
+                keys = [key.decode() for key in members if key.decode() not in removed]
+                for start in range(0, len(keys), batch_size):
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for key in keys[start:start + batch_size]:
+                            pipe.unlink(key)
+                        await pipe.execute()
+                removed.update(dict.fromkeys(keys))
             
-            if keys:
-                await self.redis.delete(*keys)
-                return len(keys)
+            self.local.delete(*removed)
+            await self._publish_invalidation(list(removed))
+            return len(removed)
+        except Exception as e:
+            print(f"Erro ao invalidar tags: {e}")
             return 0
+    
+    async def delete_pattern(self, pattern: str, batch_size: int | None = None) -> int:
+        """
+        Remove múltiplas chaves por padrão
+        
+        As chaves são removidas com UNLINK em lotes de até batch_size
+        (padrão CACHE_DELETE_BATCH) à medida que o SCAN avança, sem acumular
+        o keyspace inteiro na memória nem bloquear o Redis com um DEL gigante.
+        """
+        await self.connect()
+        batch_size = batch_size or settings.CACHE_DELETE_BATCH
+        removed = 0
+        
+        try:
+            batch = []
+            async for key in self.redis.scan_iter(match=pattern, count=batch_size):
+                batch.append(key.decode())
+                if len(batch) >= batch_size:
+                    removed += await self._unlink_batch(batch)
+                    batch = []
+            if batch:
+                removed += await self._unlink_batch(batch)
+            return removed
         except Exception as e:
             print(f"Erro ao deletar por padrão: {e}")
             return 0
     
     def cache_key(self, *args) -> str:
         """Gera chave de cache a partir de argumentos"""
-        return ":".join(str(arg) for arg in args)
\ No newline at end of file
+        return ":".join(str(arg) for arg in args)
+    
+    def query_key(self, namespace: str, params: dict[str, Any]) -> str:
+        """Chave de cache de uma consulta: parâmetros normalizados (ordem e None ignorados)"""
+        normalized = {name: value for name, value in params.items() if value is not None}
+        digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+        return self.cache_key(namespace, digest)
+    
+    def tag_key(self, tag: str) -> str:
+        """Chave do conjunto de uma tag"""
+        return self.cache_key(TAG_PREFIX, f"{{{tag}}}")
+    
+    def tag_version_key(self, tag: str) -> str:
+        """Chave da versão de uma tag (mesmo slot do conjunto)"""
+        return self.cache_key(self.tag_key(tag), "v")
+    
+    async def _tag_versions(self, tags: Iterable[str]) -> dict[str, bytes | None] | None:
+        """Versões atuais das tags ({chave da versão: valor}), ou None se o Redis falhar"""
+        version_keys = [self.tag_version_key(tag) for tag in tags]
+        if not version_keys:
+            return {}
+        
+        await self.connect()
+        try:
+            # Um GET por chave num pipeline: as versões ficam em slots diferentes
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for version_key in version_keys:
+                    pipe.get(version_key)
+                return dict(zip(version_keys, await pipe.execute()))
+        except Exception as e:
+            print(f"Erro ao ler versões de tags: {e}")
+            return None
+    
+    async def _store(
+        self,
+        entries: dict[str, tuple[Any, float]],
+        ttl: int | None,
+        tags: Iterable[str],
+        versions: dict[str, bytes | None] | None = None
+    ) -> bool:
+        """
+        Grava {chave: (valor, delta)} nas duas camadas, num único pipeline
+        
+        versions são as versões das tags lidas antes de calcular os valores
+        (_tag_versions): se alguma tag foi invalidada desde então, os
+        valores podem estar desatualizados e nada é gravado.
+        """
+        if not entries:
+            # SADD sem membros seria rejeitado e derrubaria o pipeline inteiro
+            return True
+        await self.connect()
+        
+        ttl = ttl or self.default_ttl
+        expires_at = time.time() + ttl
+        stored = True
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if versions:
+                    # WATCH: uma invalidação até o EXEC descarta a transação
+                    await pipe.watch(*versions)
+                    for version_key, version in versions.items():
+                        if await pipe.get(version_key) != version:
+                            return False
+                    pipe.multi()
+                for key, (value, delta) in entries.items():
+                    pipe.setex(key, ttl, self.codec.encode({"v": value, "d": delta, "x": expires_at}))
+                for tag in tags:
+                    tag_key = self.tag_key(tag)
+                    pipe.sadd(tag_key, *entries)
+                    pipe.expire(tag_key, ttl, nx=True)
+                    pipe.expire(tag_key, ttl, gt=True)
+                await pipe.execute()
+        except WatchError:
+            return False
+        except Exception as e:
+            # Sem o Redis, a camada local ainda guarda os valores
+            print(f"Erro ao definir cache: {e}")
+            stored = False
+        
+        for key, (value, delta) in entries.items():
+            self.local.set(key, CacheEntry(value, delta, expires_at), ttl)
+        return stored
+    
+    async def _unlink_batch(self, keys: list[str]) -> int:
+        """UNLINK de um lote do SCAN, com invalidação das camadas locais"""
+        self.local.delete(*keys)
+        removed = await self.redis.unlink(*keys)
+        await self._publish_invalidation(keys)
+        return removed
+    
+    async def _get_entries(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        """Entradas das chaves: camada local e, para as que faltam, um único MGET"""
+        entries = {}
+        missing = []
+        for key in keys:
+            entry = self.local.get(key)
+            if entry is not None:
+                entries[key] = entry
+            else:
+                missing.append(key)
+        if not missing:
+            return entries
+        
+        await self.connect()
+        try:
+            values = await self.redis.mget(missing)
+        except Exception as e:
+            print(f"Erro ao buscar cache: {e}")
+            return entries
+        
+        now = time.time()
+        for key, raw in zip(missing, values):
+            if not raw:
+                continue
+            try:
+                entry = self._decode_entry(raw)
+            except Exception as e:
+                # Formato ilegível (ex.: gravado por versão antiga): tratado como ausente
+                print(f"Erro ao decodificar cache {key}: {e}")
+                continue
+            self.local.set(key, entry, entry.expires_at - now)
+            entries[key] = entry
+        return entries
+    
+    def _decode_entry(self, raw: bytes) -> CacheEntry:
+        data = self.codec.decode(raw)
+        return CacheEntry(data["v"], data["d"], data["x"])
+    
+    async def _get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Entrada da camada local ou, na falta dela, do Redis"""
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry
+        return await self._get_remote_entry(key)
+    
+    async def _get_remote_entry(self, key: str) -> Optional[CacheEntry]:
+        """Entrada do Redis, que passa a alimentar a camada local"""
+        await self.connect()
+        
+        try:
+            raw = await self.redis.get(key)
+            if not raw:
+                return None
+            
+            entry = self._decode_entry(raw)
+            self.local.set(key, entry, entry.expires_at - time.time())
+            return entry
+        except Exception as e:
+            print(f"Erro ao buscar cache: {e}")
+            return None
+    
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int | None,
+        tags: Iterable[str],
+        cold: bool
+    ) -> Any:
+        """Calcula e guarda o valor; sem valor algum em cache, coordena com os outros processos"""
+        lock_key = self.cache_key(LOCK_PREFIX, key)
+        locked = False
+        tags = tuple(tags)
+        
+        if cold:
+            try:
+                locked = bool(await self.redis.set(lock_key, "1", nx=True, px=settings.CACHE_LOCK_TIMEOUT_MS))
+                if not locked:
+                    # Outro processo está calculando: aguarda o valor até o fim da trava
+                    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT_MS / 1000
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(0.05)
+                        entry = await self._get_entry(key)
+                        if entry is not None:
+                            return entry.value
+            except Exception as e:
+                print(f"Erro na trava de cache: {e}")
+        
+        try:
+            # Versões das tags antes do cálculo: uma invalidação durante ele
+            # impede que o valor calculado (talvez já desatualizado) seja gravado
+            versions = await self._tag_versions(tags)
+            start = time.perf_counter()
+            value = await loader()
+            await self._store({key: (value, time.perf_counter() - start)}, ttl, tags, versions)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.redis.delete(lock_key)
+                except Exception as e:
+                    print(f"Erro ao liberar trava de cache: {e}")
+    
+    async def _publish_invalidation(self, keys: list[str]) -> None:
+        """Avisa as camadas locais dos outros processos"""
+        if keys:
+            await self.redis.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+    
+    async def _listen_invalidations(self) -> None:
+        """Remove da camada local as chaves invalidadas por qualquer processo"""
+        backoff = 1
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Invalidações perdidas enquanto desconectado
+                    self.local.clear()
+                    backoff = 1
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local.delete(*json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Erro no canal de invalidação do cache: {e}")
+                self.local.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
@@ -0,0 +1,115 @@
+"""Estratégias de contagem do total das listagens (exata, estimada ou em cache)"""
+import json
+from dataclasses import dataclass
+from typing import Any, Literal
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.config import get_settings
+from app.services.cache_service import CacheService, tribunal_tag
+
+settings = get_settings()
+
+CountStrategy = Literal["exact", "estimated", "cached"]
+
+# Namespace das chaves de total em cache
+COUNT_KEY_PREFIX = "count"
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de um SELECT, com os mesmos parâmetros vinculados"""
+    inherit_cache = False
+    
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+@dataclass
+class TotalCount:
+    """Total de uma listagem e a estratégia efetivamente usada para obtê-lo"""
+    value: int
+    strategy: CountStrategy
+
+
+class CountService:
+    """
+    Calcula o total de registros de uma consulta de listagem
+    
+    - exact: COUNT(*) sobre a consulta filtrada
+    - estimated: pg_class.reltuples sem filtros, ou a estimativa de linhas
+      do planejador (EXPLAIN) com filtros; estimativas abaixo de
+      COUNT_EXACT_THRESHOLD são refeitas com COUNT(*), que nesse tamanho
+      é barato e as estimativas pequenas são as menos confiáveis
+    - cached: COUNT(*) guardado no Redis por assinatura de filtros, por
+      COUNT_CACHE_TTL segundos ou até a próxima ingestão do tribunal
+      (tag tribunal:<código>, ou tribunal:* sem filtro de tribunal)
+    """
+    
+    def __init__(self, db: AsyncSession, cache: CacheService | None = None):
+        self.db = db
+        self.cache = cache
+    
+    async def count(
+        self,
+        query: Select,
+        strategy: CountStrategy,
+        signature: dict[str, Any],
+        tribunal: str | None = None
+    ) -> TotalCount:
+        """Total de query (sem ORDER BY/LIMIT) pela estratégia pedida"""
+        if strategy == "estimated":
+            estimate = await self.estimate(query)
+            if estimate >= settings.COUNT_EXACT_THRESHOLD:
+                return TotalCount(estimate, "estimated")
+        
+        elif strategy == "cached" and self.cache is not None:
+            counted = False
+            
+            async def load() -> int:
+                nonlocal counted
+                counted = True
+                return await self.exact(query)
+            
+            # Read-through: uma ingestão que invalida a tag durante o COUNT
+            # impede que o total anterior a ela seja guardado
+            total = await self.cache.get_or_set(
+                self.cache.query_key(COUNT_KEY_PREFIX, signature),
+                load,
+                ttl=settings.COUNT_CACHE_TTL,
+                tags=[tribunal_tag(tribunal)]
+            )
+            return TotalCount(int(total), "exact" if counted else "cached")
+        
+        return TotalCount(await self.exact(query), "exact")
+    
+    async def exact(self, query: Select) -> int:
+        """COUNT(*) sobre a consulta filtrada"""
+        return await self.db.scalar(select(func.count()).select_from(query.subquery())) or 0
+    
+    async def estimate(self, query: Select) -> int:
+        """Estimativa de linhas: reltuples da tabela sem filtros, senão o plano do EXPLAIN"""
+        froms = query.get_final_froms()
+        if query.whereclause is None and len(froms) == 1 and hasattr(froms[0], "name"):
+            # Tabela particionada: soma das partições (a mãe não tem reltuples)
+            reltuples = await self.db.scalar(
+                text("""
+                    SELECT CASE WHEN max(reltuples) >= 0 THEN sum(greatest(reltuples, 0)) END
+                    FROM pg_class
+                    WHERE oid IN (SELECT relid FROM pg_partition_tree(to_regclass(:name)) WHERE isleaf)
+                """),
+                {"name": froms[0].name}
+            )
+            # -1 (ou ausente): tabela ainda sem ANALYZE
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+        
+        plan = (await self.db.execute(Explain(query))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,130 @@
+"""Pré-filtro de publicações já gravadas: filtros de Bloom por tribunal e dia"""
+import math
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, List
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.publication import Publication
+
+settings = get_settings()
+
+# Capacidade mínima de um filtro (dias com poucas publicações ainda recebem inserções)
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre impressões digitais (content_fingerprint)
+    
+    As impressões já são hashes uniformes: as k posições saem por hashing
+    duplo das duas metades de 8 bytes, sem recalcular hash algum.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def add(self, fingerprint: bytes) -> None:
+        for position in self._positions(fingerprint):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(fingerprint))
+    
+    @property
+    def full(self) -> bool:
+        """Passou da capacidade (a taxa de falsos positivos sobe além da configurada)"""
+        return self.count > self.capacity
+    
+    def _positions(self, fingerprint: bytes) -> Iterable[int]:
+        first = int.from_bytes(fingerprint[:8], "little")
+        second = int.from_bytes(fingerprint[8:16], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+class SeenPublications:
+    """
+    Impressões já gravadas por (tribunal, dia), mantidas no processo do worker
+    
+    O filtro de um dia é montado na primeira vez que aparece (uma consulta
+    só de content_hash, servida pelo índice uq_pub_content_hash) e depois
+    recebe as impressões inseridas. Ausência no filtro é certeza: a linha
+    vai direto para o INSERT. Presença pode ser falso positivo, então as
+    candidatas a duplicata do lote são confirmadas numa única consulta
+    antes de descartadas. Reprocessar um dia inteiro custa uma consulta
+    por bloco em vez de um INSERT que o banco rejeitaria linha a linha.
+    Guarda até DEDUP_FILTER_DAYS dias, descartando os menos usados.
+    """
+    
+    def __init__(self, max_days: int | None = None, error_rate: float | None = None):
+        self.max_days = settings.DEDUP_FILTER_DAYS if max_days is None else max_days
+        self.error_rate = settings.DEDUP_FILTER_ERROR_RATE if error_rate is None else error_rate
+        self._filters: OrderedDict[tuple[str, date], BloomFilter] = OrderedDict()
+    
+    async def filter_new(self, db: AsyncSession, rows: List[dict]) -> List[dict]:
+        """Linhas (de PublicationService._to_row) ainda não gravadas, sem repetições dentro do lote"""
+        candidates = []
+        unique = []
+        batch = set()
+        for row in rows:
+            key = (row["tribunal"], row["publication_date"], row["content_hash"])
+            if key in batch:
+                continue
+            batch.add(key)
+            unique.append(row)
+            if row["content_hash"] in await self._filter(db, row["tribunal"], row["publication_date"]):
+                candidates.append(key)
+        
+        if not candidates:
+            return unique
+        
+        result = await db.execute(
+            select(Publication.tribunal, Publication.publication_date, Publication.content_hash)
+            .where(tuple_(Publication.tribunal, Publication.publication_date, Publication.content_hash).in_(candidates))
+        )
+        known = set(result.tuples())
+        return [
+            row for row in unique
+            if (row["tribunal"], row["publication_date"], row["content_hash"]) not in known
+        ]
+    
+    def add(self, rows: Iterable[dict]) -> None:
+        """Registra linhas gravadas nos filtros já carregados"""
+        for row in rows:
+            key = (row["tribunal"], row["publication_date"])
+            bloom = self._filters.get(key)
+            if bloom is None:
+                continue
+            bloom.add(row["content_hash"])
+            if bloom.full:
+                # Remontado do banco, com mais capacidade, no próximo uso
+                del self._filters[key]
+    
+    async def _filter(self, db: AsyncSession, tribunal: str, publication_date: date) -> BloomFilter:
+        key = (tribunal, publication_date)
+        bloom = self._filters.get(key)
+        if bloom is not None:
+            self._filters.move_to_end(key)
+            return bloom
+        
+        result = await db.execute(
+            select(Publication.content_hash).where(
+                Publication.tribunal == tribunal,
+                Publication.publication_date == publication_date
+            )
+        )
+        fingerprints = result.scalars().all()
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * len(fingerprints)), self.error_rate)
+        for fingerprint in fingerprints:
+            bloom.add(fingerprint)
+        
+        self._filters[key] = bloom
+        while len(self._filters) > self.max_days:
+            self._filters.popitem(last=False)
+        return bloom
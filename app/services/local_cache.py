@@ -0,0 +1,57 @@
+"""Camada de cache em memória do processo (LRU com TTL por entrada)"""
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LocalCache:
+    """
+    Cache LRU em memória, limitado a max_size entradas, com TTL por entrada
+    
+    Não é thread-safe: feito para ser usado de um único event loop (um por
+    worker do uvicorn). Expirações são verificadas na leitura; o LRU
+    descarta as entradas menos usadas quando o limite é atingido.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Valor da chave, ou None se ausente/expirada"""
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        """Guarda o valor por até ttl segundos (limitado ao TTL da camada)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.max_size <= 0 or ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def delete(self, *keys: str) -> None:
+        """Remove as chaves (ausentes são ignoradas)"""
+        for key in keys:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Esvazia a camada"""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
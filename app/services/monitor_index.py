@@ -0,0 +1,210 @@
+"""Índice versionado dos monitoramentos: deltas e snapshot serializado no Redis"""
+import gc
+import json
+import pickle
+import time
+import uuid
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.services.cache_codec import ZSTD_AVAILABLE
+from app.services.monitor_matcher import MonitorMatcher
+
+settings = get_settings()
+
+if ZSTD_AVAILABLE:
+    import zstandard
+
+# Contador de versões, log de alterações (sorted set por versão) e snapshot
+INDEX_VERSION_KEY = "monitors:index:version"
+INDEX_CHANGES_KEY = "monitors:index:changes"
+INDEX_SNAPSHOT_KEY = "monitors:index:snapshot"
+INDEX_SNAPSHOT_VERSION_KEY = "monitors:index:snapshot:version"
+
+# Numera e registra a alteração atomicamente: quem lê as alterações acima
+# da sua versão nunca vê um buraco que depois seria preenchido
+_PUBLISH_CHANGE_LUA = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('ZADD', KEYS[2], version, version .. ':' .. ARGV[1])
+return version
+"""
+
+# Grava o snapshot só se não for mais antigo que o atual (um processo
+# atrasado não desfaz o de outro) e descarta as alterações incorporadas
+_SAVE_SNAPSHOT_LUA = """
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+local version = tonumber(ARGV[2])
+if version < current then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], version)
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', version)
+return 1
+"""
+
+
+async def publish_monitor_change(
+    redis,
+    monitor_id: uuid.UUID,
+    keywords: list[str] | None = None,
+    tribunals: list[str] | None = None
+) -> int:
+    """
+    Registra a alteração de um monitoramento e retorna a nova versão do índice
+    
+    keywords=None remove o monitoramento (excluído ou inativo). Cada
+    alteração traz o estado completo, então reaplicá-la é inofensivo.
+    Deve ser chamada depois do commit no banco.
+    """
+    change = {"id": str(monitor_id), "keywords": keywords, "tribunals": tribunals}
+    script = redis.register_script(_PUBLISH_CHANGE_LUA)
+    return int(await script(keys=[INDEX_VERSION_KEY, INDEX_CHANGES_KEY], args=[json.dumps(change)]))
+
+
+class MonitorIndex:
+    """
+    Matcher do processo mantido em dia com o índice versionado do Redis
+    
+    refresh aplica ao matcher atual só as alterações publicadas depois da
+    versão dele (MonitorMatcher.upsert/remove, sem recompilar tudo). Sem
+    matcher no processo, ou quando as alterações necessárias já foram
+    descartadas, carrega o snapshot serializado (pickle dos autômatos já
+    compilados, comprimido) em vez de recompilar; sem snapshot, monta a
+    partir do banco e grava um. A troca para um matcher carregado é uma
+    atribuição: a ingestão em curso segue com o anterior até pedir o
+    próximo. A cada MONITOR_SNAPSHOT_EVERY versões, refresh regrava o
+    snapshot, o que também apaga do log as alterações já incorporadas.
+    
+    failures conta os refresh que falharam seguidos e refreshed_at marca
+    o último bem-sucedido: com falhas, o matcher do processo pode estar
+    desatualizado (ver stale_for).
+    
+    O snapshot é desserializado com pickle: o Redis precisa ser de
+    confiança (o mesmo do broker do Celery).
+    """
+    
+    def __init__(self):
+        self.matcher: MonitorMatcher | None = None
+        self.failures = 0
+        self.refreshed_at: float | None = None
+    
+    @property
+    def stale_for(self) -> float | None:
+        """Segundos desde o último refresh bem-sucedido (None se nunca houve)"""
+        if self.refreshed_at is None:
+            return None
+        return time.monotonic() - self.refreshed_at
+    
+    async def refresh(self, redis, db: AsyncSession) -> MonitorMatcher:
+        """Matcher na versão mais recente do índice"""
+        try:
+            matcher = await self._refresh(redis, db)
+        except Exception:
+            self.failures += 1
+            raise
+        self.failures = 0
+        self.refreshed_at = time.monotonic()
+        return matcher
+    
+    async def _refresh(self, redis, db: AsyncSession) -> MonitorMatcher:
+        if self.matcher is None:
+            self.matcher = await self.load_snapshot(redis) or await self.rebuild(redis, db)
+        
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zrangebyscore(INDEX_CHANGES_KEY, f"({self.matcher.version}", "+inf")
+            pipe.get(INDEX_VERSION_KEY)
+            pipe.get(INDEX_SNAPSHOT_VERSION_KEY)
+            raw, current_version, snapshot_version = await pipe.execute()
+        
+        changes = [_parse_change(member) for member in raw]
+        if int(current_version or 0) < self.matcher.version:
+            # Contador reiniciado (Redis limpo): versões antigas não valem mais
+            self.matcher = await self.rebuild(redis, db)
+            return self.matcher
+        
+        first = changes[0][0] if changes else int(current_version or 0) + 1
+        if int(snapshot_version or 0) > self.matcher.version or first != self.matcher.version + 1:
+            # Alterações já incorporadas ao snapshot e descartadas do log
+            snapshot = await self.load_snapshot(redis)
+            if snapshot is None or snapshot.version < first - 1:
+                snapshot = await self.rebuild(redis, db)
+            self.matcher = snapshot
+            return await self._refresh(redis, db)
+        
+        for version, change in changes:
+            if change["keywords"] is None:
+                self.matcher.remove(uuid.UUID(change["id"]))
+            else:
+                self.matcher.upsert(uuid.UUID(change["id"]), change["keywords"], change["tribunals"])
+            self.matcher.version = version
+        
+        if self.matcher.version - int(snapshot_version or 0) >= settings.MONITOR_SNAPSHOT_EVERY:
+            await self.save_snapshot(redis, self.matcher)
+        return self.matcher
+    
+    async def rebuild(self, redis, db: AsyncSession, bump: bool = False) -> MonitorMatcher:
+        """
+        Monta o matcher a partir do banco e grava o snapshot
+        
+        A versão é lida antes da consulta: alterações posteriores a ela
+        são reaplicadas por refresh (idempotentes). bump=True reserva uma
+        versão nova para o snapshot, e todo processo, mesmo já na versão
+        atual, troca o seu matcher pelo remontado: corrige alterações que
+        chegaram ao banco mas cuja publicação no Redis falhou.
+        """
+        if bump:
+            version = int(await redis.incr(INDEX_VERSION_KEY))
+        else:
+            version = int(await redis.get(INDEX_VERSION_KEY) or 0)
+        matcher = await MonitorMatcher.load(db, version)
+        await self.save_snapshot(redis, matcher)
+        return matcher
+    
+    async def load_snapshot(self, redis) -> Optional[MonitorMatcher]:
+        """Matcher do snapshot gravado, se houver"""
+        data = await redis.get(INDEX_SNAPSHOT_KEY)
+        if not data:
+            return None
+        try:
+            # Sem coleta de lixo durante o unpickle das centenas de milhares
+            # de objetos do snapshot (o dobro do tempo com ela)
+            gc.disable()
+            try:
+                return pickle.loads(_unpack(data))
+            finally:
+                gc.enable()
+        except Exception as e:
+            print(f"Erro ao carregar snapshot do índice de monitoramentos: {e}")
+            return None
+    
+    async def save_snapshot(self, redis, matcher: MonitorMatcher) -> bool:
+        """Compila todos os autômatos e grava o snapshot (False se já havia um mais novo)"""
+        matcher.compile()
+        data = _pack(pickle.dumps(matcher, protocol=pickle.HIGHEST_PROTOCOL))
+        script = redis.register_script(_SAVE_SNAPSHOT_LUA)
+        return bool(await script(
+            keys=[INDEX_SNAPSHOT_KEY, INDEX_SNAPSHOT_VERSION_KEY, INDEX_CHANGES_KEY],
+            args=[data, matcher.version]
+        ))
+
+
+def _parse_change(member: bytes | str) -> tuple[int, dict]:
+    """Membro "<versão>:<json>" do log de alterações"""
+    if isinstance(member, bytes):
+        member = member.decode()
+    version, change = member.split(":", 1)
+    return int(version), json.loads(change)
+
+
+def _pack(data: bytes) -> bytes:
+    """Snapshot comprimido com zstd quando disponível (1º byte: z ou -)"""
+    if ZSTD_AVAILABLE:
+        return b"z" + zstandard.ZstdCompressor(level=settings.CACHE_COMPRESS_LEVEL).compress(data)
+    return b"-" + data
+
+
+def _unpack(data: bytes) -> bytes:
+    if data[:1] == b"z":
+        return zstandard.ZstdDecompressor().decompress(data[1:])
+    return data[1:]
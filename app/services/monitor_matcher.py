@@ -0,0 +1,221 @@
+"""Casamento de monitoramentos com publicações via autômato de Aho-Corasick"""
+import uuid
+from typing import Iterable
+import ahocorasick
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.publication import Monitor
+from app.utils.text import fold_text
+
+# Chave dos monitoramentos sem filtro de tribunal
+ALL_TRIBUNALS = "*"
+
+# Alterações acumuladas num tribunal (palavras no delta + monitoramentos
+# removidos ou trocados) a partir das quais o autômato base é refeito:
+# o maior entre COMPACT_MIN e 1/COMPACT_RATIO das palavras da base
+COMPACT_MIN = 256
+COMPACT_RATIO = 8
+
+# Entrada do autômato: (monitor_id.int, palavra original, geração do
+# monitoramento). Internamente os ids são inteiros, que o pickle do
+# snapshot serializa e carrega muito mais rápido que objetos UUID
+Owner = tuple[int, str, int]
+
+# Autômato (STORE_INTS: valor = posição na tabela) e tabela de (tamanho, entradas)
+Compiled = tuple[ahocorasick.Automaton, list[tuple[int, tuple[Owner, ...]]]]
+
+
+class MonitorMatcher:
+    """
+    Casa as palavras-chave de todos os monitoramentos ativos com textos
+    
+    As palavras-chave são normalizadas com fold_text (sem acentos e
+    minúsculas) e compiladas num autômato de Aho-Corasick por tribunal,
+    com as dos monitoramentos daquele tribunal e as dos que valem para
+    todos. Cada texto é percorrido uma única vez, com custo proporcional
+    ao tamanho do texto e ao número de ocorrências, e não ao número de
+    palavras-chave. Só contam ocorrências de palavra inteira.
+    
+    Alterações (upsert/remove) não recompilam tudo: palavras novas vão
+    para um autômato delta pequeno do tribunal, percorrido junto com o
+    base, e entradas de monitoramentos removidos ou alterados ficam no
+    base até a próxima compactação, descartadas na leitura pela geração.
+    O base de um tribunal só é refeito quando as alterações acumuladas
+    passam de COMPACT_MIN ou de 1/COMPACT_RATIO do seu tamanho. Autômatos
+    são montados sob demanda (ou todos de uma vez com compile). version
+    é a versão do índice (ver app/services/monitor_index.py).
+    """
+    
+    def __init__(self, monitors: Iterable[tuple[uuid.UUID, list[str], list[str] | None]] = (), version: int = 0):
+        self.version = version
+        self._monitors: dict[int, tuple[list[str], list[str] | None, int]] = {}
+        self._next_generation = 0
+        # escopo (tribunal ou ALL_TRIBUNALS) -> palavra normalizada -> entradas atuais
+        self._keywords: dict[str, dict[str, list[Owner]]] = {}
+        # Por escopo compilado: base, palavras e alterações desde ele, delta
+        self._automata: dict[str, Compiled | None] = {}
+        self._base_size: dict[str, int] = {}
+        self._changes: dict[str, int] = {}
+        self._delta: dict[str, dict[str, list[Owner]]] = {}
+        self._delta_automata: dict[str, Compiled | None] = {}
+        # monitor_id.int -> UUID dos monitoramentos já devolvidos por match
+        self._uuids: dict[int, uuid.UUID] = {}
+        
+        for monitor_id, keywords, tribunals in monitors:
+            self.upsert(monitor_id, keywords, tribunals)
+    
+    @classmethod
+    async def load(cls, db: AsyncSession, version: int = 0) -> "MonitorMatcher":
+        """Matcher com os monitoramentos ativos no momento"""
+        result = await db.execute(
+            select(Monitor.id, Monitor.keywords, Monitor.tribunals).where(Monitor.active.is_(True))
+        )
+        return cls(result.tuples(), version)
+    
+    @property
+    def monitor_count(self) -> int:
+        return len(self._monitors)
+    
+    def upsert(self, monitor_id: uuid.UUID, keywords: list[str], tribunals: list[str] | None) -> None:
+        """Inclui ou substitui as palavras-chave de um monitoramento"""
+        self.remove(monitor_id)
+        key = monitor_id.int
+        generation = self._next_generation
+        self._next_generation += 1
+        self._monitors[key] = (keywords, tribunals, generation)
+        
+        for scope in tribunals or (ALL_TRIBUNALS,):
+            by_keyword = self._keywords.setdefault(scope, {})
+            # Bases já compiladas que contêm este escopo recebem a palavra no delta
+            compiled = [name for name in self._automata if scope in (name, ALL_TRIBUNALS)]
+            for keyword in keywords:
+                folded = fold_text(keyword)
+                if not folded:
+                    continue
+                owner = (key, keyword, generation)
+                by_keyword.setdefault(folded, []).append(owner)
+                for name in compiled:
+                    self._delta.setdefault(name, {}).setdefault(folded, []).append(owner)
+                    self._changes[name] += 1
+                    self._delta_automata.pop(name, None)
+    
+    def remove(self, monitor_id: uuid.UUID) -> None:
+        """Remove um monitoramento (ausente é ignorado)"""
+        key = monitor_id.int
+        monitor = self._monitors.pop(key, None)
+        if monitor is None:
+            return
+        
+        keywords, tribunals, _ = monitor
+        for scope in tribunals or (ALL_TRIBUNALS,):
+            folded_keywords = {fold_text(keyword) for keyword in keywords}
+            sources = [self._keywords.get(scope, {})]
+            for name in self._automata:
+                if scope in (name, ALL_TRIBUNALS):
+                    sources.append(self._delta.get(name, {}))
+                    self._changes[name] += 1
+                    self._delta_automata.pop(name, None)
+            for source in sources:
+                for folded in folded_keywords:
+                    owners = [owner for owner in source.get(folded, ()) if owner[0] != key]
+                    if owners:
+                        source[folded] = owners
+                    else:
+                        source.pop(folded, None)
+    
+    def compile(self) -> None:
+        """Compila as bases de todos os escopos (ex.: antes de gravar um snapshot)"""
+        for scope in [ALL_TRIBUNALS, *self._keywords]:
+            self._compile(scope)
+    
+    def match(self, tribunal: str, text: str) -> dict[uuid.UUID, list[str]]:
+        """Monitoramentos com alguma palavra-chave no texto -> palavras encontradas"""
+        scope = self._scope(tribunal)
+        base = self._base(scope)
+        delta = self._delta_automaton(scope)
+        if base is None and delta is None:
+            return {}
+        
+        folded = fold_text(text)
+        hits: dict[int, list[str]] = {}
+        for compiled in (base, delta):
+            if compiled is not None:
+                self._scan(compiled, folded, hits)
+        return {self._uuid(key): keywords for key, keywords in hits.items()}
+    
+    def _scan(self, compiled: Compiled, folded: str, hits: dict[int, list[str]]) -> None:
+        automaton, table = compiled
+        size = len(folded)
+        for end, index in automaton.iter(folded):
+            length, owners = table[index]
+            start = end - length + 1
+            if (start > 0 and folded[start - 1].isalnum()) or (end + 1 < size and folded[end + 1].isalnum()):
+                continue
+            for key, keyword, generation in owners:
+                # Entradas de monitoramentos removidos/alterados desde a compilação
+                current = self._monitors.get(key)
+                if current is None or current[2] != generation:
+                    continue
+                keywords = hits.setdefault(key, [])
+                if keyword not in keywords:
+                    keywords.append(keyword)
+    
+    def _uuid(self, key: int) -> uuid.UUID:
+        monitor_id = self._uuids.get(key)
+        if monitor_id is None:
+            monitor_id = self._uuids[key] = uuid.UUID(int=key)
+        return monitor_id
+    
+    def _scope(self, tribunal: str) -> str:
+        """Tribunais sem monitoramentos próprios usam o autômato dos que valem para todos"""
+        return tribunal if tribunal in self._keywords else ALL_TRIBUNALS
+    
+    def _base(self, scope: str) -> Compiled | None:
+        """Autômato base do escopo, refeito quando o delta cresce demais"""
+        if scope not in self._automata:
+            return self._compile(scope)
+        if self._changes[scope] > max(COMPACT_MIN, self._base_size[scope] // COMPACT_RATIO):
+            return self._compile(scope)
+        return self._automata[scope]
+    
+    def _compile(self, scope: str) -> Compiled | None:
+        """Monta a base do escopo com as palavras atuais e zera o delta dele"""
+        merged: dict[str, list[Owner]] = {}
+        sources = [self._keywords.get(ALL_TRIBUNALS, {})]
+        if scope != ALL_TRIBUNALS:
+            sources.append(self._keywords.get(scope, {}))
+        for source in sources:
+            for folded, owners in source.items():
+                merged.setdefault(folded, []).extend(owners)
+        
+        self._automata[scope] = _build(merged)
+        self._base_size[scope] = len(merged)
+        self._changes[scope] = 0
+        self._delta.pop(scope, None)
+        self._delta_automata.pop(scope, None)
+        return self._automata[scope]
+    
+    def _delta_automaton(self, scope: str) -> Compiled | None:
+        if scope not in self._delta_automata:
+            self._delta_automata[scope] = _build(self._delta.get(scope, {}))
+        return self._delta_automata[scope]
+    
+    def __getstate__(self) -> dict:
+        # Deltas compilados e UUIDs são refeitos sob demanda após o carregamento
+        state = self.__dict__.copy()
+        state["_delta_automata"] = {}
+        state["_uuids"] = {}
+        return state
+
+
+def _build(keywords: dict[str, list[Owner]]) -> Compiled | None:
+    """Autômato das palavras e tabela de (tamanho, entradas); None se não há palavras"""
+    if not keywords:
+        return None
+    automaton = ahocorasick.Automaton(ahocorasick.STORE_INTS)
+    table = []
+    for folded, owners in keywords.items():
+        automaton.add_word(folded, len(table))
+        table.append((len(folded), tuple(owners)))
+    automaton.make_automaton()
+    return automaton, table
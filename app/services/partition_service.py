@@ -0,0 +1,99 @@
+"""Manutenção das partições mensais de publications"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app.models.publication import DEFAULT_PARTITION, Publication
+
+settings = get_settings()
+
+# Nome das partições criadas por create_publication_partition
+_PARTITION_NAME = re.compile(r"^publications_(\d{4})_(\d{2})$")
+
+
+@dataclass
+class PartitionInfo:
+    """Partição anexada a publications (month é None na partição padrão)"""
+    name: str
+    month: date | None
+    estimated_rows: int
+
+
+class PartitionService:
+    """
+    Partições mensais de publications (RANGE por publication_date)
+    
+    ensure cria com antecedência as partições dos próximos meses (a
+    partição padrão só recebe o que chega antes disso). detach_before
+    desanexa os meses antigos: a tabela do mês continua existindo, fora
+    das consultas, e pode ser arquivada ou removida. O rollup
+    tribunal_daily_stats mantém as contagens desses meses até um
+    StatsService.rebuild do período.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def ensure(self, months_ahead: int | None = None) -> List[str]:
+        """Garante as partições do mês atual e dos months_ahead seguintes"""
+        months_ahead = settings.PUBLICATION_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+        result = await self.db.execute(
+            text("SELECT ensure_publication_partitions(:months_ahead)"),
+            {"months_ahead": months_ahead}
+        )
+        names = list(result.scalars().all())
+        await self.db.commit()
+        return names
+    
+    async def partitions(self) -> List[PartitionInfo]:
+        """Partições anexadas, em ordem de mês (a padrão por último)"""
+        result = await self.db.execute(
+            text("""
+                SELECT child.relname, greatest(child.reltuples, 0)::bigint
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = to_regclass(:table)
+            """),
+            {"table": Publication.__tablename__}
+        )
+        partitions = [
+            PartitionInfo(name=name, month=_partition_month(name), estimated_rows=rows)
+            for name, rows in result.tuples()
+        ]
+        return sorted(partitions, key=lambda partition: partition.month or date.max)
+    
+    async def detach_before(self, before: date) -> List[str]:
+        """
+        Desanexa as partições dos meses inteiramente anteriores a before
+        
+        DETACH PARTITION CONCURRENTLY não é permitido com a partição
+        padrão, então cada mês sai num DETACH comum, em transação própria e
+        curta, com lock_timeout de PUBLICATION_DETACH_LOCK_TIMEOUT: se o
+        lock de publications não sai a tempo, o erro sobe sem deixar
+        consultas e ingestão enfileiradas atrás do ALTER TABLE, e os meses
+        restantes ficam para a próxima execução.
+        """
+        names = [
+            partition.name for partition in await self.partitions()
+            if partition.month is not None and partition.month < before.replace(day=1)
+        ]
+        await self.db.commit()
+        
+        lock_timeout = int(settings.PUBLICATION_DETACH_LOCK_TIMEOUT * 1000)
+        detached = []
+        for name in names:
+            await self.db.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}ms'"))
+            await self.db.execute(text(f'ALTER TABLE {Publication.__tablename__} DETACH PARTITION "{name}"'))
+            await self.db.commit()
+            detached.append(name)
+        return detached
+
+
+def _partition_month(name: str) -> date | None:
+    if name == DEFAULT_PARTITION:
+        return None
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
@@ -1,47 +1,401 @@
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from datetime import date
-from app.models.publication import Publication
+from dataclasses import dataclass
+from datetime import date, datetime
+import base64
+import json
+import re
+import uuid
+from app.config import get_settings
+from app.models.publication import Publication, PublicationStaging, MonitorMatch, PARTIES_SEPARATOR, SEARCH_CONFIG
+from app.scrapers.extraction import CNJ_REGEX
+from app.utils.text import content_fingerprint, fold_text
+from app.services.cache_service import CacheService
+from app.services.count_service import CountService, CountStrategy, TotalCount
+from app.services.dedup_service import SeenPublications
+from app.services.monitor_matcher import MonitorMatcher
+from app.services.stats_service import ROLLUP_UPSERT_SQL, StatsService
 from app.schemas.publication import PublicationCreate, PublicationFilter
 
+settings = get_settings()
+
+# Linhas por INSERT multi-row (12 colunas x 1000 linhas fica bem abaixo
+# do limite de 32767 parâmetros do protocolo do Postgres)
+BULK_CHUNK_SIZE = 1000
+
+# Colunas gravadas pelos caminhos de ingestão em lote (ordem do COPY)
+INGEST_COLUMNS = (
+    "id", "tribunal", "publication_date", "process_number", "content",
+    "parties", "publication_type", "parties_text", "content_hash", "scraped_at", "created_at", "updated_at",
+)
+
+_COLUMN_LIST = ", ".join(INGEST_COLUMNS)
+
+_CNJ_FULL = re.compile(CNJ_REGEX)
+
+# Merge único da staging para a tabela final, deduplicando pela chave
+# natural e pela impressão do conteúdo, somando as linhas inseridas ao rollup no mesmo comando
+_MERGE_STAGING_SQL = f"""
+    WITH inserted AS (
+        INSERT INTO {Publication.__tablename__} ({_COLUMN_LIST})
+        SELECT {_COLUMN_LIST}
+        FROM {PublicationStaging.__tablename__}
+        WHERE batch_id = $1
+        ON CONFLICT DO NOTHING
+        RETURNING id, tribunal, publication_date, scraped_at
+    ),
+    rollup AS ({ROLLUP_UPSERT_SQL.format(source="inserted")})
+    SELECT id FROM inserted
+"""
+
+# Colunas de monitor_matches gravadas na ingestão (ordem do COPY)
+MATCH_COLUMNS = ("id", "monitor_id", "publication_id", "tribunal", "publication_date", "keywords", "created_at")
+
+
+# Ordem estável da listagem; coincide com o índice idx_pub_keyset
+# (tribunal, publication_date, created_at, id) depois do filtro por tribunal
+# e com idx_pub_date_keyset (publication_date, created_at, id) sem ele
+KEYSET_ORDER = (
+    Publication.publication_date.desc(),
+    Publication.created_at.desc(),
+    Publication.id.desc(),
+)
+
+
+# Ordem da listagem de casamentos de um monitoramento: mais antigos
+# primeiro, para acompanhar novidades; coincide com idx_match_monitor_keyset
+MATCH_KEYSET_ORDER = (MonitorMatch.created_at, MonitorMatch.id)
+
+
+def _encode_position(position: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def _decode_position(cursor: str) -> list:
+    return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+
+def encode_cursor(pub: Publication) -> str:
+    """Cursor opaco apontando para depois de pub na ordem KEYSET_ORDER"""
+    return _encode_position([pub.publication_date.isoformat(), pub.created_at.isoformat(), str(pub.id)])
+
+
+def decode_cursor(cursor: str) -> tuple[date, datetime, uuid.UUID]:
+    """Posição (publication_date, created_at, id) de um cursor; ValueError se inválido"""
+    try:
+        publication_date, created_at, pub_id = _decode_position(cursor)
+        return date.fromisoformat(publication_date), datetime.fromisoformat(created_at), uuid.UUID(pub_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def keyset_after(position: tuple[date, datetime, uuid.UUID]):
+    """Condição de keyset: linhas depois de position na ordem KEYSET_ORDER"""
+    return tuple_(Publication.publication_date, Publication.created_at, Publication.id) < tuple_(*position)
+
+
+def encode_match_cursor(match: MonitorMatch) -> str:
+    """Cursor opaco apontando para depois de match na ordem MATCH_KEYSET_ORDER"""
+    return _encode_position([match.created_at.isoformat(), str(match.id)])
+
+
+def decode_match_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Posição (created_at, id) de um cursor de casamentos; ValueError se inválido"""
+    try:
+        created_at, match_id = _decode_position(cursor)
+        return datetime.fromisoformat(created_at), uuid.UUID(match_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def match_keyset_after(position: tuple[datetime, uuid.UUID]):
+    """Condição de keyset: casamentos depois de position na ordem MATCH_KEYSET_ORDER"""
+    return tuple_(MonitorMatch.created_at, MonitorMatch.id) > tuple_(*position)
+
+
+def _escape_like(value: str) -> str:
+    """Escapa os curingas de LIKE (\\, % e _) de um termo de busca"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class IngestResult:
+    """Resultado de uma ingestão em lote"""
+    received: int
+    inserted: int
+    mode: str  # "insert" ou "copy"
+    matches: int = 0  # casamentos com monitoramentos gravados
+    known: int = 0  # descartadas pelo pré-filtro (SeenPublications), sem ir ao INSERT
+    
+    @property
+    def skipped(self) -> int:
+        return self.received - self.inserted
+
+
 class PublicationService:
     """Service layer para operações de publicações"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: CacheService | None = None,
+        matcher: MonitorMatcher | None = None,
+        seen: SeenPublications | None = None
+    ):
         self.db = db
+        self.cache = cache
+        # Com matcher, a ingestão em lote grava em monitor_matches os
+        # casamentos das publicações inseridas, na mesma transação
+        self.matcher = matcher
+        # Com seen, ingest descarta antes do INSERT as já gravadas
+        self.seen = seen
     
     async def create_publication(self, pub: PublicationCreate) -> Publication:
         """Cria nova publicação"""
-        db_pub = Publication(**pub.model_dump())
+        db_pub = Publication(**pub.model_dump(), parties_text=self._parties_text(pub.parties))
         self.db.add(db_pub)
+        await self.db.flush()
+        await StatsService(self.db).record([(db_pub.tribunal, db_pub.publication_date, db_pub.scraped_at)])
         await self.db.commit()
         await self.db.refresh(db_pub)
         return db_pub
     
     async def bulk_create(self, publications: List[PublicationCreate]) -> int:
-        """Criação em lote com deduplicação"""
-        created = 0
-        for pub in publications:
-            # Check se já existe
-            existing = await self._check_duplicate(pub)
-            if not existing:
-                await self.create_publication(pub)
-                created += 1
+        """
+        Criação em lote com deduplicação
+        
+        Um INSERT ... ON CONFLICT DO NOTHING RETURNING id por bloco de
+        BULK_CHUNK_SIZE linhas, tudo numa única transação. Duplicatas
+        (pela chave natural uq_pub_natural_key ou pela impressão do
+        conteúdo uq_pub_content_hash) são ignoradas pelo banco.
+        
+        Retorna a quantidade de publicações efetivamente inseridas; as
+        ignoradas são len(publications) - retorno. As inseridas são somadas
+        ao rollup tribunal_daily_stats na mesma transação.
+        """
+        created, _, _ = await self._insert_rows([self._to_row(pub) for pub in publications])
+        return created
+    
+    async def _insert_rows(self, rows: List[dict]) -> tuple[int, int, set[uuid.UUID]]:
+        """INSERT em lote de linhas de _to_row; retorna (inseridas, casamentos, ids inseridos)"""
+        if not rows:
+            return 0, 0, set()
+        
+        inserted = []
+        try:
+            for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                stmt = (
+                    pg_insert(Publication)
+                    .values(rows[start:start + BULK_CHUNK_SIZE])
+                    .on_conflict_do_nothing()
+                    .returning(Publication.id, Publication.tribunal, Publication.publication_date, Publication.scraped_at)
+                )
+                result = await self.db.execute(stmt)
+                inserted.extend(result.tuples())
+            await StatsService(self.db).record(row[1:] for row in inserted)
+            
+            inserted_ids = {row[0] for row in inserted}
+            matches = self._match(rows, inserted_ids)
+            for start in range(0, len(matches), BULK_CHUNK_SIZE):
+                await self.db.execute(
+                    pg_insert(MonitorMatch)
+                    .values([dict(zip(MATCH_COLUMNS, match)) for match in matches[start:start + BULK_CHUNK_SIZE]])
+                    .on_conflict_do_nothing()
+                )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        return len(inserted), len(matches), inserted_ids
+    
+    async def copy_create(self, publications: List[PublicationCreate]) -> int:
+        """
+        Criação em lote via COPY para diários muito grandes
+        
+        Envia as linhas com copy_records_to_table (COPY binário do asyncpg)
+        para a tabela UNLOGGED publications_staging, marcadas com um
+        batch_id, e faz um único INSERT ... SELECT ... ON CONFLICT DO NOTHING
+        para publications, que também soma as inseridas ao rollup
+        tribunal_daily_stats. Tudo roda numa transação; as linhas de staging
+        do lote são removidas ao final.
+        
+        Retorna a quantidade de publicações efetivamente inseridas.
+        """
+        created, _, _ = await self._copy_rows([self._to_row(pub) for pub in publications])
         return created
     
+    async def _copy_rows(self, rows: List[dict]) -> tuple[int, int, set[uuid.UUID]]:
+        """COPY + merge de linhas de _to_row; retorna (inseridas, casamentos, ids inseridos)"""
+        if not rows:
+            return 0, 0, set()
+        
+        batch_id = uuid.uuid4()
+        records = [(batch_id, *(row[column] for column in INGEST_COLUMNS)) for row in rows]
+        
+        conn = await self.db.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        
+        try:
+            async with driver.transaction():
+                await driver.copy_records_to_table(
+                    PublicationStaging.__tablename__,
+                    records=records,
+                    columns=["batch_id", *INGEST_COLUMNS]
+                )
+                inserted = {record["id"] for record in await driver.fetch(_MERGE_STAGING_SQL, batch_id)}
+                await driver.execute(
+                    f"DELETE FROM {PublicationStaging.__tablename__} WHERE batch_id = $1",
+                    batch_id
+                )
+                matches = self._match(rows, inserted)
+                if matches:
+                    await driver.copy_records_to_table(
+                        MonitorMatch.__tablename__,
+                        records=matches,
+                        columns=list(MATCH_COLUMNS)
+                    )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        return len(inserted), len(matches), inserted
+    
+    async def ingest(self, publications: List[PublicationCreate]) -> IngestResult:
+        """
+        Ingestão em lote escolhendo INSERT multi-row ou COPY pelo tamanho do lote
+        
+        Com seen, as publicações já gravadas saem antes (ver
+        SeenPublications) e as inseridas entram nos filtros.
+        """
+        rows = [self._to_row(pub) for pub in publications]
+        if self.seen is not None:
+            rows = await self.seen.filter_new(self.db, rows)
+        
+        if len(rows) >= settings.COPY_INGEST_THRESHOLD:
+            mode = "copy"
+            created, matches, inserted = await self._copy_rows(rows)
+        else:
+            mode = "insert"
+            created, matches, inserted = await self._insert_rows(rows)
+        
+        if self.seen is not None:
+            self.seen.add(row for row in rows if row["id"] in inserted)
+        
+        return IngestResult(
+            received=len(publications),
+            inserted=created,
+            mode=mode,
+            matches=matches,
+            known=len(publications) - len(rows)
+        )
+    
+    def _match(self, rows: List[dict], inserted_ids: set[uuid.UUID]) -> List[tuple]:
+        """
+        Casamentos (na ordem de MATCH_COLUMNS) das linhas efetivamente
+        inseridas; os ids são gerados em _to_row, então o RETURNING id diz
+        quais linhas do lote entraram (duplicatas já casaram antes)
+        """
+        if self.matcher is None or not inserted_ids:
+            return []
+        
+        now = datetime.utcnow()
+        return [
+            (uuid.uuid4(), monitor_id, row["id"], row["tribunal"], row["publication_date"], keywords, now)
+            for row in rows
+            if row["id"] in inserted_ids
+            for monitor_id, keywords in self.matcher.match(row["tribunal"], row["content"]).items()
+        ]
+    
+    def _to_row(self, pub: PublicationCreate) -> dict:
+        """Converte schema em linha pronta para INSERT em lote"""
+        now = datetime.utcnow()
+        return {
+            "id": uuid.uuid4(),
+            **pub.model_dump(),
+            "parties_text": self._parties_text(pub.parties),
+            "content_hash": content_fingerprint(pub.content, pub.process_number),
+            "scraped_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+    
+    @staticmethod
+    def _parties_text(parties: List[str] | None) -> str | None:
+        """Partes normalizadas para a coluna parties_text (busca por trigramas)"""
+        if not parties:
+            return None
+        return PARTIES_SEPARATOR.join(fold_text(party) for party in parties)
+    
     async def _check_duplicate(self, pub: PublicationCreate) -> Publication | None:
-        """Verifica se publicação já existe"""
+        """
+        Verifica se publicação já existe, pela chave natural ou pela
+        impressão do conteúdo (a única que vale sem process_number:
+        comparação com NULL nunca casa)
+        """
+        same = Publication.content_hash == content_fingerprint(pub.content, pub.process_number)
+        if pub.process_number is not None:
+            same = or_(same, Publication.process_number == pub.process_number)
         query = select(Publication).where(
             and_(
                 Publication.tribunal == pub.tribunal,
                 Publication.publication_date == pub.publication_date,
-                Publication.process_number == pub.process_number
+                same
             )
-        )
+        ).limit(1)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    @staticmethod
+    def fulltext_search(search_query: str):
+        """
+        Condição e ranking de busca textual sobre Publication.search_vector
+        
+        O texto segue a sintaxe de websearch_to_tsquery ("frase exata",
+        OR, -termo) e é normalizado pela mesma configuração da coluna
+        (portuguese + unaccent), de modo que a condição usa o índice GIN
+        idx_pub_search_vector. Retorna (condição, expressão ts_rank).
+        """
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), search_query)
+        condition = Publication.search_vector.op('@@')(tsquery)
+        rank = func.ts_rank(Publication.search_vector, tsquery)
+        return condition, rank
+    
+    @staticmethod
+    def process_number_filter(process_number: str):
+        """
+        Condição de busca por número de processo
+        
+        Número CNJ completo (formatado ou só os 20 dígitos) vira igualdade,
+        servida pelo btree idx_pub_process; trechos vão por LIKE '%...%' no
+        índice de trigramas idx_pub_process_trgm.
+        """
+        value = process_number.strip()
+        if len(value) == 20 and value.isdigit():
+            value = f"{value[:7]}-{value[7:9]}.{value[9:13]}.{value[13]}.{value[14:16]}.{value[16:]}"
+        if _CNJ_FULL.fullmatch(value):
+            return Publication.process_number == value
+        return Publication.process_number.like(f"%{_escape_like(value)}%", escape="\\")
+    
+    @staticmethod
+    def party_filter(party: str):
+        """Condição de busca por nome de parte (sem acentos/caixa) no índice idx_pub_parties_trgm"""
+        return Publication.parties_text.like(f"%{_escape_like(fold_text(party))}%", escape="\\")
+    
+    async def count_publications(
+        self,
+        query,
+        strategy: CountStrategy,
+        signature: dict,
+        tribunal: str | None = None
+    ) -> TotalCount:
+        """Total de uma listagem filtrada pela estratégia escolhida (ver CountService)"""
+        return await CountService(self.db, self.cache).count(query, strategy, signature, tribunal)
+    
     async def get_publications(self, filters: PublicationFilter) -> tuple[List[Publication], int]:
         """Busca publicações com filtros e paginação"""
         
@@ -59,24 +413,40 @@ class PublicationService:
             conditions.append(Publication.publication_date <= filters.date_to)
         
         if filters.process_number:
-            conditions.append(Publication.process_number.ilike(f"%{filters.process_number}%"))
+            conditions.append(self.process_number_filter(filters.process_number))
         
+        if filters.party:
+            conditions.append(self.party_filter(filters.party))
+        
+        rank = None
         if filters.search_query:
-            conditions.append(Publication.content.ilike(f"%{filters.search_query}%"))
+            if filters.search_mode == "fulltext":
+                condition, rank = self.fulltext_search(filters.search_query)
+                conditions.append(condition)
+            else:
+                conditions.append(Publication.content.ilike(f"%{filters.search_query}%"))
         
         if conditions:
             query = query.where(and_(*conditions))
         
         # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.db.scalar(count_query)
+        signature = filters.model_dump(exclude={"page", "page_size", "count_strategy"})
+        total = await self.count_publications(
+            query,
+            filters.count_strategy or settings.COUNT_STRATEGY,
+            signature,
+            filters.tribunal
+        )
         
-        # Apply pagination
-        query = query.order_by(Publication.publication_date.desc())
+        # Apply pagination (busca textual: mais relevantes primeiro)
+        if rank is not None:
+            query = query.order_by(rank.desc(), *KEYSET_ORDER)
+        else:
+            query = query.order_by(*KEYSET_ORDER)
         query = query.offset((filters.page - 1) * filters.page_size)
         query = query.limit(filters.page_size)
         
         result = await self.db.execute(query)
         publications = result.scalars().all()
         
-        return list(publications), total or 0
\ No newline at end of file
+        return list(publications), total.value
\ No newline at end of file
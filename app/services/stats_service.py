@@ -0,0 +1,109 @@
+"""Rollup diário de publicações por tribunal (tribunal_daily_stats)"""
+from datetime import date, datetime
+from typing import Iterable
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.publication import Publication, TribunalDailyStats
+
+# Soma ao rollup as linhas de {source} (precisa ter tribunal,
+# publication_date e scraped_at); usado no merge da staging, no mesmo
+# comando que insere as publicações
+ROLLUP_UPSERT_SQL = f"""
+    INSERT INTO {TribunalDailyStats.__tablename__} AS stats
+        (publication_date, tribunal, total, last_scraped_at, updated_at)
+    SELECT publication_date, tribunal, count(*), max(scraped_at), now() AT TIME ZONE 'utc'
+    FROM {{source}}
+    GROUP BY publication_date, tribunal
+    ON CONFLICT (publication_date, tribunal) DO UPDATE SET
+        total = stats.total + excluded.total,
+        last_scraped_at = greatest(stats.last_scraped_at, excluded.last_scraped_at),
+        updated_at = excluded.updated_at
+"""
+
+
+class StatsService:
+    """
+    Manutenção do rollup tribunal_daily_stats
+    
+    record soma publicações recém-inseridas e deve rodar na mesma transação
+    do INSERT (quem chama faz o commit). rebuild recalcula um intervalo a
+    partir de publications, com o rollup travado contra as somas da
+    ingestão: uma ingestão concorrente ou termina antes (e é contada na
+    reconstrução) ou soma depois dela.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def record(self, rows: Iterable[tuple[str, date, datetime]]) -> None:
+        """Soma (tribunal, publication_date, scraped_at) de publicações inseridas ao rollup"""
+        totals: dict[tuple[date, str], list] = {}
+        for tribunal, publication_date, scraped_at in rows:
+            current = totals.setdefault((publication_date, tribunal), [0, scraped_at])
+            current[0] += 1
+            if scraped_at is not None and (current[1] is None or scraped_at > current[1]):
+                current[1] = scraped_at
+        if not totals:
+            return
+        
+        now = datetime.utcnow()
+        stmt = pg_insert(TribunalDailyStats).values([
+            {
+                "publication_date": publication_date,
+                "tribunal": tribunal,
+                "total": total,
+                "last_scraped_at": last_scraped_at,
+                "updated_at": now,
+            }
+            for (publication_date, tribunal), (total, last_scraped_at) in totals.items()
+        ])
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[TribunalDailyStats.publication_date, TribunalDailyStats.tribunal],
+            set_={
+                "total": TribunalDailyStats.total + stmt.excluded.total,
+                "last_scraped_at": func.greatest(TribunalDailyStats.last_scraped_at, stmt.excluded.last_scraped_at),
+                "updated_at": stmt.excluded.updated_at,
+            }
+        ))
+    
+    async def rebuild(
+        self,
+        since: date | None = None,
+        until: date | None = None,
+        tribunal: str | None = None
+    ) -> int:
+        """Recalcula o rollup do intervalo (None = sem limite); retorna quantos (data, tribunal) ficaram"""
+        def bounds(table) -> list:
+            conditions = []
+            if since is not None:
+                conditions.append(table.publication_date >= since)
+            if until is not None:
+                conditions.append(table.publication_date <= until)
+            if tribunal is not None:
+                conditions.append(table.tribunal == tribunal)
+            return conditions
+        
+        try:
+            await self.db.execute(text(f"LOCK TABLE {TribunalDailyStats.__tablename__} IN EXCLUSIVE MODE"))
+            await self.db.execute(delete(TribunalDailyStats).where(*bounds(TribunalDailyStats)))
+            result = await self.db.execute(
+                insert(TribunalDailyStats).from_select(
+                    ["publication_date", "tribunal", "total", "last_scraped_at", "updated_at"],
+                    select(
+                        Publication.publication_date,
+                        Publication.tribunal,
+                        func.count(),
+                        func.max(Publication.scraped_at),
+                        func.timezone("utc", func.now())
+                    )
+                    .where(*bounds(Publication))
+                    .group_by(Publication.publication_date, Publication.tribunal)
+                )
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        return result.rowcount
@@ -0,0 +1,26 @@
+"""Normalização de texto e impressão digital de publicações (busca, monitoramentos, deduplicação)"""
+import hashlib
+import unicodedata
+
+
+def fold_text(text: str) -> str:
+    """Normaliza texto para busca: minúsculas, sem acentos e com espaços simples"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.lower().split())
+
+
+def content_fingerprint(text: str, process_number: str | None = None) -> bytes:
+    """
+    Impressão digital para deduplicação: blake2b de 16 bytes do número do
+    processo e do texto normalizado por fold_text
+    
+    Republicações que só diferem em caixa, acentos ou quebras de linha dão
+    a mesma impressão; despachos padronizados idênticos em processos
+    diferentes não.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((process_number or "").encode())
+    digest.update(b"\0")
+    digest.update(fold_text(text).encode())
+    return digest.digest()
@@ -0,0 +1,13 @@
+"""Aplicação Celery compartilhada entre os workers e a API"""
+from celery import Celery
+from app.config import get_settings
+
+settings = get_settings()
+
+# A API só enfileira por nome (send_task), sem importar app.workers.tasks
+# e o que vem com ele (scrapers, índices e filtros do processo do worker)
+celery_app = Celery(
+    "judicial_worker",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL
+)
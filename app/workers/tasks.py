@@ -1,21 +1,64 @@
-from celery import Celery
+from celery import group
+from celery.signals import worker_process_shutdown
 from datetime import date, timedelta
+import uuid
+from typing import AsyncIterator
 import asyncio
+import logging
+from redis import asyncio as aioredis
 from app.config import get_settings
-from app.scrapers.tjsp import TJSPScraper
+from app.scrapers.engine import IndexPageError, PageResult, shutdown_parse_executor
+from app.scrapers.page_state import PageStateStore
+from app.workers.celery_app import celery_app
+from app.scrapers.registry import UnknownTribunalError, available_tribunals, create_scraper
 from app.database import AsyncSessionLocal
+from app.services.backfill_service import BackfillService
+from app.services.cache_service import CacheService, ingest_tags, tribunal_tag
+from app.services.dedup_service import SeenPublications
+from app.services.monitor_index import MonitorIndex
+from app.services.monitor_matcher import MonitorMatcher
+from app.services.partition_service import PartitionService
 from app.services.publication_service import PublicationService
+from app.services.stats_service import StatsService
 
 settings = get_settings()
 
-celery_app = Celery(
-    "judicial_worker",
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
-)
+logger = logging.getLogger(__name__)
+
+# Índice de monitoramentos do processo do worker, mantido entre tasks e
+# atualizado por deltas (ver MonitorIndex)
+monitor_index = MonitorIndex()
+
+# Impressões já gravadas por (tribunal, dia): reprocessar um dia descarta
+# as conhecidas antes do INSERT
+seen_publications = SeenPublications()
+
+celery_app.conf.beat_schedule = {
+    # Partições de publications criadas com antecedência (a padrão fica vazia)
+    "maintain-publication-partitions": {
+        "task": "maintain_publication_partitions",
+        "schedule": 24 * 60 * 60,
+    },
+    # Índice de monitoramentos remontado do banco: alterações cuja
+    # publicação no Redis falhou chegam aos workers por aqui
+    "rebuild-monitor-index": {
+        "task": "rebuild_monitor_index",
+        "schedule": settings.MONITOR_INDEX_REBUILD_EVERY,
+    },
+}
+
+@worker_process_shutdown.connect
+def _shutdown_parse_pool(**kwargs):
+    """Encerra o pool de processos de parsing junto com o worker"""
+    shutdown_parse_executor()
 
-@celery_app.task(name="scrape_tribunal")
-def scrape_tribunal_task(tribunal_code: str, target_date: str = None):
+@celery_app.task(
+    name="scrape_tribunal",
+    bind=True,
+    max_retries=settings.SCRAPER_INDEX_RETRIES,
+    default_retry_delay=settings.SCRAPER_INDEX_RETRY_DELAY
+)
+def scrape_tribunal_task(self, tribunal_code: str, target_date: str = None):
     """Task assíncrona para scraping de tribunal"""
     
     if target_date:
@@ -24,37 +67,117 @@ def scrape_tribunal_task(tribunal_code: str, target_date: str = None):
         scrape_date = date.today() - timedelta(days=1)
     
     # Run async scraping
-    result = asyncio.run(run_scraping(tribunal_code, scrape_date))
-    return result
+    try:
+        return asyncio.run(run_scraping(tribunal_code, scrape_date))
+    except IndexPageError as e:
+        # Sem a página inicial nenhuma página do dia é conhecida: tenta de novo
+        # mais tarde e, esgotadas as tentativas, a task falha
+        raise self.retry(exc=e)
 
 async def run_scraping(tribunal_code: str, target_date: date):
     """Executa scraping e salva no banco"""
     
-    # Seleciona scraper apropriado
-    if tribunal_code == "TJSP":
-        scraper = TJSPScraper()
-    else:
+    # Scraper do tribunal, importado só quando o tribunal é pedido
+    try:
+        scraper = create_scraper(tribunal_code)
+    except UnknownTribunalError:
         return {"error": f"Tribunal {tribunal_code} não suportado"}
     
-    # Executa scraping
-    publications = await scraper.scrape_date(target_date)
+    # Scraping em streaming: cada bloco de INGEST_CHUNK_SIZE publicações é
+    # gravado enquanto as páginas seguintes ainda estão sendo baixadas
+    scraped = created = matches = known = stale_chunks = 0
+    ingest_modes: dict[str, int] = {}
+    failed_pages: list[PageResult] = []
     
-    # Salva no banco
-    async with AsyncSessionLocal() as db:
-        service = PublicationService(db)
-        created = await service.bulk_create(publications)
+    redis = aioredis.from_url(settings.REDIS_URL)
+    try:
+        # Páginas sem alteração desde a última execução do dia são puladas
+        pages = await PageStateStore.load(redis, tribunal_code, target_date)
+        
+        async with scraper, AsyncSessionLocal() as db:
+            service = PublicationService(db, seen=seen_publications)
+            
+            stream = scraper.iter_date(target_date, state=pages, failed=failed_pages)
+            async for chunk in _chunked(stream, settings.INGEST_CHUNK_SIZE):
+                # Alterações de monitoramentos entram entre um bloco e outro
+                service.matcher = await _current_matcher(redis, db)
+                stale_chunks += monitor_index.failures > 0
+                # INSERT em lote ou COPY, conforme o tamanho do bloco
+                result = await service.ingest(chunk)
+                scraped += result.received
+                created += result.inserted
+                matches += result.matches
+                known += result.known
+                ingest_modes[result.mode] = ingest_modes.get(result.mode, 0) + 1
+        
+        # Só depois de tudo ingerido: uma execução interrompida refaz as páginas
+        await pages.save(redis)
+    finally:
+        await redis.close()
+    
+    if failed_pages:
+        # Publicações dessas páginas ficaram de fora; como o estado delas
+        # não foi atualizado, a próxima execução do dia as baixa de novo
+        logger.warning(
+            f"Scraping {tribunal_code} {target_date}: {len(failed_pages)} páginas com falha: "
+            + ", ".join(page.url for page in failed_pages)
+        )
+    
+    # Respostas em cache que dependem do tribunal/data deixam de valer
+    if created:
+        cache = CacheService(local_size=0)
+        try:
+            await cache.invalidate_tags(*ingest_tags(tribunal_code, target_date))
+        finally:
+            await cache.disconnect()
     
     return {
         "tribunal": tribunal_code,
         "date": target_date.isoformat(),
-        "scraped": len(publications),
-        "created": created
+        "scraped": scraped,
+        "created": created,
+        "skipped": scraped - created,
+        "known": known,
+        "pages_changed": pages.changed,
+        "pages_unchanged": pages.unchanged,
+        "pages_failed": len(failed_pages),
+        "failed_pages": [page.url for page in failed_pages],
+        "monitor_matches": matches,
+        # Blocos casados com um índice possivelmente desatualizado (refresh falhou)
+        "monitor_index_stale_chunks": stale_chunks,
+        "ingest_modes": ingest_modes
     }
 
+async def _current_matcher(redis, db) -> MonitorMatcher:
+    """Matcher do índice na versão atual; sem Redis, o último conhecido (ou montado do banco)"""
+    try:
+        return await monitor_index.refresh(redis, db)
+    except Exception as e:
+        stale_for = monitor_index.stale_for
+        last = "nunca" if stale_for is None else f"há {stale_for:.0f}s"
+        logger.warning(
+            f"Índice de monitoramentos não atualizado ({monitor_index.failures} falhas seguidas, "
+            f"último refresh {last}): {e!r}"
+        )
+        if monitor_index.matcher is None:
+            monitor_index.matcher = await MonitorMatcher.load(db)
+        return monitor_index.matcher
+
+async def _chunked(items: AsyncIterator, size: int) -> AsyncIterator[list]:
+    """Agrupa um iterador assíncrono em listas de até size itens"""
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 @celery_app.task(name="daily_scraping")
 def daily_scraping_task():
     """Task diária para scraping de todos os tribunais"""
-    tribunals = ["TJSP", "TJRJ"]
+    tribunals = available_tribunals()
     yesterday = (date.today() - timedelta(days=1)).isoformat()
     
     results = []
@@ -62,4 +185,95 @@ def daily_scraping_task():
         result = scrape_tribunal_task.delay(tribunal, yesterday)
         results.append(result.id)
     
-    return {"scheduled_tasks": results}
\ No newline at end of file
+    return {"scheduled_tasks": results}
+
+@celery_app.task(name="rebuild_tribunal_stats")
+def rebuild_tribunal_stats_task(since: str = None, until: str = None, tribunal: str = None):
+    """Reconstrói o rollup tribunal_daily_stats a partir de publications (todo o histórico por padrão)"""
+    return asyncio.run(rebuild_tribunal_stats(
+        date.fromisoformat(since) if since else None,
+        date.fromisoformat(until) if until else None,
+        tribunal
+    ))
+
+async def rebuild_tribunal_stats(since: date | None, until: date | None, tribunal: str | None):
+    """Recalcula o rollup e invalida as métricas em cache"""
+    async with AsyncSessionLocal() as db:
+        rows = await StatsService(db).rebuild(since, until, tribunal)
+    
+    cache = CacheService(local_size=0)
+    try:
+        await cache.invalidate_tags(tribunal_tag(tribunal), tribunal_tag(None))
+    finally:
+        await cache.disconnect()
+    
+    return {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "tribunal": tribunal,
+        "rows": rows
+    }
+
+@celery_app.task(name="rebuild_monitor_index")
+def rebuild_monitor_index_task():
+    """Remonta o índice de monitoramentos a partir do banco e grava um snapshot numa versão nova"""
+    return asyncio.run(rebuild_monitor_index())
+
+async def rebuild_monitor_index():
+    redis = aioredis.from_url(settings.REDIS_URL)
+    try:
+        async with AsyncSessionLocal() as db:
+            matcher = await monitor_index.rebuild(redis, db, bump=True)
+        monitor_index.matcher = matcher
+        return {"version": matcher.version, "monitors": matcher.monitor_count}
+    finally:
+        await redis.close()
+
+@celery_app.task(name="backfill_monitor")
+def backfill_monitor_task(backfill_id: str):
+    """Distribui entre os workers as fatias ainda não concluídas de um backfill (também o retoma)"""
+    partitions = asyncio.run(pending_backfill_partitions(uuid.UUID(backfill_id)))
+    group(backfill_monitor_partition_task.s(str(partition_id)) for partition_id in partitions).apply_async()
+    return {"backfill_id": backfill_id, "partitions": len(partitions)}
+
+async def pending_backfill_partitions(backfill_id: uuid.UUID) -> list[uuid.UUID]:
+    async with AsyncSessionLocal() as db:
+        return await BackfillService(db).pending_partitions(backfill_id)
+
+# acks_late: a fatia de um worker que caiu volta para a fila e segue do checkpoint
+@celery_app.task(name="backfill_monitor_partition", acks_late=True)
+def backfill_monitor_partition_task(partition_id: str):
+    """Busca retroativa de um monitoramento numa fatia (mês) do histórico"""
+    return asyncio.run(run_backfill_partition(uuid.UUID(partition_id)))
+
+async def run_backfill_partition(partition_id: uuid.UUID):
+    async with AsyncSessionLocal() as db, AsyncSessionLocal() as reader:
+        partition = await BackfillService(db).run_partition(partition_id, reader)
+    
+    if partition is None:
+        return {"partition_id": str(partition_id), "status": "missing"}
+    return {
+        "partition_id": str(partition_id),
+        "status": partition.status,
+        "scanned": partition.scanned,
+        "matches": partition.matches
+    }
+
+
+@celery_app.task(name="maintain_publication_partitions")
+def maintain_publication_partitions_task(months_ahead: int = None):
+    """Cria as partições mensais de publications dos próximos meses"""
+    return asyncio.run(maintain_publication_partitions(months_ahead))
+
+async def maintain_publication_partitions(months_ahead: int | None):
+    async with AsyncSessionLocal() as db:
+        return {"partitions": await PartitionService(db).ensure(months_ahead)}
+
+@celery_app.task(name="detach_publication_partitions")
+def detach_publication_partitions_task(before: str):
+    """Desanexa de publications as partições dos meses anteriores a before (ISO)"""
+    return asyncio.run(detach_publication_partitions(date.fromisoformat(before)))
+
+async def detach_publication_partitions(before: date):
+    async with AsyncSessionLocal() as db:
+        return {"before": before.isoformat(), "detached": await PartitionService(db).detach_before(before)}
@@ -0,0 +1,110 @@
+"""
+scripts/bench_bulk_create.py
+Benchmark: ingestão linha a linha (SELECT + INSERT + COMMIT por item)
+versus bulk_create com INSERT ... ON CONFLICT em lote e copy_create
+(COPY binário para staging + merge)
+
+Uso: python scripts/bench_bulk_create.py [--sizes 1000 10000 100000] [--legacy-max 10000]
+
+ATENÇÃO: usa o banco de DATABASE_URL e apaga as publicações do tribunal BENCH.
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+from sqlalchemy import delete
+from app.database import AsyncSessionLocal
+from app.models.publication import Publication
+from app.schemas.publication import PublicationCreate
+from app.services.publication_service import PublicationService
+
+BENCH_TRIBUNAL = "BENCH"
+
+
+def make_publications(n: int) -> list[PublicationCreate]:
+    """Gera n publicações sintéticas com chaves naturais distintas"""
+    base_date = date(2024, 1, 1)
+    return [
+        PublicationCreate(
+            tribunal=BENCH_TRIBUNAL,
+            publication_date=base_date + timedelta(days=i % 30),
+            process_number=f"{i:07d}-00.2024.8.26.0100",
+            content=f"DESPACHO: Vistos. Publicação sintética número {i} para benchmark de ingestão.",
+            parties=["AUTOR SINTÉTICO", "RÉU SINTÉTICO"],
+            publication_type="DESPACHO"
+        )
+        for i in range(n)
+    ]
+
+
+async def reset():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Publication).where(Publication.tribunal == BENCH_TRIBUNAL))
+        await db.commit()
+
+
+async def legacy_loop(publications: list[PublicationCreate]) -> int:
+    """Reproduz o caminho antigo: um SELECT + INSERT + COMMIT por publicação"""
+    created = 0
+    async with AsyncSessionLocal() as db:
+        service = PublicationService(db)
+        for pub in publications:
+            if not await service._check_duplicate(pub):
+                await service.create_publication(pub)
+                created += 1
+    return created
+
+
+async def set_based(publications: list[PublicationCreate]) -> int:
+    async with AsyncSessionLocal() as db:
+        return await PublicationService(db).bulk_create(publications)
+
+
+async def copy_based(publications: list[PublicationCreate]) -> int:
+    async with AsyncSessionLocal() as db:
+        return await PublicationService(db).copy_create(publications)
+
+
+async def timed(label: str, n: int, coro) -> None:
+    start = time.perf_counter()
+    created = await coro
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {n:>8} itens  {created:>8} inseridos  {elapsed:>9.2f}s  {n / elapsed:>10.0f} itens/s")
+
+
+async def main(sizes: list[int], legacy_max: int):
+    print("📊 Benchmark de ingestão em lote")
+    for n in sizes:
+        publications = make_publications(n)
+        print(f"\n{'='*60}\n{n} publicações\n{'='*60}")
+
+        if n <= legacy_max:
+            await reset()
+            await timed("loop linha a linha", n, legacy_loop(publications))
+        else:
+            print(f"  loop linha a linha           pulado (> --legacy-max {legacy_max})")
+
+        await reset()
+        await timed("bulk_create (inserção)", n, set_based(publications))
+        # Segunda passada: tudo duplicado, mede o caminho de descarte
+        await timed("bulk_create (reingestão)", n, set_based(publications))
+
+        await reset()
+        await timed("copy_create (inserção)", n, copy_based(publications))
+        await timed("copy_create (reingestão)", n, copy_based(publications))
+
+    await reset()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="Maior tamanho em que o loop antigo é executado")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.legacy_max))
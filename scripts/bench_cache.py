@@ -0,0 +1,143 @@
+"""
+scripts/bench_cache.py
+Benchmark do CacheService: latência de acerto na camada local versus só
+Redis, quantos cálculos um carregamento frio concorrente dispara e
+operações com várias chaves (MGET/pipeline e remoção por padrão em lotes)
+
+Requer o Redis de REDIS_URL. Na parte "frio", --workers instâncias de
+CacheService (simulando workers do uvicorn) recebem --requests pedidos
+concorrentes cada, para as mesmas --keys chaves, com um loader que
+simula uma consulta de --query-ms.
+
+Na parte "várias chaves", --many chaves são lidas uma a uma e com
+get_many, pré-aquecidas com warm e removidas com delete_pattern.
+
+Uso: python scripts/bench_cache.py [--hits 20000] [--workers 4] [--requests 50] [--keys 5] [--query-ms 200] [--many 1000]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+import uuid
+from app.config import get_settings
+from app.services.cache_service import CacheService
+
+settings = get_settings()
+
+PAYLOAD = {
+    "items": [{"id": str(uuid.uuid4()), "tribunal": "TJSP", "content": "x" * 500} for _ in range(50)],
+    "total": 1234,
+}
+
+
+async def bench_hits(label: str, cache: CacheService, hits: int):
+    key = cache.query_key("bench:hit", {"id": str(uuid.uuid4())})
+    await cache.set(key, PAYLOAD)
+
+    async def load():
+        return PAYLOAD
+
+    await cache.get_or_set(key, load)
+    start = time.perf_counter()
+    for _ in range(hits):
+        await cache.get_or_set(key, load)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<26} {elapsed / hits * 1e6:>9.1f} µs/acerto")
+    await cache.delete(key)
+
+
+async def bench_cold(workers: int, requests: int, keys: int, query_ms: float):
+    caches = [CacheService() for _ in range(workers)]
+    run_id = uuid.uuid4()
+    key_names = [caches[0].query_key("bench:cold", {"run": str(run_id), "key": i}) for i in range(keys)]
+    queries = 0
+
+    async def load():
+        nonlocal queries
+        queries += 1
+        await asyncio.sleep(query_ms / 1000)
+        return PAYLOAD
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        cache.get_or_set(key, load)
+        for cache in caches
+        for key in key_names
+        for _ in range(requests)
+    ))
+    elapsed = time.perf_counter() - start
+    total = workers * keys * requests
+    print(f"  {total} pedidos frios, {keys} chaves: {queries} consultas ({elapsed:.2f}s)")
+
+    for key in key_names:
+        await caches[0].delete(key)
+    for cache in caches:
+        await cache.disconnect()
+
+
+async def bench_many(many: int):
+    cache = CacheService(local_size=0)
+    prefix = f"bench:many:{uuid.uuid4()}"
+    keys = [f"{prefix}:{i}" for i in range(many)]
+    item = PAYLOAD["items"][0]
+
+    async def timed(label: str, action):
+        start = time.perf_counter()
+        result = await action()
+        print(f"  {label:<26} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        return result
+
+    try:
+        await timed(f"set x{many}", lambda: asyncio.gather(*(cache.set(key, item) for key in keys[:many // 2])))
+        await timed(f"set_many ({many // 2})", lambda: cache.set_many({key: item for key in keys[many // 2:]}))
+        await timed(f"get x{many} (sequencial)", lambda: _get_each(cache, keys))
+        await timed(f"get_many ({many})", lambda: cache.get_many(keys))
+
+        async def load():
+            return item
+
+        await cache.delete_many(*keys[::2])
+        stats = await timed("warm", lambda: cache.warm({key: load for key in keys}))
+        print(f"  {'':<26} {stats.cached} em cache, {stats.loaded} calculadas, {len(stats.failed)} falhas")
+        removed = await timed("delete_pattern", lambda: cache.delete_pattern(f"{prefix}:*"))
+        print(f"  {'':<26} {removed} chaves em lotes de até {settings.CACHE_DELETE_BATCH}")
+    finally:
+        await cache.disconnect()
+
+
+async def _get_each(cache: CacheService, keys: list[str]):
+    return [await cache.get(key) for key in keys]
+
+
+async def main(hits: int, workers: int, requests: int, keys: int, query_ms: float, many: int):
+    print("📊 Acertos")
+    two_tier = CacheService()
+    redis_only = CacheService(local_size=0)
+    try:
+        await bench_hits("camada local + Redis", two_tier, hits)
+        await bench_hits("só Redis", redis_only, hits // 10)
+    finally:
+        await two_tier.disconnect()
+        await redis_only.disconnect()
+
+    print("\n📊 Carregamento frio")
+    await bench_cold(workers, requests, keys, query_ms)
+
+    print("\n📊 Várias chaves")
+    await bench_many(many)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=5)
+    parser.add_argument("--query-ms", type=float, default=200)
+    parser.add_argument("--many", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.hits, args.workers, args.requests, args.keys, args.query_ms, args.many))
@@ -0,0 +1,108 @@
+"""
+scripts/bench_cache_codec.py
+Benchmark dos codecs do cache para páginas típicas da listagem de
+publicações (--items itens por página, já serializáveis como a rota guarda)
+
+Compara o formato antigo (json.dumps(default=str) como texto) com JSON,
+orjson e msgpack, sem compressão e com zstd: tempo de encode/decode e
+bytes gravados no Redis.
+
+Uso: python scripts/bench_cache_codec.py [--items 100] [--pages 50] [--rounds 20]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from app.services.cache_codec import CODECS, get_codec
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_extraction import make_corpus
+
+
+def make_page(corpus: list[str], rng: random.Random, items: int) -> dict:
+    """Resposta da listagem como fica em cache (jsonable_encoder já aplicado)"""
+    day = date(2024, 3, 1) + timedelta(days=rng.randint(0, 30))
+    scraped = datetime(2024, 3, 2, 6, rng.randint(0, 59), rng.randint(0, 59), rng.randint(0, 999999))
+    return {
+        "items": [
+            {
+                "tribunal": "TJSP",
+                "publication_date": day.isoformat(),
+                "process_number": f"{rng.randint(0, 9999999):07d}-{rng.randint(0, 99):02d}.2024.8.26.0100",
+                "content": " ".join(rng.choice(corpus).split()),
+                "parties": ["Maria Aparecida Santos", "Banco Itaú Unibanco S.A."],
+                "publication_type": "DECISAO",
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "scraped_at": scraped.isoformat(),
+                "created_at": scraped.isoformat(),
+            }
+            for _ in range(items)
+        ],
+        "total": 1_254_311,
+        "total_strategy": "estimated",
+        "page": 1,
+        "page_size": items,
+        "pages": 1_254_311 // items + 1,
+        "next_cursor": None,
+    }
+
+
+def bench(label: str, encode, decode, values: list, rounds: int):
+    encoded = [encode(value) for value in values]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in values:
+            encode(value)
+    encode_us = (time.perf_counter() - start) / (rounds * len(values)) * 1e6
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for data in encoded:
+            decode(data)
+    decode_us = (time.perf_counter() - start) / (rounds * len(values)) * 1e6
+    
+    size = sum(len(data) for data in encoded) / len(encoded)
+    print(f"  {label:<24} {encode_us:>9.1f} µs  {decode_us:>9.1f} µs  {size / 1024:>9.1f} KB")
+    return size
+
+
+def main(items: int, pages: int, rounds: int):
+    rng = random.Random(7)
+    corpus = make_corpus(2000)
+    values = [{"v": make_page(corpus, rng, items), "d": 0.12, "x": time.time()} for _ in range(pages)]
+    
+    print(f"📊 {pages} páginas de {items} publicações ({rounds} rodadas)")
+    print(f"  {'formato':<24} {'encode':>12}  {'decode':>12}  {'bytes/página':>12}")
+    legacy = bench(
+        "json texto (antes)",
+        lambda value: json.dumps(value, default=str).encode(),
+        json.loads,
+        values,
+        rounds
+    )
+    for name, (_, available) in CODECS.items():
+        if not available:
+            print(f"  {name:<24} (pacote não instalado)")
+            continue
+        for compressed in (False, True):
+            codec = get_codec(name, compress_threshold=0 if compressed else -1)
+            label = f"{name} + zstd" if compressed else name
+            size = bench(label, codec.encode, codec.decode, values, rounds)
+            if compressed:
+                print(f"  {'':<24} {legacy / size:>26.1f}x menor que antes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    main(args.items, args.pages, args.rounds)
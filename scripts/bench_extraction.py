@@ -0,0 +1,129 @@
+"""
+scripts/bench_extraction.py
+Benchmark de extração sobre um corpus sintético (1 milhão de itens por padrão)
+
+Compara a extração antiga (re.search/re.findall com padrões literais,
+uma varredura por padrão de parte, como o TJRJScraper fazia), a mesma
+abordagem estendida até as saídas atuais (DV CNJ, advogados/OAB e tipo)
+e a passada única de app/scrapers/extraction.py. A passada única é
+comparável à segunda; contra a primeira ela perde, porque devolve mais
+campos.
+
+Uso: python scripts/bench_extraction.py [--items 1000000] [--distinct 20000]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import random
+import re
+import time
+from itertools import cycle, islice
+from app.scrapers.extraction import extract, is_valid_cnj
+
+NAMES = [
+    "João da Silva", "Maria Aparecida Santos", "Banco Itaú Unibanco S.A.", "José Ferreira Lima",
+    "Ana Beatriz Conceição", "Município de São Paulo", "Construtora Horizonte Ltda", "Luíza Gonçalves",
+]
+LAWYERS = ["Carlos Eduardo Mendes", "Fernanda Ribeiro", "Renato Augusto Pires", "Patrícia Nogueira"]
+BODIES = [
+    "Vistos. Defiro a tutela de urgência requerida, nos termos do art. 300 do CPC. Intime-se.",
+    "Julgo PROCEDENTE o pedido para condenar a parte ré ao pagamento de R$ 15.000,00.",
+    "Manifeste-se a parte autora sobre a contestação, no prazo de 15 (quinze) dias.",
+    "Ciência às partes do retorno dos autos. Nada sendo requerido, arquivem-se.",
+]
+TYPES = ["DECISÃO", "SENTENÇA", "DESPACHO", "INTIMAÇÃO", "EDITAL"]
+
+
+def cnj(rng: random.Random) -> str:
+    seq, origem = rng.randint(1, 9_999_999), rng.randint(1, 9999)
+    base = int(f"{seq:07d}2024826{origem:04d}")
+    dd = 98 - (base * 100) % 97
+    return f"{seq:07d}-{dd:02d}.2024.8.26.{origem:04d}"
+
+
+def make_corpus(distinct: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(distinct):
+        a, r = rng.sample(NAMES, 2)
+        roles = rng.choice([("Autor", "Réu"), ("Requerente", "Requerido")])
+        corpus.append(
+            f"{rng.choice(TYPES)} Processo nº {cnj(rng)} - Procedimento Comum Cível\n"
+            f"{roles[0]}: {a}\n{roles[1]}: {r}\n{rng.choice(BODIES)}\n"
+            f"Advogado: {rng.choice(LAWYERS)} (OAB/SP {rng.randint(10, 999)}.{rng.randint(100, 999)})"
+        )
+    return corpus
+
+
+def legacy_extract(text: str):
+    """Extração antiga: uma busca pelo CNJ e uma varredura por padrão de parte"""
+    match = re.search(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}', text)
+    process_number = match.group(0) if match else None
+    parties = []
+    for pattern in [
+        r'Requerente[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú\s]+)',
+        r'Requerido[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú\s]+)',
+        r'Autor[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú\s]+)',
+        r'Réu[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú\s]+)'
+    ]:
+        parties.extend(m.strip() for m in re.findall(pattern, text))
+    return process_number, list(set(parties))[:10]
+
+
+def legacy_full_extract(text: str):
+    """
+    A abordagem antiga estendida até as mesmas saídas da passada única:
+    uma varredura por padrão (CNJ com DV, partes, advogados, OAB e tipo)
+    """
+    numbers = re.findall(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}', text)
+    valid = [n for n in numbers if is_valid_cnj(n)]
+    parties = []
+    for pattern in [
+        r'Requerente[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú. ]+)',
+        r'Requerid[oa][:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú. ]+)',
+        r'Autora?[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú. ]+)',
+        r'Réu[:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú. ]+)'
+    ]:
+        parties.extend(m.strip() for m in re.findall(pattern, text))
+    lawyers = [m.strip() for m in re.findall(r'Advogad[oa][:\s]+([A-ZÀ-Ú][A-Za-zÀ-ú. ]+)', text)]
+    oabs = re.findall(r'OAB\s*[/:-]?\s*([A-Z]{2})\s*[/:-]?\s*([\d.]+)', text)
+    publication_type = None
+    for pattern, name in [
+        (r'DECIS|SENTEN', 'DECISAO'), (r'DESPACHO', 'DESPACHO'),
+        (r'EDITA', 'EDITAL'), (r'INTIMA', 'INTIMACAO'),
+    ]:
+        if re.search(pattern, text, re.IGNORECASE):
+            publication_type = name
+            break
+    return valid or numbers, list(set(parties))[:10], lawyers, oabs, publication_type
+
+
+def bench(label: str, fn, corpus: list[str], items: int) -> float:
+    start = time.perf_counter()
+    for text in islice(cycle(corpus), items):
+        fn(text)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {items:>9} itens  {elapsed:>8.2f}s  {items / elapsed:>10.0f} itens/s")
+    return elapsed
+
+
+def main(items: int, distinct: int):
+    corpus = make_corpus(distinct)
+    size_mb = sum(len(t.encode()) for t in corpus) / len(corpus) * items / (1024 * 1024)
+    print(f"📊 Extração sobre {items} itens sintéticos (~{size_mb:.0f} MB de texto, {distinct} distintos)")
+    before = bench("antiga (só CNJ + partes)", legacy_extract, corpus, items)
+    full = bench("antiga, mesmas saídas", legacy_full_extract, corpus, items)
+    after = bench("passada única pré-compilada", extract, corpus, items)
+    print(f"  vs. antiga com as mesmas saídas: {full / after:.2f}x")
+    print(f"  vs. antiga (só CNJ + partes):    {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    args = parser.parse_args()
+    main(args.items, args.distinct)
@@ -0,0 +1,111 @@
+"""
+scripts/bench_http_client.py
+Benchmark: um httpx.AsyncClient novo por fetch (comportamento antigo)
+versus o cliente compartilhado do BaseScraper
+
+Sobe um servidor HTTP/1.1 local que simula o diário (com latência
+configurável) e conta quantas conexões TCP cada modo abre.
+
+Uso: python scripts/bench_http_client.py [--pages 500] [--latency-ms 20] [--size-kb 50]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+import httpx
+from app.config import get_settings
+from app.scrapers.tribunals.tjsp import TJSPScraper
+
+settings = get_settings()
+
+
+class StandInServer:
+    """Servidor HTTP/1.1 keep-alive mínimo que conta conexões abertas"""
+
+    def __init__(self, latency: float, body: bytes):
+        self.latency = latency
+        self.body = body
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/html; charset=utf-8\r\n"
+                    b"Connection: keep-alive\r\n"
+                    b"Content-Length: " + str(len(self.body)).encode() + b"\r\n\r\n" + self.body
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def fetch_new_client_per_page(scraper: TJSPScraper, url: str) -> str:
+    """Reproduz o fetch_page antigo: abre e fecha um cliente por chamada"""
+    async with httpx.AsyncClient(timeout=scraper.timeout, limits=scraper.limits) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.text
+
+
+async def run(label: str, server: StandInServer, base_url: str, pages: int, shared: bool):
+    server.connections = 0
+    semaphore = asyncio.Semaphore(settings.SCRAPER_CONCURRENCY)
+
+    async with TJSPScraper() as scraper:
+        async def fetch(i: int):
+            async with semaphore:
+                url = f"{base_url}/diario?pagina={i}"
+                if shared:
+                    return await scraper.fetch_page(url)
+                return await fetch_new_client_per_page(scraper, url)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(i) for i in range(pages)))
+        elapsed = time.perf_counter() - start
+
+    print(f"  {label:<26} {server.connections:>6} conexões  {elapsed:>7.2f}s  {pages / elapsed:>8.1f} páginas/s")
+
+
+async def main(pages: int, latency_ms: float, size_kb: int):
+    body = (b"<div class='publicacao-item'>x</div>" * (size_kb * 1024 // 36 + 1))[:size_kb * 1024]
+    server = StandInServer(latency_ms / 1000, body)
+    base_url = await server.start()
+
+    print(f"📊 {pages} páginas de {size_kb} KB, latência {latency_ms} ms, "
+          f"SCRAPER_CONCURRENCY={settings.SCRAPER_CONCURRENCY}")
+    try:
+        await run("cliente novo por fetch", server, base_url, pages, shared=False)
+        await run("cliente compartilhado", server, base_url, pages, shared=True)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--size-kb", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.latency_ms, args.size_kb))
@@ -0,0 +1,129 @@
+"""
+scripts/bench_monitor_matching.py
+Benchmark do casamento de monitoramentos com publicações
+
+Compara a abordagem ingênua (cada palavra-chave procurada em cada
+publicação, custo palavras-chave x publicações) com o autômato de
+Aho-Corasick de app/services/monitor_matcher.py, que percorre cada
+publicação uma vez. --monitors monitoramentos com 1 a 3 palavras-chave
+cada, uma parte delas presente no corpus.
+
+Mede também o custo de uma alteração de monitoramento (delta) contra a
+recompilação completa, e o snapshot serializado que os workers carregam.
+
+Uso: python scripts/bench_monitor_matching.py [--monitors 20000] [--publications 5000] [--naive 200]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import pickle
+import random
+import string
+import time
+import uuid
+from app.utils.text import fold_text
+from app.services.monitor_index import MonitorIndex, _pack
+from app.services.monitor_matcher import MonitorMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_extraction import NAMES, LAWYERS, make_corpus
+
+REAL_KEYWORDS = NAMES + LAWYERS + ["tutela de urgência", "contestação", "arquivem-se", "Procedimento Comum"]
+
+
+def make_monitors(count: int, rng: random.Random) -> list:
+    monitors = []
+    for _ in range(count):
+        keywords = [
+            rng.choice(REAL_KEYWORDS) if rng.random() < 0.01
+            else " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9))) for _ in range(rng.randint(1, 2)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        tribunals = None if rng.random() < 0.5 else [rng.choice(["TJSP", "TJRJ", "TJMG"])]
+        monitors.append((uuid.uuid4(), keywords, tribunals))
+    return monitors
+
+
+class _SnapshotRedis:
+    """Só o GET do snapshot, para medir MonitorIndex.load_snapshot sem Redis"""
+    def __init__(self, data: bytes):
+        self.data = data
+    
+    async def get(self, key: str) -> bytes:
+        return self.data
+
+
+def naive_match(monitors: list, tribunal: str, text: str) -> int:
+    """Uma busca (str in) por palavra-chave já normalizada de cada monitoramento do tribunal"""
+    folded = fold_text(text)
+    hits = 0
+    for _, keywords, tribunals in monitors:
+        if tribunals is None or tribunal in tribunals:
+            hits += any(keyword in folded for keyword in keywords)
+    return hits
+
+
+def main(monitors_count: int, publications: int, naive: int):
+    rng = random.Random(3)
+    monitors = make_monitors(monitors_count, rng)
+    corpus = make_corpus(publications)
+    megabytes = sum(len(text) for text in corpus) / 1e6
+    keywords = sum(len(keywords) for _, keywords, _ in monitors)
+    
+    print(f"📊 {monitors_count} monitoramentos ({keywords} palavras-chave), {publications} publicações ({megabytes:.1f} MB)")
+    
+    start = time.perf_counter()
+    matcher = MonitorMatcher(monitors)
+    matcher.match("TJSP", "")
+    build = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    hits = sum(len(matcher.match("TJSP", text)) for text in corpus)
+    automaton = time.perf_counter() - start
+    print(f"  {'aho-corasick':<14} {automaton / publications * 1e6:>9.1f} µs/publicação "
+          f"(montagem {build * 1000:.0f} ms, {hits} casamentos)")
+    
+    sample = corpus[:naive]
+    folded_monitors = [(monitor_id, [fold_text(k) for k in keywords], tribunals) for monitor_id, keywords, tribunals in monitors]
+    start = time.perf_counter()
+    naive_hits = sum(naive_match(folded_monitors, "TJSP", text) for text in sample)
+    elapsed = time.perf_counter() - start
+    sample_hits = sum(len(matcher.match("TJSP", text)) for text in sample)
+    print(f"  {'ingênuo':<14} {elapsed / len(sample) * 1e6:>9.1f} µs/publicação "
+          f"(amostra de {len(sample)}, {naive_hits} casamentos; autômato: {sample_hits})")
+    print(f"  {'':<14} {elapsed / len(sample) / (automaton / publications):>9.0f}x mais rápido")
+    
+    print("\n📊 Alterações e snapshot")
+    matcher.compile()
+    changes = 200
+    start = time.perf_counter()
+    for monitor_id, keywords, tribunals in make_monitors(changes, rng):
+        matcher.upsert(monitor_id, keywords, tribunals)
+        matcher.match("TJSP", corpus[0])
+    delta = (time.perf_counter() - start) / changes
+    start = time.perf_counter()
+    MonitorMatcher(monitors).compile()
+    full = time.perf_counter() - start
+    print(f"  {'delta':<14} {delta * 1000:>9.2f} ms/alteração (upsert + próxima publicação)")
+    print(f"  {'recompilação':<14} {full * 1000:>9.0f} ms (todos os tribunais)")
+    
+    matcher.compile()
+    data = _pack(pickle.dumps(matcher, protocol=pickle.HIGHEST_PROTOCOL))
+    start = time.perf_counter()
+    restored = asyncio.run(MonitorIndex().load_snapshot(_SnapshotRedis(data)))
+    load = time.perf_counter() - start
+    assert restored.match("TJSP", corpus[1]) == matcher.match("TJSP", corpus[1])
+    print(f"  {'snapshot':<14} {load * 1000:>9.0f} ms para carregar ({len(data) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--monitors", type=int, default=20_000)
+    parser.add_argument("--publications", type=int, default=5_000)
+    parser.add_argument("--naive", type=int, default=200)
+    args = parser.parse_args()
+    main(args.monitors, args.publications, args.naive)
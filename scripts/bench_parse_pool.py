@@ -0,0 +1,89 @@
+"""
+scripts/bench_parse_pool.py
+Benchmark de escalabilidade do parsing em pool de processos
+
+Roda o ScrapingEngine sobre páginas montadas a partir dos HTMLs gravados
+em tests/fixtures (sem rede; o fetch só simula latência) variando o
+número de processos de parsing. Com 0 processos o parsing roda no event
+loop, como antes.
+
+Uso: python scripts/bench_parse_pool.py [--pages 64] [--page-kb 512] [--workers 0 1 2 4 8]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from app.scrapers.engine import ScrapingEngine
+from app.scrapers.tribunals.tjrj import TJRJScraper
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+TARGET_DATE = date(2024, 3, 1)
+MARKER = '<div class="diario-section">'
+
+
+class FixtureScraper(TJRJScraper):
+    """TJRJScraper servindo as páginas da fixture a partir da memória"""
+
+    def __init__(self, pages: int, page_kb: int, latency: float):
+        super().__init__()
+        html = (FIXTURES / "tjrj_diario.html").read_text(encoding="utf-8")
+        head, _, rest = html.partition(MARKER)
+        body, _, tail = rest.rpartition("</body>")
+        body = MARKER + body
+        copies = max(1, page_kb * 1024 // len(body.encode()))
+        self.page_html = head + body * copies + "</body>" + tail
+        self.index_html = "".join(
+            f'<ul class="paginacao"><li><a href="?data=2024-03-01&amp;pagina={i}">{i}</a></li></ul>'
+            for i in range(pages)
+        )
+        self.latency = latency
+
+    async def fetch_page(self, url: str, retry: int = 3) -> str:
+        await asyncio.sleep(self.latency)
+        return self.index_html if "pagina=" not in url else self.page_html
+
+
+async def run(scraper: FixtureScraper, workers: int, concurrency: int) -> tuple[float, int]:
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        engine = ScrapingEngine(scraper, concurrency=concurrency, executor=executor)
+        start = time.perf_counter()
+        items = 0
+        async for page in engine.iter_pages(TARGET_DATE):
+            items += len(page.publications)
+        return time.perf_counter() - start, items
+    finally:
+        if executor:
+            executor.shutdown()
+
+
+async def main(pages: int, page_kb: int, workers_list: list[int], latency_ms: float):
+    scraper = FixtureScraper(pages, page_kb, latency_ms / 1000)
+    concurrency = max(workers_list + [1]) * 2
+    print(f"📊 {pages} páginas de ~{page_kb} KB, latência {latency_ms} ms, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in workers_list:
+        elapsed, items = await run(scraper, workers, concurrency)
+        rate = pages / elapsed
+        baseline = baseline or rate
+        label = "no event loop" if workers == 0 else f"{workers} processo(s)"
+        print(f"  {label:<16} {items:>8} itens  {elapsed:>7.2f}s  {rate:>7.1f} páginas/s  {rate / baseline:>5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--page-kb", type=int, default=512)
+    parser.add_argument("--latency-ms", type=float, default=10)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({0, 1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.page_kb, args.workers, args.latency_ms))
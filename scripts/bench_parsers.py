@@ -0,0 +1,103 @@
+"""
+scripts/bench_parsers.py
+Benchmark de parsing dos diários: BeautifulSoup + html.parser (parser
+antigo) versus o parsing em streaming com lxml de app/scrapers/parsing.py
+
+Usa os HTMLs gravados em tests/fixtures, replicados até --mb megabytes
+por página, e informa o tempo de parsing por MB.
+
+Uso: python scripts/bench_parsers.py [--mb 5] [--rounds 3]
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+from bs4 import BeautifulSoup
+from app.scrapers.tribunals.tjrj import TJRJScraper
+from app.scrapers.tribunals.tjsp import TJSPScraper
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+TARGET_DATE = date(2024, 3, 1)
+
+
+def legacy_tjsp(scraper: TJSPScraper, html: str) -> int:
+    """Parser antigo do TJ-SP (árvore completa, get_text repetido por item)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    count = 0
+    for item in soup.find_all('div', class_='publicacao-item'):
+        scraper.parse_publication({
+            'content': item.get_text(strip=True),
+            'process_number': scraper._extract_process_number(item.get_text()),
+            'parties': scraper._extract_parties(item.get_text()),
+        })
+        count += 1
+    return count
+
+
+def legacy_tjrj(scraper: TJRJScraper, html: str) -> int:
+    """Parser antigo do TJ-RJ"""
+    soup = BeautifulSoup(html, 'html.parser')
+    count = 0
+    for section in soup.find_all('div', class_='diario-section'):
+        for item in section.find_all('p', class_='publicacao'):
+            scraper.parse_publication({
+                'content': item.get_text(strip=True),
+                'process_number': scraper._extract_process_number(item.get_text()),
+                'parties': scraper._extract_parties(item.get_text()),
+                'publication_type': scraper._classify_type(section.find('h3').get_text())
+            })
+            count += 1
+    return count
+
+
+def inflate(html: str, marker: str, mb: float) -> str:
+    """Replica o corpo da página até atingir aproximadamente mb megabytes"""
+    head, _, rest = html.partition(marker)
+    body, _, tail = rest.rpartition("</body>")
+    body = marker + body
+    copies = max(1, int(mb * 1024 * 1024 / len(body.encode())))
+    return head + body * copies + "</body>" + tail
+
+
+def bench(label: str, fn, html: str, rounds: int) -> float:
+    size_mb = len(html.encode()) / (1024 * 1024)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        items = fn(html)
+        best = min(best, time.perf_counter() - start)
+    per_mb = best / size_mb
+    print(f"  {label:<26} {items:>7} itens  {size_mb:>6.2f} MB  {best * 1000:>9.1f} ms  {per_mb * 1000:>8.1f} ms/MB")
+    return per_mb
+
+
+def main(mb: float, rounds: int):
+    cases = [
+        ("TJSP", TJSPScraper(), "tjsp_diario.html", "<main>", legacy_tjsp),
+        ("TJRJ", TJRJScraper(), "tjrj_diario.html", '<div class="diario-section">', legacy_tjrj),
+    ]
+    print("📊 Benchmark de parsing (melhor de %d rodadas)" % rounds)
+    for tribunal, scraper, fixture, marker, legacy in cases:
+        html = inflate((FIXTURES / fixture).read_text(encoding="utf-8"), marker, mb)
+        print(f"\n{'='*60}\n{tribunal} ({fixture})\n{'='*60}")
+        before = bench("bs4 html.parser (antes)", lambda h: legacy(scraper, h), html, rounds)
+        after = bench(
+            "lxml streaming (depois)",
+            lambda h: len(scraper.parse_page(h, TARGET_DATE, scraper.build_url(TARGET_DATE)).publications),
+            html,
+            rounds
+        )
+        print(f"  ganho: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.mb, args.rounds)
@@ -1,8 +1,8 @@
 """Script para testar scrapers manualmente"""
 import asyncio
 from datetime import date, timedelta
-from app.scrapers.tjsp import TJSPScraper
-from app.scrapers.tjrj import TJRJScraper
+from app.scrapers.tribunals.tjsp import TJSPScraper
+from app.scrapers.tribunals.tjrj import TJRJScraper
 
 async def test_scraper(scraper_class, tribunal_name: str):
     """Testa um scraper específico"""
@@ -10,14 +10,14 @@ async def test_scraper(scraper_class, tribunal_name: str):
     print(f"Testando {tribunal_name}")
     print(f"{'='*60}")
     
-    scraper = scraper_class()
     target_date = date.today() - timedelta(days=1)
     
     print(f"📅 Data alvo: {target_date}")
     print(f"🔍 Iniciando scraping...")
     
     try:
-        publications = await scraper.scrape_date(target_date)
+        async with scraper_class() as scraper:
+            publications = await scraper.scrape_date(target_date)
         
         print(f"\n✅ Scraping concluído!")
         print(f"📊 Total de publicações encontradas: {len(publications)}")
@@ -1,7 +1,10 @@
 import pytest
+import subprocess
+import sys
 from httpx import AsyncClient
 from app.main import app
 from datetime import date
+from uuid import uuid4
 
 @pytest.mark.asyncio
 async def test_root_endpoint():
@@ -41,3 +44,37 @@ async def test_list_publications_with_filters():
         }
         response = await client.get("/api/v1/publications/", params=params)
         assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_list_publications_cursor_mode():
+    """Test keyset pagination mode"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/v1/publications/", params={"cursor": "", "page_size": 10})
+        assert response.status_code == 200
+        data = response.json()
+        assert "items" in data
+        assert "next_cursor" in data
+        assert "total" not in data
+
+@pytest.mark.asyncio
+async def test_list_publications_invalid_cursor():
+    """Test malformed cursors are rejected before touching the database"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/v1/publications/", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"] == "Cursor inválido"
+
+@pytest.mark.asyncio
+async def test_list_monitor_matches_invalid_cursor():
+    """Test malformed match cursors are rejected before touching the database"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(f"/api/v1/monitors/{uuid4()}/matches", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"] == "Cursor inválido"
+
+def test_api_does_not_import_worker_tasks():
+    """Test the API process enqueues by task name without importing the worker module"""
+    code = "import sys, app.main; print('app.workers.tasks' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
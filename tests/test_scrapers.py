@@ -1,6 +1,121 @@
 import pytest
+import asyncio
+import multiprocessing
+import subprocess
+import sys
+import time
+import httpx
 from datetime import date
-from app.scrapers.tjsp import TJSPScraper
+from pathlib import Path
+from app.scrapers.engine import IndexPageError, ScrapingEngine
+from app.scrapers.extraction import extract, is_valid_cnj
+from app.scrapers.parsing import iter_matches
+from app.scrapers.page_state import FetchedPage, PageState, PageStateStore, body_checksum
+from app.scrapers.registry import UnknownTribunalError, available_tribunals, create_scraper, get_scraper_class, register
+from app.scrapers.throttle import CircuitOpenError, Throttle
+from app.scrapers.tribunals.tjrj import TJRJScraper
+from app.scrapers.tribunals.tjsp import TJSPScraper
+from app.workers import tasks
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeTJSPScraper(TJSPScraper):
+    """TJSPScraper servindo páginas em memória e medindo fetches simultâneos"""
+    
+    def __init__(self, pages: dict[str, str]):
+        super().__init__()
+        self.pages = pages
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fetched = []
+    
+    async def fetch_page(self, url: str, retry: int = 3) -> str:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        self.fetched.append(url)
+        return self.pages[url]
+
+
+class ConditionalFakeScraper(FakeTJSPScraper):
+    """FakeTJSPScraper que responde a GETs condicionais (ETag = checksum do corpo)"""
+    
+    def __init__(self, pages: dict[str, str], etags: bool = True):
+        super().__init__(pages)
+        self.etags = etags
+        self.parsed = []
+    
+    async def fetch_conditional(self, url: str, previous: PageState | None = None, retry: int = 3) -> FetchedPage:
+        self.fetched.append(url)
+        body = self.pages[url].encode()
+        etag = f'"{body_checksum(body)}"' if self.etags else None
+        if previous is not None and etag is not None and previous.etag == etag:
+            return FetchedPage(304, None, None, None, None)
+        return FetchedPage(200, self.pages[url], etag, None, body_checksum(body))
+    
+    def parse_page(self, html, target_date, page_url):
+        self.parsed.append(page_url)
+        return super().parse_page(html, target_date, page_url)
+
+
+class FakeTribunalServer:
+    """Servidor HTTP local que injeta latência e erros: respond(n) -> (status, atraso, cabeçalhos)"""
+    
+    def __init__(self, respond):
+        self.respond = respond
+        self.hits = []  # instante (monotonic) de cada requisição recebida
+    
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}/diario"
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                self.hits.append(time.monotonic())
+                status, delay, headers = self.respond(len(self.hits))
+                await asyncio.sleep(delay)
+                body = b"<html></html>"
+                lines = [f"HTTP/1.1 {status} Fake", f"Content-Length: {len(body)}"]
+                lines += [f"{name}: {value}" for name, value in headers.items()]
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def throttled_scraper(server: FakeTribunalServer, **kwargs) -> tuple[TJSPScraper, Throttle]:
+    """TJSPScraper com um limitador local para o host do servidor falso"""
+    scraper = TJSPScraper()
+    host = httpx.URL(server.url).netloc.decode()
+    throttle = scraper.throttles[host] = Throttle(host, **kwargs)
+    return scraper, throttle
+
+
+def make_diario_pages(scraper: TJSPScraper, target_date: date, n_pages: int) -> dict[str, str]:
+    """Índice com links para n_pages páginas, cada uma com uma publicação"""
+    index_url = scraper.build_url(target_date)
+    page_urls = [f"{scraper.BASE_URL}/pagina/{i}" for i in range(n_pages)]
+    pages = {
+        index_url: "".join(f'<a class="pagina-link" href="{url}">{i}</a>' for i, url in enumerate(page_urls))
+    }
+    for i, url in enumerate(page_urls):
+        pages[url] = (
+            f'<div class="publicacao-item">Processo nº {i:07d}-12.2024.8.26.0100 '
+            f'Autor: Fulano {i}</div><a class="pagina-link" href="{page_urls[0]}">1</a>'
+        )
+    return pages
 
 @pytest.mark.asyncio
 async def test_tjsp_scraper_initialization():
@@ -26,3 +141,360 @@ async def test_extract_parties():
     assert len(parties) == 2
     assert "João Silva" in parties[0]
     assert "Maria Santos" in parties[1]
+
+@pytest.mark.asyncio
+async def test_scraper_reuses_shared_client():
+    """Test scraper keeps one pooled client for its lifetime"""
+    async with TJSPScraper() as scraper:
+        client = scraper.client
+        assert scraper.client is client
+        assert not client.is_closed
+    assert client.is_closed
+
+@pytest.mark.asyncio
+async def test_engine_fetches_every_page_with_bounded_concurrency():
+    """Test engine follows pagination links concurrently up to the limit"""
+    target_date = date(2024, 3, 1)
+    scraper = FakeTJSPScraper({})
+    scraper.pages = make_diario_pages(scraper, target_date, 20)
+    
+    pages = [page async for page in ScrapingEngine(scraper, concurrency=4).iter_pages(target_date)]
+    
+    assert len(pages) == 21  # índice + 20 páginas, sem repetir links já vistos
+    assert all(page.error is None for page in pages)
+    publications = [pub for page in pages for pub in page.publications]
+    assert len(publications) == 20
+    assert all(pub.publication_date == target_date for pub in publications)
+    assert 1 < scraper.max_in_flight <= 4
+
+@pytest.mark.asyncio
+async def test_engine_records_page_errors():
+    """Test a failing page does not abort the rest of the day"""
+    target_date = date(2024, 3, 1)
+    scraper = FakeTJSPScraper({})
+    scraper.pages = make_diario_pages(scraper, target_date, 3)
+    del scraper.pages[f"{scraper.BASE_URL}/pagina/1"]
+    
+    publications = await scraper.scrape_date(target_date)
+    assert len(publications) == 2
+
+@pytest.mark.asyncio
+async def test_iter_date_streams_publications():
+    """Test iter_date yields publications page by page"""
+    target_date = date(2024, 3, 1)
+    scraper = FakeTJSPScraper({})
+    scraper.pages = make_diario_pages(scraper, target_date, 30)
+    
+    stream = scraper.iter_date(target_date)
+    first = await stream.__anext__()
+    assert first.tribunal == "TJSP"
+    # A primeira publicação chega antes de todas as páginas serem baixadas
+    assert len(scraper.fetched) < len(scraper.pages)
+    remaining = [pub async for pub in stream]
+    assert len(remaining) == 29
+
+def test_tjsp_parse_page_fixture():
+    """Test TJSP page parsing over a recorded diário page"""
+    scraper = TJSPScraper()
+    html = (FIXTURES / "tjsp_diario.html").read_text(encoding="utf-8")
+    parsed = scraper.parse_page(html, date(2024, 3, 1), scraper.build_url(date(2024, 3, 1)))
+    
+    assert len(parsed.publications) == 40
+    first = parsed.publications[0]
+    assert first.process_number == "9267575-94.2024.8.26.0405"
+    assert first.parties == ["Município de São Paulo", "Maria Aparecida Santos"]
+    assert first.content.startswith("DECISÃOProcesso nº9267575-94.2024.8.26.0405")
+    assert len(parsed.links) == 4
+    assert all(link.startswith(scraper.BASE_URL) for link in parsed.links)
+
+def test_tjrj_parse_page_fixture():
+    """Test TJRJ page parsing over a recorded diário page"""
+    scraper = TJRJScraper()
+    html = (FIXTURES / "tjrj_diario.html").read_text(encoding="utf-8")
+    parsed = scraper.parse_page(html, date(2024, 3, 1), scraper.build_url(date(2024, 3, 1)))
+    
+    assert len(parsed.publications) == 40
+    assert {pub.publication_type for pub in parsed.publications} == {
+        "DECISAO", "DESPACHO", "INTIMACAO", "EDITAL"
+    }
+    assert all(pub.process_number for pub in parsed.publications)
+    assert len(parsed.links) == 3
+
+def test_iter_matches_releases_parsed_elements():
+    """Test streaming parse keeps nested matches intact but drops everything already consumed"""
+    html = "<html><body><div class='caderno'>" + "".join(
+        f"<p>ruído {i}</p><div class='pub'><span>Processo {i}</span></div>" for i in range(2000)
+    ) + "</div></body></html>"
+    selectors = {"pub": ("div", "pub"), "caderno": ("div", "caderno")}
+    
+    seen = 0
+    for name, element in iter_matches(html, selectors):
+        if name == "pub":
+            # Dentro do caderno ainda aberto: os irmãos já entregues continuam lá
+            assert element.findtext("span") == f"Processo {seen}"
+            seen += 1
+        else:
+            assert len(element) == 4000
+    assert seen == 2000
+    
+    flat = "<html><body>" + "".join(
+        f"<p>ruído {i}</p><div class='pub'><span>Processo {i}</span></div>" for i in range(2000)
+    ) + "</body></html>"
+    for index, (_, element) in enumerate(iter_matches(flat, {"pub": ("div", "pub")})):
+        assert element.findtext("span") == f"Processo {index}"
+        # Dos irmãos anteriores (entregues ou não) só resta o último, ainda não removido
+        assert len(list(element.itersiblings(preceding=True))) <= 1
+
+@pytest.mark.asyncio
+async def test_engine_parses_in_process_pool():
+    """Test parsing offloaded to a process pool matches inline parsing"""
+    from concurrent.futures import ProcessPoolExecutor
+    
+    target_date = date(2024, 3, 1)
+    scraper = FakeTJSPScraper({})
+    scraper.pages = make_diario_pages(scraper, target_date, 5)
+    
+    inline = [page async for page in ScrapingEngine(scraper, executor=None).iter_pages(target_date)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        pooled = [page async for page in ScrapingEngine(scraper, executor=executor).iter_pages(target_date)]
+    
+    def by_url(pages):
+        return {page.url: page.publications for page in pages}
+    
+    assert by_url(pooled) == by_url(inline)
+
+def _parse_under_daemon(queue):
+    """Roda num processo daemon, como as tasks do pool prefork do Celery"""
+    from app.scrapers import engine
+    engine._parse_executor = None  # herdado do fork
+    
+    async def parse():
+        scraper = TJRJScraper()
+        html = (FIXTURES / "tjrj_diario.html").read_text(encoding="utf-8")
+        return await ScrapingEngine(scraper)._parse(html, date(2024, 3, 1), scraper.build_url(date(2024, 3, 1)))
+    
+    parsed = asyncio.run(parse())
+    queue.put((type(engine.get_parse_executor()).__name__, len(parsed.publications)))
+    engine.shutdown_parse_executor()
+
+
+def test_parse_executor_under_daemon_process():
+    """Test a daemonic worker process parses in a thread pool instead of failing to start a process pool"""
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_parse_under_daemon, args=(queue,), daemon=True)
+    process.start()
+    executor, publications = queue.get(timeout=30)
+    process.join(timeout=30)
+    
+    assert executor == "ThreadPoolExecutor"
+    assert publications > 0
+
+def test_cnj_check_digits():
+    """Test CNJ mod 97 check digit validation"""
+    assert is_valid_cnj("9267575-94.2024.8.26.0405")
+    assert not is_valid_cnj("9267575-95.2024.8.26.0405")
+    assert not is_valid_cnj("1234567-12.2024.8.26.0100")
+
+def test_extract_single_pass():
+    """Test one-pass extraction of numbers, parties, lawyers and type hint"""
+    text = (
+        "SENTENÇA Processo 1234567-12.2024.8.26.0100 (apenso 9267575-94.2024.8.26.0405)\n"
+        "Requerente: Banco Itaú Unibanco S.A.\n"
+        "Requerido: José da Silva\n"
+        "Advogado: Renato Augusto Pires - OAB/RJ 201.334"
+    )
+    info = extract(text)
+    
+    assert info.process_numbers == ["1234567-12.2024.8.26.0100", "9267575-94.2024.8.26.0405"]
+    assert info.process_number == "9267575-94.2024.8.26.0405"  # primeiro com DV válido
+    assert info.parties == ["Banco Itaú Unibanco S.A.", "José da Silva"]
+    assert info.lawyers == ["Renato Augusto Pires"]
+    assert info.oab_numbers == ["RJ 201334"]
+    assert info.publication_type == "DECISAO"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("etags", [True, False])
+async def test_engine_skips_unchanged_pages(etags):
+    """Test re-scraping a day only parses and yields pages that changed"""
+    target_date = date(2024, 3, 1)
+    scraper = ConditionalFakeScraper({}, etags=etags)
+    scraper.pages = make_diario_pages(scraper, target_date, 5)
+    state = PageStateStore("TJSP", target_date)
+    
+    engine = ScrapingEngine(scraper, executor=None, state=state)
+    first = [pub async for page in engine.iter_pages(target_date) for pub in page.publications]
+    assert len(first) == 5 and state.changed == 6
+    
+    changed_url = f"{scraper.BASE_URL}/pagina/3"
+    scraper.pages[changed_url] = scraper.pages[changed_url].replace("Fulano 3", "Beltrano 3")
+    scraper.fetched, scraper.parsed = [], []
+    state = PageStateStore("TJSP", target_date, {url: state.get(url) for url in scraper.pages})
+    
+    pages = [page async for page in ScrapingEngine(scraper, executor=None, state=state).iter_pages(target_date)]
+    assert sum(page.unchanged for page in pages) == 5
+    assert [pub.parties for page in pages for pub in page.publications] == [["Beltrano"]]
+    # Todas as páginas são consultadas (pelos links guardados), só a alterada é parseada
+    assert len(scraper.fetched) == 6
+    assert scraper.parsed == [changed_url]
+    assert (state.changed, state.unchanged) == (1, 5)
+
+@pytest.mark.asyncio
+async def test_fetch_honors_retry_after():
+    """Test a 429 with Retry-After holds the host for the requested time and halves the rate"""
+    responses = {1: (429, 0, {"Retry-After": "1"})}
+    async with FakeTribunalServer(lambda n: responses.get(n, (200, 0, {}))) as server:
+        scraper, throttle = throttled_scraper(server, rate=10, increase=1)
+        async with scraper:
+            assert await scraper.fetch_page(server.url) == "<html></html>"
+    
+    assert len(server.hits) == 2
+    assert server.hits[1] - server.hits[0] >= 0.95
+    assert throttle.rate == 6  # 10 * 0.5 no 429, +1 na resposta seguinte
+
+@pytest.mark.asyncio
+async def test_throttle_adapts_rate_to_latency():
+    """Test slow responses cut the rate multiplicatively and fast ones raise it additively"""
+    async with FakeTribunalServer(lambda n: (200, 0.06 if n <= 3 else 0, {})) as server:
+        scraper, throttle = throttled_scraper(
+            server, rate=20, min_rate=5, max_rate=8, increase=1, latency_target=0.03
+        )
+        async with scraper:
+            for _ in range(3):
+                await scraper.fetch_page(server.url)
+            assert throttle.rate == 5  # 20 -> 10 -> 5, limitado por min_rate
+            
+            for _ in range(4):
+                await scraper.fetch_page(server.url)
+            assert throttle.rate == 8  # +1 por resposta rápida, até max_rate
+    
+    # Depois de uma redução a requisição seguinte espera 1/taxa (0.2 s a 5 req/s)
+    assert server.hits[2] - server.hits[1] >= 0.2
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_recovers():
+    """Test consecutive 5xx open the circuit, later calls fail without hitting the host, and a probe closes it"""
+    outage = True
+    async with FakeTribunalServer(lambda n: (503, 0, {}) if outage else (200, 0, {})) as server:
+        scraper, throttle = throttled_scraper(server, rate=100, failures=3, cooldown=0.2)
+        async with scraper:
+            with pytest.raises(httpx.HTTPStatusError):
+                await scraper.fetch_page(server.url, retry=3)
+            assert len(server.hits) == 3
+            
+            started = time.monotonic()
+            with pytest.raises(CircuitOpenError):
+                await scraper.fetch_page(server.url)
+            assert time.monotonic() - started < 0.05
+            assert len(server.hits) == 3
+            
+            outage = False
+            await asyncio.sleep(0.25)
+            assert await scraper.fetch_page(server.url) == "<html></html>"
+            await scraper.fetch_page(server.url)  # circuito fechado de novo
+    
+    assert len(server.hits) == 5
+
+def test_registry_imports_tribunal_on_demand():
+    """Test listing tribunals imports no parser and a lookup imports only that tribunal's module"""
+    code = (
+        "import sys\n"
+        "from app.scrapers.registry import available_tribunals, get_scraper_class\n"
+        "loaded = lambda: sorted(m for m in sys.modules if m.startswith('app.scrapers.tribunals.'))\n"
+        "print(available_tribunals(), loaded())\n"
+        "get_scraper_class('tjrj')\n"
+        "print(loaded())\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.splitlines() == ["['TJRJ', 'TJSP'] []", "['app.scrapers.tribunals.tjrj']"]
+
+def test_registry_dispatch():
+    """Test scrapers are created by tribunal code and unknown codes are rejected"""
+    assert {"TJSP", "TJRJ"} <= set(available_tribunals())
+    assert get_scraper_class("TJSP") is TJSPScraper
+    scraper = create_scraper("tjrj")
+    assert isinstance(scraper, TJRJScraper) and scraper.tribunal_code == "TJRJ"
+    
+    for code in ("TJXX", "../tjsp", "base"):
+        with pytest.raises(UnknownTribunalError):
+            get_scraper_class(code)
+    with pytest.raises(ValueError):
+        register("TJSP")(FakeTJSPScraper)
+
+@pytest.mark.asyncio
+async def test_fetch_conditional_accepts_not_modified():
+    """Test the real HTTP path: validators are sent, 304s count as unchanged pages, not failures"""
+    target_date = date(2024, 3, 1)
+    scraper = TJSPScraper()
+    pages = make_diario_pages(scraper, target_date, 3)
+    bodies = {str(httpx.URL(url)): html.encode() for url, html in pages.items()}
+    requests = []
+    
+    def respond(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        body = bodies[str(request.url)]
+        etag = f'"{body_checksum(body)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body, headers={"ETag": etag})
+    
+    host = httpx.URL(scraper.BASE_URL).netloc.decode()
+    scraper.throttles[host] = Throttle(host, rate=1000)
+    scraper._client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    async with scraper:
+        state = PageStateStore("TJSP", target_date)
+        first = [page async for page in ScrapingEngine(scraper, executor=None, state=state).iter_pages(target_date)]
+        assert sum(len(page.publications) for page in first) == 3
+        
+        requests.clear()
+        state = PageStateStore("TJSP", target_date, {url: state.get(url) for url in pages})
+        second = [page async for page in ScrapingEngine(scraper, executor=None, state=state).iter_pages(target_date)]
+    
+    assert all(page.error is None and page.unchanged for page in second)
+    assert len(second) == 4 and len(requests) == 4  # sem novas tentativas nos 304
+    assert all(request.headers.get("If-None-Match") for request in requests)
+
+
+@pytest.mark.asyncio
+async def test_failed_pages_are_reported():
+    """Test a linked page answering 500 is reported as failed, and a failed index page aborts the day"""
+    target_date = date(2024, 3, 1)
+    scraper = TJSPScraper()
+    pages = make_diario_pages(scraper, target_date, 3)
+    bodies = {str(httpx.URL(url)): html.encode() for url, html in pages.items()}
+    broken_page = f"{scraper.BASE_URL}/pagina/1"
+    failing = {str(httpx.URL(broken_page))}
+    
+    def respond(request: httpx.Request) -> httpx.Response:
+        if str(request.url) in failing:
+            return httpx.Response(500)
+        return httpx.Response(200, content=bodies[str(request.url)])
+    
+    host = httpx.URL(scraper.BASE_URL).netloc.decode()
+    scraper._client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    async with scraper:
+        scraper.throttles[host] = Throttle(host, rate=1000)
+        failed = []
+        publications = [pub async for pub in scraper.iter_date(target_date, failed=failed)]
+        assert len(publications) == 2
+        assert [page.url for page in failed] == [broken_page]
+        assert failed[0].error.response.status_code == 500
+        
+        scraper.throttles[host] = Throttle(host, rate=1000)
+        failing = {str(httpx.URL(scraper.build_url(target_date)))}
+        with pytest.raises(IndexPageError):
+            [pub async for pub in scraper.iter_date(target_date)]
+
+
+def test_scrape_task_retries_when_index_page_fails(monkeypatch):
+    """Test the scrape task is retried, then fails, instead of reporting an empty day as success"""
+    calls = []
+    
+    async def run_scraping(tribunal_code, target_date):
+        calls.append(target_date)
+        raise IndexPageError("Falha na página inicial do diário")
+    
+    monkeypatch.setattr(tasks, "run_scraping", run_scraping)
+    result = tasks.scrape_tribunal_task.apply(args=("TJSP", "2024-03-01"))
+    assert isinstance(result.result, IndexPageError)
+    assert len(calls) == tasks.settings.SCRAPER_INDEX_RETRIES + 1
@@ -1,8 +1,34 @@
+import asyncio
+import logging
+import pickle
+import subprocess
+import sys
 import pytest
-from datetime import date
+from datetime import date, datetime
 from uuid import uuid4
-from app.services.publication_service import PublicationService
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from redis import asyncio as aioredis
+from app.config import get_settings
+from app.models.publication import (
+    Monitor, MonitorBackfillPartition, MonitorMatch, Publication, TribunalDailyStats,
+)
+from app.services.backfill_service import BackfillService, month_slices, shift_months
+from app.services.cache_service import CacheService, ingest_tags, tribunal_tag
+from app.services.cache_codec import CODECS, get_codec
+from app.services.local_cache import LocalCache
+from app.services.monitor_index import MonitorIndex
+from app.services.monitor_matcher import MonitorMatcher
+from app.services.partition_service import PartitionService
+from app.services.count_service import CountService, Explain, TotalCount
+from app.services.dedup_service import BloomFilter, SeenPublications
+from app.services.publication_service import KEYSET_ORDER, PublicationService
+from app.services.stats_service import StatsService
+from app.utils.text import content_fingerprint
 from app.schemas.publication import PublicationCreate, PublicationFilter
+from app.workers.tasks import _current_matcher
+from app.api.routes.monitoring import list_monitor_matches
 
 @pytest.mark.asyncio
 async def test_create_publication(db_session):
@@ -56,4 +82,748 @@ async def test_get_publications_with_filters(db_session):
     
     publications, total = await service.get_publications(filters)
     assert isinstance(publications, list)
-    assert isinstance(total, int)
\ No newline at end of file
+    assert isinstance(total, int)
+
+@pytest.mark.asyncio
+async def test_bulk_create_skips_duplicates(db_session):
+    """Test set-based bulk ingest ignores natural key duplicates"""
+    service = PublicationService(db_session)
+    
+    publications = [
+        PublicationCreate(
+            tribunal="TJSP",
+            publication_date=date(2024, 3, 1),
+            process_number=f"000000{i}-00.2024.8.26.0100",
+            content=f"Publicação {i}",
+            publication_type="DESPACHO"
+        )
+        for i in range(3)
+    ]
+    
+    created = await service.bulk_create(publications)
+    assert created == 3
+    
+    # Reingestão com uma publicação nova
+    publications.append(publications[0].model_copy(update={"process_number": "0000009-00.2024.8.26.0100"}))
+    created = await service.bulk_create(publications)
+    assert created == 1
+
+
+@pytest.mark.asyncio
+async def test_copy_create_skips_duplicates(db_session):
+    """Test COPY staging ingest merges with natural key deduplication"""
+    service = PublicationService(db_session)
+    
+    publications = [
+        PublicationCreate(
+            tribunal="TJRJ",
+            publication_date=date(2024, 3, 2),
+            process_number=f"000000{i}-00.2024.8.19.0001",
+            content=f"Publicação {i}",
+            parties=["Autor", "Réu"],
+        )
+        for i in range(5)
+    ]
+    
+    assert await service.copy_create(publications) == 5
+    assert await service.copy_create(publications) == 0
+
+
+@pytest.mark.asyncio
+async def test_daily_stats_rollup_follows_ingest(db_session):
+    """Test both ingest paths keep tribunal_daily_stats in sync and rebuild matches"""
+    service = PublicationService(db_session)
+    day = date(2024, 4, 10)
+    
+    def make(tribunal: str, count: int, offset: int = 0):
+        return [
+            PublicationCreate(
+                tribunal=tribunal,
+                publication_date=day,
+                process_number=f"{offset + i:07d}-00.2024.8.26.0500",
+                content=f"Publicação {offset + i}",
+            )
+            for i in range(count)
+        ]
+    
+    async def totals():
+        result = await db_session.execute(
+            select(TribunalDailyStats.tribunal, TribunalDailyStats.total)
+            .where(TribunalDailyStats.publication_date == day)
+        )
+        return dict(result.tuples())
+    
+    assert await service.bulk_create(make("TJSP", 3)) == 3
+    assert await service.bulk_create(make("TJSP", 4)) == 1
+    assert await service.copy_create(make("TJMG", 5)) == 5
+    assert await service.copy_create(make("TJSP", 2, offset=10)) == 2
+    assert await totals() == {"TJSP": 6, "TJMG": 5}
+    
+    await db_session.execute(delete(TribunalDailyStats).where(TribunalDailyStats.publication_date == day))
+    await db_session.commit()
+    assert await StatsService(db_session).rebuild(since=day, until=day) == 2
+    assert await totals() == {"TJSP": 6, "TJMG": 5}
+
+
+def test_monitor_matcher_folds_and_scopes_by_tribunal():
+    """Test keywords match whole words, ignoring accents and case, within each monitor's tribunals"""
+    everywhere, tjsp_only = uuid4(), uuid4()
+    matcher = MonitorMatcher([
+        (everywhere, ["Banco Itaú", "tutela"], None),
+        (tjsp_only, ["Petrobras", "tutela  antecipada"], ["TJSP"]),
+    ])
+    
+    text = "Autor: BANCO ITAU S.A. requer TUTELA Antecipada contra petrobrasx"
+    assert matcher.match("TJSP", text) == {
+        everywhere: ["Banco Itaú", "tutela"],
+        tjsp_only: ["tutela  antecipada"],
+    }
+    assert matcher.match("TJRJ", text) == {everywhere: ["Banco Itaú", "tutela"]}
+    assert matcher.match("TJRJ", "Tutelar interesses") == {}
+    assert MonitorMatcher([]).match("TJSP", text) == {}
+
+
+def test_monitor_matcher_incremental_updates_match_full_rebuild():
+    """Test upserts/removals after compilation give the same hits as a fresh matcher, also after pickling"""
+    ids = [uuid4() for _ in range(4)]
+    matcher = MonitorMatcher([(ids[0], ["penhora"], None), (ids[1], ["leilão"], ["TJSP"])], version=7)
+    text = "Penhora e leilao do imovel; alvara expedido ao credor"
+    matcher.compile()
+    
+    matcher.upsert(ids[2], ["alvará"], None)
+    matcher.upsert(ids[1], ["credor"], ["TJSP"])
+    matcher.upsert(ids[3], ["imóvel"], ["TJRJ"])
+    matcher.remove(ids[0])
+    
+    fresh = MonitorMatcher([(ids[2], ["alvará"], None), (ids[1], ["credor"], ["TJSP"]), (ids[3], ["imóvel"], ["TJRJ"])])
+    restored = pickle.loads(pickle.dumps(matcher))
+    for tribunal in ("TJSP", "TJRJ", "TJMG"):
+        assert matcher.match(tribunal, text) == fresh.match(tribunal, text)
+        assert restored.match(tribunal, text) == fresh.match(tribunal, text)
+    assert restored.version == 7
+    assert matcher.match("TJSP", text) == {ids[2]: ["alvará"], ids[1]: ["credor"]}
+
+
+@pytest.mark.asyncio
+async def test_ingest_records_monitor_matches(db_session):
+    """Test ingest writes monitor_matches only for newly inserted publications"""
+    monitor = Monitor(user_id=uuid4(), keywords=["Execução Fiscal"], tribunals=["TJSP"])
+    db_session.add(monitor)
+    await db_session.commit()
+    
+    service = PublicationService(db_session, matcher=await MonitorMatcher.load(db_session))
+    publications = [
+        PublicationCreate(
+            tribunal=tribunal,
+            publication_date=date(2024, 5, 2),
+            process_number=f"{i:07d}-00.2024.8.26.0600",
+            content=content,
+        )
+        for i, (tribunal, content) in enumerate([
+            ("TJSP", "Vistos. EXECUCAO FISCAL ajuizada pela Fazenda"),
+            ("TJSP", "Despacho de mero expediente"),
+            ("TJRJ", "Execução fiscal em outro tribunal"),
+        ])
+    ]
+    
+    result = await service.ingest(publications)
+    assert (result.inserted, result.matches) == (3, 1)
+    assert (await service.ingest(publications)).matches == 0
+    
+    matches = (await db_session.execute(
+        select(MonitorMatch).where(MonitorMatch.monitor_id == monitor.id)
+    )).scalars().all()
+    assert [match.keywords for match in matches] == [["Execução Fiscal"]]
+
+
+@pytest.mark.asyncio
+async def test_monitor_index_rebuild_recovers_lost_change(db_session):
+    """Test the scheduled rebuild delivers a monitor change whose Redis publish was lost"""
+    redis = aioredis.from_url(get_settings().REDIS_URL)
+    worker = MonitorIndex()
+    keyword = f"usucapião {uuid4().hex}"
+    try:
+        await worker.refresh(redis, db_session)
+        monitor = Monitor(user_id=uuid4(), keywords=[keyword], tribunals=None)
+        db_session.add(monitor)
+        await db_session.commit()
+        
+        # Sem publish_monitor_change: o worker segue sem o monitoramento
+        assert (await worker.refresh(redis, db_session)).match("TJSP", keyword) == {}
+        await MonitorIndex().rebuild(redis, db_session, bump=True)
+        assert (await worker.refresh(redis, db_session)).match("TJSP", keyword) == {monitor.id: [keyword]}
+    finally:
+        await redis.close()
+
+
+class UnavailableRedis:
+    """Redis fora do ar: toda operação falha"""
+    
+    def pipeline(self, *args, **kwargs):
+        raise ConnectionError("Redis indisponível")
+
+
+@pytest.mark.asyncio
+async def test_monitor_index_refresh_failures_are_reported(monkeypatch, caplog):
+    """Test ingest keeps the last matcher when the index cannot refresh, but logs and counts it"""
+    index = MonitorIndex()
+    index.matcher = MonitorMatcher([(uuid4(), ["penhora"], None)], version=3)
+    monkeypatch.setattr("app.workers.tasks.monitor_index", index)
+    
+    with caplog.at_level(logging.WARNING, logger="app.workers.tasks"):
+        assert await _current_matcher(UnavailableRedis(), None) is index.matcher
+        assert await _current_matcher(UnavailableRedis(), None) is index.matcher
+    
+    assert (index.failures, index.stale_for) == (2, None)
+    assert "2 falhas seguidas" in caplog.records[-1].getMessage()
+
+
+def test_backfill_month_slices():
+    """Test backfill periods are split at month boundaries"""
+    assert shift_months(date(2024, 3, 31), -1) == date(2024, 2, 29)
+    assert shift_months(date(2024, 1, 15), -13) == date(2022, 12, 15)
+    assert month_slices(date(2024, 1, 20), date(2024, 3, 5)) == [
+        (date(2024, 1, 20), date(2024, 2, 1)),
+        (date(2024, 2, 1), date(2024, 3, 1)),
+        (date(2024, 3, 1), date(2024, 3, 6)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_finds_historical_matches_and_resumes(db_session, engine):
+    """Test backfill matches past publications per month and resumes from the checkpoint"""
+    await PublicationService(db_session).bulk_create([
+        PublicationCreate(
+            tribunal="TJSP",
+            publication_date=publication_date,
+            process_number=f"{i:07d}-00.2023.8.26.0700",
+            content=content,
+        )
+        for i, (publication_date, content) in enumerate([
+            (date(2023, 11, 10), "Penhora on-line deferida"),
+            (date(2023, 12, 4), "Determino a PENHORA ONLINE de ativos"),
+            (date(2023, 12, 20), "Penhora on-line via sistema"),
+            (date(2023, 12, 21), "Penhoras diversas"),
+        ])
+    ])
+    monitor = Monitor(user_id=uuid4(), keywords=["penhora on-line", "penhora online"], tribunals=["TJSP"])
+    db_session.add(monitor)
+    await db_session.commit()
+    
+    service = BackfillService(db_session)
+    backfill = await service.create(monitor, 2, until=date(2023, 12, 31))
+    partitions = (await db_session.execute(
+        select(MonitorBackfillPartition)
+        .where(MonitorBackfillPartition.backfill_id == backfill.id)
+        .order_by(MonitorBackfillPartition.start_date)
+    )).scalars().all()
+    assert [p.start_date for p in partitions] == [date(2023, 10, 31), date(2023, 11, 1), date(2023, 12, 1)]
+    
+    # Fatia de dezembro interrompida depois da primeira publicação
+    first = (await db_session.execute(
+        select(Publication).where(Publication.publication_date == date(2023, 12, 4))
+    )).scalar_one()
+    december = partitions[-1]
+    december.status, december.cursor_date, december.cursor_id = "running", first.publication_date, first.id
+    december.scanned, december.matches = 1, 0
+    await db_session.commit()
+    assert (await service.progress(backfill.id)).status == "running"
+    
+    # Em execução com checkpoint recente: nem retomada nem redelivery a percorrem de novo
+    assert december.id not in await service.pending_partitions(backfill.id)
+    async with AsyncSession(engine) as reader:
+        assert (await service.run_partition(december.id, reader)).scanned == 1
+    
+    # Worker que caiu: a fatia segue "running", mas sem checkpoint recente
+    await db_session.execute(
+        update(MonitorBackfillPartition)
+        .where(MonitorBackfillPartition.id == december.id)
+        .values(updated_at=datetime(2000, 1, 1))
+    )
+    await db_session.commit()
+    assert (await service.progress(backfill.id)).status == "stalled"
+    
+    async with AsyncSession(engine) as reader:
+        for partition_id in await service.pending_partitions(backfill.id):
+            await service.run_partition(partition_id, reader)
+    
+    progress = await service.progress(backfill.id)
+    assert (progress.status, progress.partitions_done) == ("done", 3)
+    # 10/11 e, de dezembro, só o que vem depois do checkpoint (20/12 pelo índice)
+    assert progress.matches == 2
+    assert not await service.pending_partitions(backfill.id)
+    
+    matches = (await db_session.execute(
+        select(MonitorMatch.publication_date).where(MonitorMatch.monitor_id == monitor.id)
+    )).scalars().all()
+    assert sorted(matches) == [date(2023, 11, 10), date(2023, 12, 20)]
+
+
+@pytest.mark.asyncio
+async def test_publication_partitions_move_rows_out_of_default(db_session):
+    """Test creating a month partition moves its rows out of the default partition"""
+    service = PublicationService(db_session)
+    await service.bulk_create([
+        PublicationCreate(
+            tribunal="TJPR",
+            publication_date=date(2019, 6, day),
+            process_number=f"{day:07d}-00.2019.8.16.0001",
+            content="Intimação de penhora",
+        )
+        for day in (3, 28)
+    ])
+    
+    partitions = PartitionService(db_session)
+    assert "publications_2019_06" not in [p.name for p in await partitions.partitions()]
+    await db_session.execute(text("SELECT create_publication_partition('2019-06-15')"))
+    await db_session.commit()
+    
+    names = [p.name for p in await partitions.partitions()]
+    assert "publications_2019_06" in names and names[-1] == "publications_default"
+    moved = (await db_session.execute(text(
+        "SELECT count(*) FROM publications_2019_06 WHERE search_vector @@ to_tsquery('pt_unaccent', 'penhora')"
+    ))).scalar()
+    assert moved == 2
+    
+    filters = PublicationFilter(
+        tribunal="TJPR", date_from=date(2019, 6, 1), date_to=date(2019, 6, 30), count_strategy="exact"
+    )
+    assert (await service.get_publications(filters))[1] == 2
+    
+    ahead = await partitions.ensure(2)
+    assert len(ahead) == 3 and ahead[0] == date.today().strftime("publications_%Y_%m")
+    
+    # Com a partição padrão anexada: DETACH comum, não CONCURRENTLY
+    assert "publications_2019_06" in await partitions.detach_before(date(2019, 7, 1))
+    names = [p.name for p in await partitions.partitions()]
+    assert "publications_2019_06" not in names and "publications_default" in names
+    assert (await service.get_publications(filters))[1] == 0
+    assert (await db_session.execute(text("SELECT count(*) FROM publications_2019_06"))).scalar() == 2
+    await db_session.execute(text("DROP TABLE publications_2019_06"))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_monitor_matches_keyset_polling(db_session):
+    """Test polling with next_cursor sees every match, including a chunk sharing one created_at"""
+    monitor_id = uuid4()
+    now = datetime(2024, 3, 1, 12, 0)
+    
+    def matches(count: int, created_at: datetime) -> list:
+        return [
+            MonitorMatch(
+                monitor_id=monitor_id, publication_id=uuid4(), tribunal="TJSP",
+                publication_date=date(2024, 3, 1), keywords=["penhora"], created_at=created_at
+            )
+            for _ in range(count)
+        ]
+    
+    db_session.add_all(matches(5, now))
+    await db_session.commit()
+    
+    seen = []
+    cursor = None
+    while True:
+        page = await list_monitor_matches(monitor_id, cursor=cursor, limit=2, db=db_session)
+        seen += [item.publication_id for item in page.items]
+        cursor = page.next_cursor
+        if not page.has_more:
+            break
+    assert len(seen) == len(set(seen)) == 5
+    
+    # Um bloco seguinte aparece inteiro a partir do último cursor
+    db_session.add_all(matches(3, now.replace(second=1)))
+    await db_session.commit()
+    page = await list_monitor_matches(monitor_id, cursor=cursor, limit=50, db=db_session)
+    assert len(page.items) == 3 and not page.has_more
+    assert not set(item.publication_id for item in page.items) & set(seen)
+    
+    empty = await list_monitor_matches(monitor_id, cursor=page.next_cursor, limit=50, db=db_session)
+    assert empty.items == [] and empty.next_cursor == page.next_cursor
+
+
+def test_keyset_order_is_indexed_with_and_without_tribunal():
+    """Test both cursor walk shapes (filtered by tribunal or not) have an index matching KEYSET_ORDER"""
+    order = [column.element.name for column in KEYSET_ORDER]
+    indexes = [[column.name for column in index.columns] for index in Publication.__table__.indexes]
+    assert ["tribunal", *order] in indexes
+    assert order in indexes
+
+
+def test_models_do_not_import_scrapers():
+    """Test the ORM models get the fingerprint helper without depending on the scrapers package"""
+    code = "import sys, app.models.publication; print('app.scrapers' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
+
+def test_content_fingerprint_and_bloom_filter():
+    """Test fingerprints ignore formatting noise and the Bloom filter has no false negatives"""
+    edital = "EDITAL DE CITAÇÃO\n\nPrazo de   20 dias"
+    assert content_fingerprint(edital) == content_fingerprint("edital de citacao prazo de 20 dias")
+    assert content_fingerprint(edital) != content_fingerprint(edital, "0000001-00.2024.8.26.0100")
+    
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    added = [content_fingerprint(f"publicação {i}") for i in range(1000)]
+    for fingerprint in added:
+        bloom.add(fingerprint)
+    assert all(fingerprint in bloom for fingerprint in added)
+    
+    false_positives = sum(content_fingerprint(f"outra {i}") in bloom for i in range(10000))
+    assert false_positives < 300
+    assert not bloom.full
+
+
+@pytest.mark.asyncio
+async def test_ingest_deduplicates_publications_without_process_number(db_session):
+    """Test re-ingesting editais without process_number is skipped by fingerprint"""
+    publications = [
+        PublicationCreate(
+            tribunal="TJBA",
+            publication_date=date(2024, 7, 1),
+            content=f"EDITAL DE LEILÃO nº {i}. Ficam intimados os interessados.",
+        )
+        for i in range(3)
+    ]
+    
+    first = await PublicationService(db_session).ingest(publications)
+    assert first.inserted == 3
+    
+    # Sem pré-filtro, o banco recusa pela restrição uq_pub_content_hash
+    assert await PublicationService(db_session).bulk_create(publications) == 0
+    
+    seen = SeenPublications()
+    service = PublicationService(db_session, seen=seen)
+    republished = [pub.model_copy(update={"content": pub.content.upper()}) for pub in publications]
+    result = await service.ingest(republished + [publications[0]])
+    assert (result.inserted, result.known) == (0, 4)
+    
+    new = publications[0].model_copy(update={"content": "EDITAL DE PRAÇA. Novo leilão."})
+    result = await service.ingest([new, new])
+    assert (result.inserted, result.known) == (1, 1)
+    assert (await service.ingest([new])).known == 1
+
+
+@pytest.mark.asyncio
+async def test_fulltext_search_ignores_accents_and_ranks(db_session):
+    """Test full-text search mode matches unaccented stems and orders by rank"""
+    service = PublicationService(db_session)
+    
+    await service.bulk_create([
+        PublicationCreate(
+            tribunal="TJMG",
+            publication_date=date(2024, 3, 3),
+            process_number="0000001-00.2024.8.13.0001",
+            content="Intimação. Tutela de urgência deferida; cumpra-se a tutela.",
+        ),
+        PublicationCreate(
+            tribunal="TJMG",
+            publication_date=date(2024, 3, 3),
+            process_number="0000002-00.2024.8.13.0001",
+            content="Despacho. Pedido de tutela será apreciado após a contestação.",
+        ),
+        PublicationCreate(
+            tribunal="TJMG",
+            publication_date=date(2024, 3, 3),
+            process_number="0000003-00.2024.8.13.0001",
+            content="Edital de citação.",
+        ),
+    ])
+    
+    filters = PublicationFilter(tribunal="TJMG", search_query="tutelas urgencia")
+    publications, total = await service.get_publications(filters)
+    assert total == 1
+    assert publications[0].process_number == "0000001-00.2024.8.13.0001"
+    
+    filters = PublicationFilter(tribunal="TJMG", search_query="tutela -edital")
+    publications, total = await service.get_publications(filters)
+    assert total == 2
+    assert publications[0].process_number == "0000001-00.2024.8.13.0001"
+
+
+@pytest.mark.asyncio
+async def test_process_number_and_party_filters(db_session):
+    """Test exact CNJ lookup, partial process number and accent-insensitive party search"""
+    service = PublicationService(db_session)
+    
+    await service.bulk_create([
+        PublicationCreate(
+            tribunal="TJPR",
+            publication_date=date(2024, 3, 4),
+            process_number="0001234-55.2024.8.16.0001",
+            content="Despacho",
+            parties=["Banco Itaú Unibanco S.A.", "José Conceição"],
+        ),
+        PublicationCreate(
+            tribunal="TJPR",
+            publication_date=date(2024, 3, 4),
+            process_number="0009876-10.2024.8.16.0001",
+            content="Despacho",
+            parties=["Maria Souza"],
+        ),
+    ])
+    
+    for process_number, expected in [
+        ("0001234-55.2024.8.16.0001", 1),
+        ("00012345520248160001", 1),
+        ("2024.8.16", 2),
+    ]:
+        filters = PublicationFilter(tribunal="TJPR", process_number=process_number)
+        _, total = await service.get_publications(filters)
+        assert total == expected
+    
+    publications, total = await service.get_publications(PublicationFilter(tribunal="TJPR", party="jose concei"))
+    assert total == 1
+    assert publications[0].process_number == "0001234-55.2024.8.16.0001"
+
+
+@pytest.mark.asyncio
+async def test_count_strategies(db_session):
+    """Test small estimates fall back to an exact count and report it"""
+    service = PublicationService(db_session)
+    query = select(Publication).where(Publication.tribunal == "TJBA")
+    
+    await service.bulk_create([
+        PublicationCreate(
+            tribunal="TJBA",
+            publication_date=date(2024, 3, 5),
+            process_number=f"000000{i}-00.2024.8.05.0001",
+            content="Despacho",
+        )
+        for i in range(2)
+    ])
+    
+    exact = await service.count_publications(query, "exact", {"tribunal": "TJBA"}, "TJBA")
+    assert (exact.value, exact.strategy) == (2, "exact")
+    
+    estimated = await service.count_publications(query, "estimated", {"tribunal": "TJBA"}, "TJBA")
+    assert (estimated.value, estimated.strategy) == (2, "exact")
+    
+    # Sem cache configurado, cached também conta exatamente
+    cached = await service.count_publications(query, "cached", {"tribunal": "TJBA"}, "TJBA")
+    assert cached.strategy == "exact"
+
+
+def test_count_explain_and_cache_keys():
+    """Test EXPLAIN wrapper keeps bound filters and cache keys ignore param order"""
+    query = select(Publication).where(Publication.tribunal == "TJSP")
+    sql = str(Explain(query).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "publications.tribunal = %(tribunal_1)s" in sql
+    
+    cache = CacheService()
+    key = cache.query_key("count", {"tribunal": "TJSP", "q": "tutela", "party": None})
+    assert key.startswith("count:")
+    assert key == cache.query_key("count", {"q": "tutela", "tribunal": "TJSP"})
+    assert key != cache.query_key("count", {"q": "tutela"})
+    assert ingest_tags("TJSP", date(2024, 3, 1)) == ["tribunal:TJSP", "tribunal:*", "date:2024-03-01"]
+
+
+@pytest.mark.asyncio
+async def test_cached_count_discards_total_counted_across_ingest():
+    """Test a cached count that overlaps an ingest invalidation is not kept for COUNT_CACHE_TTL"""
+    cache = CacheService(local_size=0)
+    tribunal = f"T{uuid4().hex[:8]}"
+    service = CountService(db=None, cache=cache)
+    totals = iter([10, 11])
+    
+    async def exact_during_ingest(query):
+        # Ingestão do tribunal termina enquanto o COUNT ainda roda
+        await cache.invalidate_tags(*ingest_tags(tribunal, date(2024, 3, 1)))
+        return next(totals)
+    
+    async def exact(query):
+        return next(totals)
+    
+    signature = {"tribunal": tribunal}
+    try:
+        service.exact = exact_during_ingest
+        assert await service.count(select(Publication), "cached", signature, tribunal) == TotalCount(10, "exact")
+        service.exact = exact
+        assert await service.count(select(Publication), "cached", signature, tribunal) == TotalCount(11, "exact")
+        assert await service.count(select(Publication), "cached", signature, tribunal) == TotalCount(11, "cached")
+    finally:
+        await cache.invalidate_tags(tribunal_tag(tribunal))
+        await cache.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_cache_tag_invalidation():
+    """Test read-through caching and ingest-driven tag invalidation"""
+    cache = CacheService()
+    calls = []
+    
+    async def load():
+        calls.append(1)
+        return {"total": len(calls)}
+    
+    tjsp_key = cache.query_key("test:list", {"tribunal": "TJSP"})
+    tjrj_key = cache.query_key("test:list", {"tribunal": "TJRJ"})
+    await cache.delete(tjsp_key)
+    await cache.delete(tjrj_key)
+    
+    try:
+        assert await cache.get_or_set(tjsp_key, load, tags=["tribunal:TJSP"]) == {"total": 1}
+        assert await cache.get_or_set(tjsp_key, load, tags=["tribunal:TJSP"]) == {"total": 1}
+        assert await cache.set(tjrj_key, {"total": 0}, tags=["tribunal:TJRJ"])
+        
+        assert await cache.invalidate_tags(*ingest_tags("TJSP", date(2024, 3, 1))) == 1
+        assert await cache.get(tjsp_key) is None
+        assert await cache.get(tjrj_key) == {"total": 0}
+    finally:
+        await cache.invalidate_tags("tribunal:TJRJ")
+        await cache.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation_during_load_is_not_stored():
+    """Test a read-through fill computed across an invalidation does not re-store a stale value"""
+    cache = CacheService(local_size=0)
+    tag = f"test:race:{uuid4()}"
+    key = cache.query_key("test:race", {"tag": tag})
+    
+    async def stale_load():
+        # Ingestão invalida a tag enquanto o valor antigo é calculado
+        await cache.invalidate_tags(tag)
+        return {"total": 1}
+    
+    async def fresh_load():
+        return {"total": 2}
+    
+    try:
+        assert await cache.get_or_set(key, stale_load, tags=[tag]) == {"total": 1}
+        assert await cache.get(key) is None
+        assert await cache.get_or_set(key, fresh_load, tags=[tag]) == {"total": 2}
+        assert await cache.get(key) == {"total": 2}
+        
+        stats = await cache.warm({key: stale_load}, tags=[tag], force=True)
+        assert stats.loaded == 1
+        assert await cache.get(key) is None
+    finally:
+        await cache.invalidate_tags(tag)
+        await cache.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_cache_multi_key_operations():
+    """Test pipelined get/set of many keys, warming and batched pattern deletes"""
+    cache = CacheService(local_size=0)
+    prefix = f"test:many:{uuid4()}"
+    keys = [f"{prefix}:{i}" for i in range(25)]
+    
+    async def failing():
+        raise RuntimeError("falha")
+    
+    try:
+        assert await cache.set_many({key: {"i": i} for i, key in enumerate(keys[:20])})
+        values = await cache.get_many(keys)
+        assert len(values) == 20 and values[keys[3]] == {"i": 3}
+        
+        loaders = {key: (lambda key=key: asyncio.sleep(0, result=key)) for key in keys[18:24]}
+        loaders[keys[24]] = failing
+        stats = await cache.warm(loaders)
+        assert (stats.requested, stats.cached, stats.loaded, stats.failed) == (7, 2, 4, [keys[24]])
+        assert await cache.get(keys[23]) == keys[23]
+        
+        assert await cache.delete_many(keys[0], keys[1]) == 2
+        assert await cache.delete_pattern(f"{prefix}:*", batch_size=5) == 22
+        assert await cache.get_many(keys) == {}
+    finally:
+        await cache.delete_pattern(f"{prefix}:*")
+        await cache.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_cache_set_many_empty_is_noop():
+    """Test an empty set_many neither touches Redis nor sends an empty SADD"""
+    cache = CacheService(local_size=0)
+    assert await cache.set_many({}, tags=["tribunal:TJSP"])
+    assert cache.redis is None
+
+
+
+def test_local_cache_lru_and_ttl():
+    """Test in-process tier evicts least recently used entries and honours TTLs"""
+    local = LocalCache(max_size=2, ttl=60)
+    local.set("a", 1)
+    local.set("b", 2)
+    assert local.get("a") == 1
+    local.set("c", 3)
+    assert local.get("b") is None
+    assert (local.get("a"), local.get("c")) == (1, 3)
+    
+    local.set("a", 1, ttl=0)
+    assert local.get("a") is None
+    local.delete("c")
+    assert len(local) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_single_flight():
+    """Test concurrent misses for one key share a single load"""
+    cache = CacheService()
+    key = cache.query_key("test:single-flight", {"id": str(uuid4())})
+    calls = []
+    
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"total": 42}
+    
+    try:
+        results = await asyncio.gather(*(cache.get_or_set(key, load) for _ in range(100)))
+        assert len(calls) == 1
+        assert all(result == {"total": 42} for result in results)
+        assert await cache.get_or_set(key, load) == {"total": 42}
+        assert len(calls) == 1
+    finally:
+        await cache.delete(key)
+        await cache.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_get_or_set_survives_cancelled_leader():
+    """Test callers coalesced on a load whose caller was cancelled still get the value"""
+    cache = CacheService()
+    key = cache.query_key("test:single-flight", {"id": str(uuid4())})
+    started = asyncio.Event()
+    calls = []
+    
+    async def load():
+        calls.append(1)
+        started.set()
+        await asyncio.sleep(0.05)
+        return {"total": 42}
+    
+    try:
+        leader = asyncio.create_task(cache.get_or_set(key, load))
+        await started.wait()
+        waiters = [asyncio.create_task(cache.get_or_set(key, load)) for _ in range(10)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await asyncio.gather(*waiters) == [{"total": 42}] * 10
+        assert leader.cancelled()
+        assert len(calls) == 2
+    finally:
+        await cache.delete(key)
+        await cache.disconnect()
+
+
+def test_cache_codecs_round_trip_and_compress():
+    """Test every codec round-trips, compresses above the threshold and reads the others' output"""
+    value = {"items": [{"id": str(uuid4()), "content": "Decisão " * 200}], "total": 3, "next_cursor": None}
+    codecs = [get_codec(name, compress_threshold=1024) for name, (_, available) in CODECS.items() if available]
+    
+    for codec in codecs:
+        small = codec.encode({"total": 3})
+        assert small[1:2] == b"-"
+        
+        encoded = codec.encode(value)
+        assert encoded[1:2] == b"z"
+        assert len(encoded) < len(codec.dumps(value))
+        for other in codecs:
+            assert other.decode(encoded) == value
+    
+    with pytest.raises(ValueError):
+        codecs[0].decode(b"?-{}")